@@ -1,11 +1,20 @@
-import os
-from typing import Optional
+import os, time
+from typing import Optional, Union, Dict, Any
+import numpy as np
 from dotenv import load_dotenv
 
+from config import (ASR_CASCADE_MIN_LOGPROB, ASR_CASCADE_MAX_NO_SPEECH, ASR_CASCADE_SEGMENTS,
+                    ASR_BACKEND, ASR_BACKEND_FAST)
+from asr_backends import make_backend
+
 load_dotenv(override=True)
 
 ASR_MODEL = os.getenv("ASR_MODEL", "small")
 ASR_MODEL_FAST = os.getenv("ASR_MODEL_FAST", "tiny")
+WHISPER_SR = 16000
+
+# a path (decoded by whisper through ffmpeg) or a mono float32 array from audio_utils.record_utterance
+Audio = Union[str, np.ndarray]
 
 _full_model = None
 _fast_model = None
@@ -13,41 +22,102 @@ _fast_model = None
 def _get_full_model():
     global _full_model
     if _full_model is None:
-        import whisper
-        _full_model = whisper.load_model(ASR_MODEL)
+        _full_model = make_backend(ASR_BACKEND, ASR_MODEL)
     return _full_model
 
 def _get_fast_model():
     global _fast_model
     if _fast_model is None:
-        import whisper
-        _fast_model = whisper.load_model(ASR_MODEL_FAST)
+        _fast_model = make_backend(ASR_BACKEND_FAST or ASR_BACKEND, ASR_MODEL_FAST)
     return _fast_model
 
-def transcribe_file(path: str, language: Optional[str] = None) -> str:
-    model = _get_full_model()
-    out = model.transcribe(
-        path,
-        language=language,
-        condition_on_previous_text=False,
-        temperature=0.0,
-        fp16=False,
-        without_timestamps=True,
-        logprob_threshold=-1.0,
-        no_speech_threshold=0.5,
-    )
-    return (out.get("text") or "").strip()
-
-def transcribe_file_fast(path: str, language: Optional[str] = None) -> str:
-    model = _get_fast_model()
-    out = model.transcribe(
-        path,
-        language=language,
-        condition_on_previous_text=False,
-        temperature=0.0,
-        fp16=False,
-        without_timestamps=True,
-        logprob_threshold=-1.0,
-        no_speech_threshold=0.5,
-    )
-    return (out.get("text") or "").strip()
+def as_whisper_input(audio: Audio, sr: int = WHISPER_SR) -> Audio:
+    """Arrays go to whisper by reference (float32, 16 kHz mono); no temp file, no ffmpeg."""
+    if isinstance(audio, str):
+        return audio
+    a = np.asarray(audio, dtype=np.float32)
+    if a.ndim > 1:
+        a = a.mean(axis=1)
+    if sr != WHISPER_SR and len(a):
+        n = int(round(len(a) * WHISPER_SR / sr))
+        a = np.interp(np.arange(n) * (sr / WHISPER_SR), np.arange(len(a)), a).astype(np.float32)
+    return a
+
+def _decode(model, audio: Audio, language: Optional[str], timestamps: bool = False) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    out = model.transcribe(audio, language=language, timestamps=timestamps)
+    segs = out["segments"]
+    ntok = [max(1, len(sg["tokens"])) for sg in segs]
+    wmean = lambda k, d: (sum(n * sg[k] for n, sg in zip(ntok, segs)) / sum(ntok)) if segs else d
+    return {
+        "text": out["text"],
+        "avg_logprob": wmean("avg_logprob", 0.0),          # token-weighted over segments
+        "no_speech_prob": wmean("no_speech_prob", 1.0),
+        "segments": [{k: sg[k] for k in ("start", "end", "text", "avg_logprob", "no_speech_prob")} for sg in segs],
+        "elapsed_s": time.perf_counter() - t0,
+    }
+
+def _transcribe(model, audio: Audio, language: Optional[str], sr: int) -> str:
+    return _decode(model, as_whisper_input(audio, sr), language)["text"]
+
+def transcribe_file(path: Audio, language: Optional[str] = None, sr: int = WHISPER_SR) -> str:
+    return _transcribe(_get_full_model(), path, language, sr)
+
+def transcribe_file_fast(path: Audio, language: Optional[str] = None, sr: int = WHISPER_SR) -> str:
+    return _transcribe(_get_fast_model(), path, language, sr)
+
+# cascade: tiny first, small only when tiny is unsure (whole clip, or just its weak segments)
+cascade_stats = {"turns": 0, "escalated": 0, "segments_redone": 0, "segments_seen": 0, "fast_s": 0.0, "full_s": 0.0}
+
+def is_confident(info: Dict[str, Any], min_logprob: float = ASR_CASCADE_MIN_LOGPROB,
+                 max_no_speech: float = ASR_CASCADE_MAX_NO_SPEECH) -> bool:
+    if not info["text"]:
+        return info["no_speech_prob"] >= max_no_speech      # confident silence
+    return info["avg_logprob"] >= min_logprob and info["no_speech_prob"] < max_no_speech
+
+def transcribe_fast_info(audio: Audio, language: Optional[str] = None, sr: int = WHISPER_SR,
+                         timestamps: bool = ASR_CASCADE_SEGMENTS) -> Dict[str, Any]:
+    """Tiny-model text plus avg_logprob / no_speech_prob (the cascade's first stage)."""
+    return _decode(_get_fast_model(), as_whisper_input(audio, sr), language, timestamps)
+
+def escalate(audio: Audio, fast: Dict[str, Any], language: Optional[str] = None, sr: int = WHISPER_SR,
+             min_logprob: float = ASR_CASCADE_MIN_LOGPROB, max_no_speech: float = ASR_CASCADE_MAX_NO_SPEECH,
+             segments: bool = ASR_CASCADE_SEGMENTS) -> Dict[str, Any]:
+    """Second stage: keep the tiny text if confident, else re-decode with the full model."""
+    t0 = time.perf_counter()
+    cascade_stats["turns"] += 1
+    cascade_stats["fast_s"] += fast["elapsed_s"]
+    res = {"text": fast["text"], "tier": "fast", "fast": fast, "full": None}
+    if is_confident(fast, min_logprob, max_no_speech):
+        return res
+    cascade_stats["escalated"] += 1
+    a = as_whisper_input(audio, sr)
+    weak = [sg for sg in fast["segments"] if sg["avg_logprob"] < min_logprob or sg["no_speech_prob"] >= max_no_speech]
+    cascade_stats["segments_seen"] += len(fast["segments"])
+    if segments and not isinstance(a, str) and fast["segments"] and len(weak) < len(fast["segments"]):
+        # only the weak segments (padded a little) go to the full model
+        parts = []
+        for sg in fast["segments"]:
+            if sg in weak:
+                lo = max(0, int((sg["start"] - 0.2) * WHISPER_SR))
+                hi = min(len(a), int((sg["end"] + 0.2) * WHISPER_SR))
+                parts.append(_decode(_get_full_model(), a[lo:hi], language)["text"] if hi > lo else sg["text"])
+                cascade_stats["segments_redone"] += 1
+            else:
+                parts.append(sg["text"])
+        res.update(text=" ".join(p for p in parts if p).strip(), tier="full-segments")
+    else:
+        full = _decode(_get_full_model(), a, language)
+        cascade_stats["segments_redone"] += len(fast["segments"])
+        res.update(text=full["text"], tier="full", full=full)
+    cascade_stats["full_s"] += time.perf_counter() - t0
+    return res
+
+def transcribe_cascade(audio: Audio, language: Optional[str] = None, sr: int = WHISPER_SR, **kw) -> Dict[str, Any]:
+    return escalate(audio, transcribe_fast_info(audio, language, sr), language, sr, **kw)
+
+def cascade_metrics() -> Dict[str, Any]:
+    s = dict(cascade_stats)
+    s["escalation_rate"] = s["escalated"] / s["turns"] if s["turns"] else 0.0
+    s["segment_escalation_rate"] = s["segments_redone"] / s["segments_seen"] if s["segments_seen"] else 0.0
+    return s
@@ -0,0 +1,115 @@
+# ASR backends behind one interface, chosen per model tier (ASR_BACKEND / ASR_BACKEND_FAST).
+#   whisper         openai-whisper PyTorch models, fp32 on CPU (the original path)
+#   faster-whisper  CTranslate2 models: int8 / int8_float32 compute, cpu_threads, num_workers, Silero VAD filter
+# Both return the same dict: {"text", "segments": [{"start","end","text","avg_logprob","no_speech_prob","tokens","words"}]}
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, List
+import numpy as np
+
+from config import ASR_COMPUTE_TYPE, ASR_CPU_THREADS, ASR_NUM_WORKERS, ASR_VAD_FILTER, DEBUG
+
+try:
+    import faster_whisper  # type: ignore
+    _FW_OK = True
+except Exception:
+    _FW_OK = False
+
+
+class ASRBackend(ABC):
+    name = "base"
+
+    def __init__(self, model: str) -> None:
+        self.model_name = model
+
+    @abstractmethod
+    def transcribe(self, audio, language: Optional[str] = None, timestamps: bool = False,
+                   word_timestamps: bool = False, initial_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """float32 16 kHz mono array (or a file path) -> {"text", "segments"}."""
+
+    def __repr__(self) -> str:
+        return f"{self.name}:{self.model_name}"
+
+
+class WhisperBackend(ASRBackend):
+    name = "whisper"
+
+    def __init__(self, model: str) -> None:
+        super().__init__(model)
+        import whisper
+        self.model = whisper.load_model(model)
+
+    def transcribe(self, audio, language=None, timestamps=False, word_timestamps=False, initial_prompt=None):
+        out = self.model.transcribe(
+            audio,
+            language=language,
+            initial_prompt=initial_prompt,
+            word_timestamps=word_timestamps,
+            condition_on_previous_text=False,
+            temperature=0.0,
+            fp16=False,
+            without_timestamps=not (timestamps or word_timestamps),
+            logprob_threshold=-1.0,
+            no_speech_threshold=0.5,
+        )
+        segs = [{"start": float(sg.get("start", 0.0)), "end": float(sg.get("end", 0.0)),
+                 "text": (sg.get("text") or "").strip(), "avg_logprob": float(sg.get("avg_logprob", 0.0)),
+                 "no_speech_prob": float(sg.get("no_speech_prob", 0.0)), "tokens": list(sg.get("tokens") or []),
+                 "words": [{"word": w["word"], "start": float(w["start"]), "end": float(w["end"])}
+                           for w in sg.get("words") or []]}
+                for sg in out.get("segments") or []]
+        return {"text": (out.get("text") or "").strip(), "segments": segs}
+
+
+class FasterWhisperBackend(ASRBackend):
+    name = "faster-whisper"
+
+    def __init__(self, model: str, compute_type: str = ASR_COMPUTE_TYPE, cpu_threads: int = ASR_CPU_THREADS,
+                 num_workers: int = ASR_NUM_WORKERS, vad_filter: bool = ASR_VAD_FILTER) -> None:
+        super().__init__(model)
+        self.compute_type, self.vad_filter = compute_type, vad_filter
+        self.model = faster_whisper.WhisperModel(model, device="cpu", compute_type=compute_type,
+                                                 cpu_threads=cpu_threads, num_workers=num_workers)
+
+    def transcribe(self, audio, language=None, timestamps=False, word_timestamps=False, initial_prompt=None):
+        if not isinstance(audio, str):
+            audio = np.asarray(audio, dtype=np.float32)
+        segments, _info = self.model.transcribe(
+            audio,
+            language=language,
+            initial_prompt=initial_prompt,
+            word_timestamps=word_timestamps,
+            condition_on_previous_text=False,
+            temperature=0.0,
+            beam_size=1,                       # greedy, like openai-whisper at temperature 0
+            without_timestamps=not (timestamps or word_timestamps),
+            log_prob_threshold=-1.0,
+            no_speech_threshold=0.5,
+            vad_filter=self.vad_filter,
+        )
+        segs = [{"start": float(sg.start), "end": float(sg.end), "text": sg.text.strip(),
+                 "avg_logprob": float(sg.avg_logprob), "no_speech_prob": float(sg.no_speech_prob),
+                 "tokens": list(sg.tokens or []),
+                 "words": [{"word": w.word, "start": float(w.start), "end": float(w.end)} for w in sg.words or []]}
+                for sg in segments]          # generator: decoding happens here
+        return {"text": " ".join(sg["text"] for sg in segs).strip(), "segments": segs}
+
+    def __repr__(self) -> str:
+        return f"{self.name}:{self.model_name}:{self.compute_type}"
+
+
+BACKENDS = {"whisper": WhisperBackend, "faster-whisper": FasterWhisperBackend}
+
+
+def make_backend(kind: str, model: str, fallback: bool = True, **kw) -> ASRBackend:
+    """kind = whisper | faster-whisper; faster-whisper falls back to whisper when not installed (unless fallback=False)."""
+    kind = (kind or "whisper").strip().lower().replace("_", "-")
+    if kind not in BACKENDS:
+        raise ValueError(f"unknown ASR backend {kind!r} (expected one of {', '.join(BACKENDS)})")
+    if kind == "faster-whisper" and not _FW_OK:
+        if not fallback:
+            raise ImportError("faster-whisper is not installed (pip install faster-whisper)")
+        print("[WARN] faster-whisper not installed; using openai-whisper")
+        kind = "whisper"
+    backend = BACKENDS[kind](model, **kw) if kind != "whisper" else WhisperBackend(model)
+    if DEBUG: print(f"[DBG] ASR backend loaded: {backend!r}")
+    return backend
@@ -0,0 +1,140 @@
+# WER / latency trade-off of the tiny→small ASR cascade on a recorded corpus
+#   python asr_report.py --corpus recordings/                 # *.wav with a sibling *.txt reference
+#   python asr_report.py --manifest corpus.jsonl              # {"audio": "path.wav", "text": "reference"} per line
+#   python asr_report.py --corpus recordings/ --thresholds=-0.3,-0.6,-1.0 --segments --out report.json
+# Every clip is decoded once by each model; each threshold's policy is then replayed from those results
+# (tiny time + small time when escalated). --segments also runs the segment-level cascade for real.
+import re, sys, json, argparse, statistics
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+import numpy as np
+import soundfile as sf
+
+import asr
+from config import ASR_CASCADE_MIN_LOGPROB, ASR_CASCADE_MAX_NO_SPEECH
+
+
+def normalize(text: str) -> List[str]:
+    return re.sub(r"[^a-z0-9' ]+", " ", (text or "").lower()).split()
+
+
+def edit_distance(ref: List[str], hyp: List[str]) -> int:
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1]
+
+
+def wer(pairs: List[Tuple[str, str]]) -> float:
+    """Corpus WER: total word edits / total reference words."""
+    errs = words = 0
+    for ref, hyp in pairs:
+        r = normalize(ref)
+        errs += edit_distance(r, normalize(hyp))
+        words += len(r)
+    return errs / max(1, words)
+
+
+def load_corpus(corpus: str = "", manifest: str = "") -> List[Dict[str, str]]:
+    items = []
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    d = json.loads(line)
+                    items.append({"audio": d["audio"], "text": d.get("text") or d.get("reference") or ""})
+    if corpus:
+        for wav in sorted(Path(corpus).rglob("*.wav")):
+            ref = wav.with_suffix(".txt")
+            if ref.exists():
+                items.append({"audio": str(wav), "text": ref.read_text(encoding="utf-8").strip()})
+    return items
+
+
+def load_audio(path: str) -> Tuple[np.ndarray, int]:
+    a, sr = sf.read(path, dtype="float32")
+    return asr.as_whisper_input(a, sr), asr.WHISPER_SR
+
+
+def _lat(xs: List[float]) -> Dict[str, float]:
+    xs = sorted(xs)
+    p = lambda q: 1000 * xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+    return {"p50_ms": p(0.5), "p90_ms": p(0.9), "mean_ms": 1000 * statistics.fmean(xs) if xs else 0.0}
+
+
+def run(items: List[Dict[str, str]], thresholds: List[float], max_no_speech: float, language=None) -> Dict[str, Any]:
+    rows = []
+    asr._get_fast_model(); asr._get_full_model()          # model loads stay out of the timings
+    for i, it in enumerate(items, 1):
+        a, sr = load_audio(it["audio"])
+        fast = asr.transcribe_fast_info(a, language, sr, timestamps=False)
+        full = asr._decode(asr._get_full_model(), a, language)
+        rows.append({"audio": it["audio"], "ref": it["text"], "dur_s": len(a) / sr, "fast": fast, "full": full})
+        print(f"[{i}/{len(items)}] {Path(it['audio']).name}: tiny={fast['avg_logprob']:.2f} "
+              f"({1000 * fast['elapsed_s']:.0f} ms) small={1000 * full['elapsed_s']:.0f} ms", file=sys.stderr)
+
+    audio_s = sum(r["dur_s"] for r in rows)
+
+    def policy(name: str, texts: List[str], lats: List[float], escalated: int) -> Dict[str, Any]:
+        return {"policy": name, "wer": wer([(r["ref"], t) for r, t in zip(rows, texts)]),
+                "escalation_rate": escalated / max(1, len(rows)), "rtf": sum(lats) / max(1e-9, audio_s), **_lat(lats)}
+
+    report = [
+        policy("tiny only", [r["fast"]["text"] for r in rows], [r["fast"]["elapsed_s"] for r in rows], 0),
+        policy("small only", [r["full"]["text"] for r in rows], [r["full"]["elapsed_s"] for r in rows], len(rows)),
+        policy("tiny + small (old)", [r["full"]["text"] for r in rows],
+               [r["fast"]["elapsed_s"] + r["full"]["elapsed_s"] for r in rows], len(rows)),
+    ]
+    for thr in thresholds:
+        esc = [not asr.is_confident(r["fast"], thr, max_no_speech) for r in rows]
+        report.append(policy(f"cascade logprob<{thr:g}",
+                             [r["full"]["text"] if e else r["fast"]["text"] for r, e in zip(rows, esc)],
+                             [r["fast"]["elapsed_s"] + (r["full"]["elapsed_s"] if e else 0.0) for r, e in zip(rows, esc)],
+                             sum(esc)))
+    return {"clips": len(rows), "audio_s": audio_s, "policies": report}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="ASR cascade WER/latency report")
+    ap.add_argument("--corpus", default="", help="directory of *.wav + *.txt references")
+    ap.add_argument("--manifest", default="", help='JSONL with {"audio", "text"}')
+    ap.add_argument("--thresholds", default=f"-0.3,-0.45,{ASR_CASCADE_MIN_LOGPROB:g},-0.8,-1.0")
+    ap.add_argument("--max-no-speech", type=float, default=ASR_CASCADE_MAX_NO_SPEECH)
+    ap.add_argument("--segments", action="store_true", help="also run the segment-level cascade (first threshold)")
+    ap.add_argument("--language", default=None)
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    items = load_corpus(args.corpus, args.manifest)
+    if not items:
+        sys.exit("no clips with references found")
+    thresholds = [float(x) for x in args.thresholds.split(",") if x.strip()]
+    res = run(items, thresholds, args.max_no_speech, args.language)
+
+    if args.segments:
+        rows, lats = [], []
+        for it in items:
+            a, sr = load_audio(it["audio"])
+            before = asr.cascade_stats["full_s"]
+            fast = asr.transcribe_fast_info(a, args.language, sr, timestamps=True)
+            r = asr.escalate(a, fast, args.language, sr, min_logprob=thresholds[0],
+                             max_no_speech=args.max_no_speech, segments=True)
+            rows.append((it["text"], r["text"]))
+            lats.append(fast["elapsed_s"] + asr.cascade_stats["full_s"] - before)
+        m = asr.cascade_metrics()
+        res["policies"].append({"policy": f"segment cascade logprob<{thresholds[0]:g}", "wer": wer(rows),
+                                "escalation_rate": m["escalation_rate"],
+                                "segment_escalation_rate": m["segment_escalation_rate"],
+                                "rtf": sum(lats) / max(1e-9, res["audio_s"]), **_lat(lats)})
+
+    print(f"\n{res['clips']} clips, {res['audio_s']:.1f}s audio")
+    print(f"{'policy':<32} {'WER':>6} {'escalate':>9} {'p50 ms':>8} {'p90 ms':>8} {'RTF':>6}")
+    for p in res["policies"]:
+        print(f"{p['policy']:<32} {p['wer']:>6.3f} {p['escalation_rate']:>9.2f} {p['p50_ms']:>8.0f} "
+              f"{p['p90_ms']:>8.0f} {p['rtf']:>6.3f}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(res, indent=2), encoding="utf-8")
+        print(f"saved -> {args.out}")
@@ -0,0 +1,170 @@
+# Incremental ASR while the user is still speaking.
+# Voiced frames from the recorder are appended to a buffer; a worker thread re-decodes the buffer every
+# ASR_STREAM_STEP_MS and commits the words two consecutive hypotheses agree on (local agreement).
+# Once the buffer is longer than ASR_STREAM_WINDOW_S it is cut at the last committed word. At end-of-speech
+# the last hypothesis is used as is if it already covered the whole buffer; otherwise the buffer is cut at
+# the last committed word and only the uncommitted tail is decoded, with the committed text as prompt.
+import re, threading, time
+from typing import Optional, Callable, List, Tuple, Dict, Any
+import numpy as np
+
+from config import MIC_SAMPLE_RATE, MIC_CHANNELS, ASR_STREAM_STEP_MS, ASR_STREAM_WINDOW_S, DEBUG
+import asr
+
+Word = Tuple[float, float, str]          # (start_s, end_s, text), absolute time within the utterance
+
+
+def _norm(w: str) -> str:
+    return re.sub(r"[^\w']+", "", w.lower())
+
+
+class StreamingTranscriber:
+    def __init__(self, language: Optional[str] = None, step_ms: int = ASR_STREAM_STEP_MS,
+                 window_s: float = ASR_STREAM_WINDOW_S, sample_rate: int = MIC_SAMPLE_RATE,
+                 on_partial: Optional[Callable[[str], None]] = None, model_getter: Callable = asr._get_full_model):
+        self.language, self.sr = language, sample_rate
+        self.step = max(1, int(sample_rate * step_ms / 1000))
+        self.window = int(sample_rate * window_s)
+        self.on_partial = on_partial
+        self._get_model = model_getter
+
+        self._chunks: List[np.ndarray] = []      # float32 audio since the last cut
+        self._n = 0                              # samples in _chunks
+        self._offset = 0.0                       # utterance time of _chunks[0]
+        self._decoded_n = 0                      # buffer length at the last decode
+        self._committed: List[Word] = []
+        self._pending: List[Word] = []           # latest hypothesis past the committed words
+        self._hyp_end: Optional[float] = None    # utterance time the latest hypothesis was decoded up to
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._decode_lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"decodes": 0, "decode_s": 0.0, "audio_s": 0.0, "cuts": 0, "final_tail_s": 0.0,
+                                      "final_reused": False}
+
+    # input
+    def start(self) -> "StreamingTranscriber":
+        self._get_model()                        # load before speech starts, not on the first step
+        self._thread = threading.Thread(target=self._worker, name="asr-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def feed(self, pcm: np.ndarray) -> None:
+        """One int16 (or float32) frame from the recorder; never blocks on decoding."""
+        a = np.asarray(pcm)
+        if a.ndim > 1:
+            a = a.reshape(-1, MIC_CHANNELS).mean(axis=1) if MIC_CHANNELS > 1 else a.reshape(-1)
+        a = a.astype(np.float32) / 32768.0 if a.dtype == np.int16 else a.astype(np.float32, copy=False)
+        with self._cond:
+            self._chunks.append(a)
+            self._n += len(a)
+            self.stats["audio_s"] += len(a) / self.sr
+            if self._n - self._decoded_n >= self.step:
+                self._cond.notify()
+
+    # decoding
+    def _buffer(self) -> Tuple[np.ndarray, float, str]:
+        with self._cond:
+            if len(self._chunks) > 1:
+                self._chunks = [np.concatenate(self._chunks)]
+            audio = self._chunks[0] if self._chunks else np.zeros(0, np.float32)
+            self._decoded_n = self._n
+            return audio, self._offset, self.committed_text()
+
+    def _decode(self, audio: np.ndarray, offset: float, prompt: str) -> List[Word]:
+        t0 = time.perf_counter()
+        with self._decode_lock:
+            out = self._get_model().transcribe(audio, language=self.language, word_timestamps=True,
+                                               initial_prompt=prompt[-200:] or None)
+        self.stats["decodes"] += 1
+        self.stats["decode_s"] += time.perf_counter() - t0
+        words = [(offset + float(w["start"]), offset + float(w["end"]), w["word"].strip())
+                 for seg in out["segments"] for w in seg["words"] if w["word"].strip()]
+        # keep what lies past the committed audio, minus any re-decoded overlap with the committed tail
+        last_t = self._committed[-1][1] if self._committed else 0.0
+        words = [w for w in words if w[0] > last_t - 0.1]
+        tail = [_norm(w[2]) for w in self._committed[-5:]]
+        for k in range(min(len(tail), len(words)), 0, -1):
+            if tail[-k:] == [_norm(w[2]) for w in words[:k]]:
+                return words[k:]
+        return words
+
+    def _agree(self, hyp: List[Word]) -> None:
+        """Commit the longest prefix the previous and the new hypothesis share."""
+        n = 0
+        while n < min(len(hyp), len(self._pending)) and _norm(hyp[n][2]) == _norm(self._pending[n][2]):
+            n += 1
+        self._committed.extend(hyp[:n])
+        self._pending = hyp[n:]
+
+    def _cut(self, force: bool = False) -> None:
+        """Drop audio up to the last committed word once the buffer exceeds the window (or always if force)."""
+        with self._cond:
+            if (not force and self._n <= self.window) or not self._committed:
+                return
+            cut_t = self._committed[-1][1]
+            k = int((cut_t - self._offset) * self.sr)
+            if k <= 0:
+                return
+            buf = np.concatenate(self._chunks)[k:]
+            self._chunks, self._n = [buf], len(buf)
+            self._decoded_n = max(0, self._decoded_n - k)
+            self._offset = cut_t
+            self.stats["cuts"] += 1
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and self._n - self._decoded_n < self.step:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            audio, offset, prompt = self._buffer()
+            try:
+                hyp = self._decode(audio, offset, prompt)
+            except Exception as e:
+                if DEBUG: print(f"[DBG] streaming ASR decode failed: {e}")
+                continue
+            with self._cond:
+                self._agree(hyp)
+                self._hyp_end = offset + len(audio) / self.sr
+                if self._closed:                 # finish() takes it from here, with this result
+                    return
+            self._cut()
+            if self.on_partial:
+                self.on_partial(self.partial_text())
+
+    # output
+    def committed_text(self) -> str:
+        return " ".join(w[2] for w in self._committed).strip()
+
+    def partial_text(self) -> str:
+        return " ".join(w[2] for w in self._committed + self._pending).strip()
+
+    def finish(self) -> str:
+        """End of speech: decode the uncommitted tail at most once and return the full transcript."""
+        t0 = time.perf_counter()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()                  # an in-flight decode is applied, not thrown away
+        end_t = self._offset + self._n / self.sr
+        if self._hyp_end is not None and end_t - self._hyp_end < 0.1:
+            # the last step already heard everything: its hypothesis is the final one
+            self._committed.extend(self._pending)
+            audio = np.zeros(0, np.float32)
+            self.stats["final_reused"] = True
+        else:
+            self._cut(force=True)
+            audio, offset, prompt = self._buffer()
+            if len(audio) >= self.sr // 10:
+                self._committed.extend(self._decode(audio, offset, prompt))
+        self._pending = []
+        self.stats["final_tail_s"] = time.perf_counter() - t0
+        self.stats["tail_audio_s"] = len(audio) / self.sr
+        if DEBUG:
+            s = self.stats
+            print(f"[DBG] ASR_STREAM audio={s['audio_s']:.1f}s decodes={s['decodes']} cuts={s['cuts']} "
+                  f"tail={s['tail_audio_s']:.1f}s in {1000 * s['final_tail_s']:.0f} ms")
+        return self.committed_text()
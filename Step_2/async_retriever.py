@@ -0,0 +1,113 @@
+# Asyncio retriever on the async Neo4j driver: all _variants() queries go out concurrently,
+# rows are merged as they arrive, and outstanding queries are cancelled once the early-stop
+# condition (len(pool) >= 3*k) is met or the per-call deadline expires.
+# Result rows have the same shape as Retriever.search_topk (id, quote, source, people, score, _rerank).
+import asyncio, time
+from typing import Optional, Dict, Any, List
+from neo4j import AsyncGraphDatabase
+
+from config import (
+    NEO4J_URI,
+    NEO4J_USER,
+    NEO4J_PASSWORD,
+    NEO4J_DATABASE,
+    NEO4J_FT_INDEX,
+    RETRIEVER_DEADLINE_S,
+    USE_FUZZY_FALLBACK,
+    DEBUG,
+)
+from retriever import _CYPHER, _variants, _clean_tokens, _merge_rows, _fuzzy_fill, _rerank_pool
+from retrieval_cache import RetrievalCache, default_cache
+from reranker import Reranker
+
+
+class AsyncRetriever:
+    def __init__(self, deadline_s: float = RETRIEVER_DEADLINE_S, cache: Optional[RetrievalCache] = None) -> None:
+        self.driver = AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        self.db = NEO4J_DATABASE
+        self.index = NEO4J_FT_INDEX
+        self.deadline_s = deadline_s
+        self.cache = cache if cache is not None else default_cache()
+        self.reranker = Reranker()
+        self.fuzzy = None
+        if USE_FUZZY_FALLBACK:
+            from fuzzy_index import load_fuzzy_index
+            self.fuzzy = load_fuzzy_index()
+        self.cancelled = 0           # variant queries cancelled (early stop or deadline)
+        self.deadline_hits = 0       # calls that returned on the deadline
+
+    async def close(self) -> None:
+        """Close the underlying async Neo4j driver."""
+        try:
+            await self.driver.close()
+        except Exception:
+            pass
+        if self.cache is not None:
+            self.cache.close()
+
+    def invalidate_cache(self) -> None:
+        if self.cache is not None:
+            self.cache.invalidate()
+        self.reranker.clear()
+
+    async def _run_many(self, q: str, limit: int) -> List[Dict[str, Any]]:
+        async with self.driver.session(database=self.db) as sess:
+            res = await sess.run(_CYPHER, {"index": self.index, "q": q, "limit": limit})
+            return await res.data()
+
+    async def search_topk(self, fragment: str, k: int = 5, min_score: float = 3.0,
+                          per_variant_limit: Optional[int] = None, deadline_s: Optional[float] = None) -> List[Dict[str, Any]]:
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(_clean_tokens(fragment or ""), k, min_score, per_variant_limit)
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+
+        limit = per_variant_limit if per_variant_limit is not None else max(k, 5)
+        budget = self.deadline_s if deadline_s is None else deadline_s
+        t_end = time.monotonic() + budget
+
+        tasks = {asyncio.create_task(self._run_many(q, limit)): q for q in _variants(fragment)}
+        pending = set(tasks)
+        pool: Dict[str, Dict[str, Any]] = {}
+        complete = True
+        try:
+            while pending:
+                remaining = t_end - time.monotonic()
+                if remaining <= 0:
+                    complete = False
+                    self.deadline_hits += 1
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is not None:
+                        if DEBUG: print(f"[DBG] FT_QUERY={tasks[t]!r} failed: {t.exception()}")
+                        complete = False
+                        continue
+                    rows = t.result()
+                    if DEBUG:
+                        print(f"[DBG] FT_QUERY={tasks[t]!r}  HITS={len(rows)}")
+                    _merge_rows(pool, tasks[t], rows, min_score)
+                if len(pool) >= 3 * k:
+                    break
+        finally:
+            for t in pending:
+                t.cancel()
+            self.cancelled += len(pending)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if self.fuzzy is not None and len(pool) < k:
+            _fuzzy_fill(self.fuzzy, fragment, pool, limit)
+
+        top = _rerank_pool(self.reranker, fragment, pool, k)
+        # partial pools (deadline / failed variant) are not cached
+        if key is not None and complete:
+            self.cache.put(key, top)
+        return top
+
+    async def search_best(self, fragment: str, min_score: float = 3.0) -> Optional[Dict[str, Any]]:
+        """Convenience wrapper: return only the best candidate after rerank."""
+        top = await self.search_topk(fragment, k=5, min_score=min_score)
+        return top[0] if top else None
@@ -1,11 +1,11 @@
 import queue, time, wave
+from typing import Optional, Callable, Tuple
 import numpy as np
 import sounddevice as sd
 import webrtcvad
 from config import DEBUG
 import io
 import soundfile as sf
-from pydub import AudioSegment
 
 from config import (
     MIC_SAMPLE_RATE, MIC_CHANNELS, MIC_BLOCK_MS,
@@ -13,12 +13,15 @@ from config import (
 )
 
 FRAME_SAMPLES = int(MIC_SAMPLE_RATE * (MIC_BLOCK_MS / 1000.0))
+GAIN_DB = -3.0   # light normalize, applied in place
 
 
-def record_utterance_wav(out_path: str) -> str:
+def record_utterance(on_frame: Optional[Callable[[np.ndarray], None]] = None) -> Tuple[np.ndarray, int]:
     """
-    VAD-gated recording from default microphone.
+    VAD-gated recording from default microphone, kept in memory.
     Stops after 500 ms silence following speech or when MAX_UTTERANCE_SECONDS(25s) is reached.
+    Returns (mono float32 in [-1, 1] with GAIN_DB applied, sample rate); pass the array to ASR / speaker ID as is.
+    on_frame receives every kept int16 frame as it arrives (streaming ASR).
     """
     vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
     audio_q: "queue.Queue[np.ndarray]" = queue.Queue()
@@ -37,8 +40,8 @@ def record_utterance_wav(out_path: str) -> str:
     )
     stream.start()
 
-    voiced_frames: list[bytes] = []
-    ring: list[bytes] = []
+    voiced_frames: list[np.ndarray] = []
+    ring: list[np.ndarray] = []
     triggered = False
     silence_ms = 0
     start = time.time()
@@ -47,19 +50,23 @@ def record_utterance_wav(out_path: str) -> str:
     try:
         while True:
             chunk = audio_q.get()
-            pcm = chunk.tobytes()
-            is_speech = vad.is_speech(pcm, MIC_SAMPLE_RATE)
+            is_speech = vad.is_speech(chunk.tobytes(), MIC_SAMPLE_RATE)
 
             if not triggered:
-                ring.append(pcm)
+                ring.append(chunk)
                 if len(ring) > max(1, int(300 / MIC_BLOCK_MS)):  # ~0.3s ring buffer
                     ring.pop(0)
                 if is_speech:
                     triggered = True
                     voiced_frames.extend(ring)
+                    if on_frame:
+                        for f in ring:
+                            on_frame(f)
                     ring.clear()
             else:
-                voiced_frames.append(pcm)
+                voiced_frames.append(chunk)
+                if on_frame:
+                    on_frame(chunk)
                 if is_speech:
                     silence_ms = 0
                 else:
@@ -74,20 +81,25 @@ def record_utterance_wav(out_path: str) -> str:
         stream.stop()
         stream.close()
 
-    # Write raw frames to WAV
-    with wave.open(out_path, "wb") as wf:
-        wf.setnchannels(MIC_CHANNELS)
-        wf.setsampwidth(2)  # int16
-        wf.setframerate(MIC_SAMPLE_RATE)
-        wf.writeframes(b"".join(voiced_frames))
-
-    # Light normalize & save
-    seg = AudioSegment.from_wav(out_path)
-    seg = seg.apply_gain(-3.0)
-    seg.export(out_path, format="wav")
+    if not voiced_frames:
+        return np.zeros(0, dtype=np.float32), MIC_SAMPLE_RATE
+    pcm = np.concatenate(voiced_frames).reshape(-1, MIC_CHANNELS)
+    audio = pcm[:, 0].astype(np.float32) if MIC_CHANNELS == 1 else pcm.mean(axis=1, dtype=np.float32)
+    audio *= (10.0 ** (GAIN_DB / 20.0)) / 32768.0        # int16 scale + gain, in place
+    return audio, MIC_SAMPLE_RATE
+
+
+def save_wav(out_path: str, audio: np.ndarray, sr: int = MIC_SAMPLE_RATE) -> str:
+    sf.write(out_path, audio, sr, subtype="PCM_16")
     return out_path
 
 
+def record_utterance_wav(out_path: str, on_frame: Optional[Callable[[np.ndarray], None]] = None) -> str:
+    """record_utterance() written to a 16-bit WAV (for tools that want a file)."""
+    audio, sr = record_utterance(on_frame)
+    return save_wav(out_path, audio, sr)
+
+
 ## tried to create an streamlit app (ignore) 
 def vad_trim_wav_bytes(wav_bytes: bytes, aggressiveness: int = VAD_AGGRESSIVENESS) -> bytes | None:
     """
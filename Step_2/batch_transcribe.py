@@ -0,0 +1,188 @@
+# Offline batch transcription over a process pool (one model load per worker), streamed to JSONL.
+#   python batch_transcribe.py recordings/ --out transcripts.jsonl              # every *.wav/*.flac/*.ogg below
+#   python batch_transcribe.py --manifest turns.jsonl --out t.jsonl --model medium --backend faster-whisper
+#   (manifest: {"audio": path} per line, or a plain list of paths)
+# Re-running with the same --out skips files already transcribed, so an interrupted run resumes.
+# Worker count defaults to what fits in available RAM for the chosen model (and the CPU count).
+import os, sys, json, time, argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from config import ASR_MODEL, ASR_BACKEND, ASR_COMPUTE_TYPE
+
+AUDIO_EXT = {".wav", ".flac", ".ogg"}
+
+# rough resident size of one loaded model on CPU (MB); int8 CTranslate2 models need ~40% of that
+MODEL_RAM_MB = {"tiny": 400, "base": 550, "small": 1100, "medium": 2800, "large": 5600, "turbo": 3200}
+INT8_FACTOR = 0.4
+AUDIO_RAM_MB = 150                     # decode buffers + one clip
+
+
+def list_inputs(src: str = "", manifest: str = "") -> List[str]:
+    paths = []
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    paths.append(json.loads(line)["audio"] if line.startswith("{") else line)
+    if src:
+        p = Path(src)
+        paths += [str(x) for x in sorted(p.rglob("*")) if x.suffix.lower() in AUDIO_EXT] if p.is_dir() else [src]
+    return list(dict.fromkeys(paths))
+
+
+def done_paths(out: str) -> set:
+    """Files with a successful line in an earlier (possibly interrupted) run."""
+    done = set()
+    if os.path.exists(out):
+        with open(out, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    d = json.loads(line)
+                except ValueError:
+                    continue                   # torn last line from a killed run
+                if "error" not in d:
+                    done.add(d["audio"])
+    return done
+
+
+def _mem_available_mb() -> float:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil  # type: ignore
+        return psutil.virtual_memory().available / 2**20
+    except Exception:
+        return 4096.0
+
+
+def model_ram_mb(model: str, backend: str, compute_type: str) -> float:
+    base = next((v for k, v in MODEL_RAM_MB.items() if model.startswith(k)), MODEL_RAM_MB["large"])
+    if backend.replace("_", "-") == "faster-whisper" and compute_type.startswith("int8"):
+        base *= INT8_FACTOR
+    return base + AUDIO_RAM_MB
+
+
+def auto_workers(model: str, backend: str, compute_type: str, n_files: int, threads: int = 2,
+                 reserve_mb: float = 1024) -> int:
+    by_mem = int((_mem_available_mb() - reserve_mb) // model_ram_mb(model, backend, compute_type))
+    by_cpu = (os.cpu_count() or 2) // max(1, threads)
+    return max(1, min(by_mem, by_cpu, n_files))
+
+
+# worker side: one backend per process, loaded by the pool initializer
+_BACKEND = None
+
+
+def _init_worker(backend: str, model: str, compute_type: str, threads: int) -> None:
+    global _BACKEND
+    from asr_backends import make_backend
+    kw = {}
+    if backend.replace("_", "-") == "faster-whisper":
+        kw = {"compute_type": compute_type, "cpu_threads": threads, "num_workers": 1}
+    else:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    _BACKEND = make_backend(backend, model, **kw)
+
+
+def _transcribe_one(path: str, language: Optional[str], segments: bool) -> Dict[str, Any]:
+    import soundfile as sf
+    from asr import as_whisper_input, WHISPER_SR
+    try:
+        a, sr = sf.read(path, dtype="float32")
+        a = as_whisper_input(a, sr)
+        dur = len(a) / WHISPER_SR
+        t0 = time.perf_counter()
+        out = _BACKEND.transcribe(a, language=language, timestamps=segments)
+        dec = time.perf_counter() - t0
+        row = {"audio": path, "text": out["text"], "duration_s": round(dur, 3), "decode_s": round(dec, 3),
+               "rtf": round(dec / dur, 4) if dur else None, "worker": os.getpid()}
+        if segments:
+            row["segments"] = [{k: sg[k] for k in ("start", "end", "text", "avg_logprob", "no_speech_prob")}
+                               for sg in out["segments"]]
+        return row
+    except Exception as e:
+        return {"audio": path, "error": f"{type(e).__name__}: {e}", "worker": os.getpid()}
+
+
+def run(paths: List[str], out: str, backend: str, model: str, compute_type: str, workers: int, threads: int,
+        language: Optional[str] = None, segments: bool = False) -> Dict[str, Any]:
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    if os.path.exists(out) and os.path.getsize(out):
+        with open(out, "rb+") as f:            # a killed run can leave a torn last line: terminate it
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    audio_s = decode_s = 0.0
+    ok = failed = 0
+    t0 = time.perf_counter()
+    ctx = mp.get_context("spawn")          # torch / CTranslate2 threads do not survive fork
+    with open(out, "a", encoding="utf-8") as fo, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                initargs=(backend, model, compute_type, threads)) as pool:
+        futs = [pool.submit(_transcribe_one, p, language, segments) for p in paths]
+        for i, fut in enumerate(as_completed(futs), 1):
+            row = fut.result()
+            fo.write(json.dumps(row, ensure_ascii=False) + "\n")
+            fo.flush()                     # every finished file survives an interruption
+            if "error" in row:
+                failed += 1
+                print(f"[{i}/{len(paths)}] ERR {row['audio']}: {row['error']}", file=sys.stderr)
+                continue
+            ok += 1
+            audio_s += row["duration_s"]
+            decode_s += row["decode_s"]
+            if i % 25 == 0 or i == len(paths):
+                wall = time.perf_counter() - t0
+                print(f"[{i}/{len(paths)}] {audio_s / 60:.1f} min audio, wall RTF {wall / max(1e-9, audio_s):.3f}",
+                      file=sys.stderr)
+    wall = time.perf_counter() - t0
+    return {"files": ok, "failed": failed, "audio_s": audio_s, "decode_s": decode_s, "wall_s": wall,
+            "rtf_per_worker": decode_s / max(1e-9, audio_s),   # decode time per second of audio, one worker
+            "rtf_wall": wall / max(1e-9, audio_s),              # end-to-end, including model loads
+            "workers": workers}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Parallel batch transcription to JSONL")
+    ap.add_argument("src", nargs="?", default="", help="audio file or directory")
+    ap.add_argument("--manifest", default="")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--backend", default=ASR_BACKEND)
+    ap.add_argument("--model", default=ASR_MODEL)
+    ap.add_argument("--compute-type", default=ASR_COMPUTE_TYPE)
+    ap.add_argument("--workers", type=int, default=0, help="0 = fit to available RAM / CPUs")
+    ap.add_argument("--threads", type=int, default=2, help="CPU threads per worker")
+    ap.add_argument("--language", default=None)
+    ap.add_argument("--segments", action="store_true", help="also write per-segment times and scores")
+    ap.add_argument("--no-resume", action="store_true", help="re-transcribe files already in --out")
+    args = ap.parse_args()
+
+    paths = list_inputs(args.src, args.manifest)
+    if not paths:
+        sys.exit("no audio files found")
+    todo = paths if args.no_resume else [p for p in paths if p not in done_paths(args.out)]
+    print(f"{len(paths)} files, {len(paths) - len(todo)} already done, {len(todo)} to go", file=sys.stderr)
+    if not todo:
+        sys.exit(0)
+    workers = args.workers or auto_workers(args.model, args.backend, args.compute_type, len(todo), args.threads)
+    print(f"{workers} workers x {args.threads} threads, {args.backend}:{args.model} "
+          f"(~{model_ram_mb(args.model, args.backend, args.compute_type):.0f} MB each)", file=sys.stderr)
+
+    s = run(todo, args.out, args.backend, args.model, args.compute_type, workers, args.threads,
+            args.language, args.segments)
+    print(f"\n{s['files']} transcribed, {s['failed']} failed, {s['audio_s'] / 60:.1f} min audio in {s['wall_s']:.1f}s")
+    print(f"aggregate RTF: {s['rtf_per_worker']:.3f} per worker, {s['rtf_wall']:.3f} wall "
+          f"({1 / max(1e-9, s['rtf_wall']):.1f}x real time with {s['workers']} workers)")
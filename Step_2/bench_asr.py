@@ -0,0 +1,131 @@
+# ASR backend benchmark: real-time factor, load time and memory per backend/model/compute type on the same clips
+#   python bench_asr.py --corpus recordings/                       # default: tiny + small on every backend
+#   python bench_asr.py --manifest corpus.jsonl --specs whisper:small,faster-whisper:small:int8,faster-whisper:small:int8_float32
+# spec = backend:model[:compute_type]. Each spec runs in a fresh process, so peak RSS is that backend's alone.
+# WER is reported when references exist (sibling *.txt or "text" in the manifest).
+import os, sys, json, time, argparse, multiprocessing as mp
+from pathlib import Path
+from typing import List, Dict, Any
+
+from asr_report import wer
+
+
+def _rss_mb() -> float:
+    """Resident memory of this process (psutil, else /proc on Linux); 0.0 when neither is available."""
+    try:
+        import psutil  # type: ignore
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, AttributeError, ValueError):
+        return 0.0
+
+
+def _peak_mb() -> float:
+    """Peak resident memory: psutil's peak_wset on Windows, getrusage elsewhere; 0.0 when unknown."""
+    try:
+        import psutil  # type: ignore
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        if peak:
+            return peak / 2**20
+    except ImportError:
+        pass
+    if sys.platform == "win32":
+        return 0.0
+    import resource
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / 1024 if sys.platform != "darwin" else kb / 2**20
+
+
+def load_clips(corpus: str = "", manifest: str = "") -> List[Dict[str, str]]:
+    items = []
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            items += [{"audio": d["audio"], "text": d.get("text", "")} for d in map(json.loads, filter(str.strip, f))]
+    if corpus:
+        for wav in sorted(Path(corpus).rglob("*.wav")):
+            ref = wav.with_suffix(".txt")
+            items.append({"audio": str(wav), "text": ref.read_text(encoding="utf-8").strip() if ref.exists() else ""})
+    return items
+
+
+def _run_spec(spec: str, clips: List[Dict[str, str]], threads: int, out: "mp.Queue") -> None:
+    try:
+        import soundfile as sf
+        from asr import as_whisper_input, WHISPER_SR
+        from asr_backends import make_backend
+        kind, model, *rest = spec.split(":")
+        kw = {"compute_type": rest[0]} if rest else {}
+        if threads and kind.replace("_", "-") == "faster-whisper":
+            kw["cpu_threads"] = threads
+        audio = [as_whisper_input(*sf.read(c["audio"], dtype="float32")) for c in clips]
+        base = _rss_mb()
+        t0 = time.perf_counter()
+        backend = make_backend(kind, model, fallback=False, **kw)
+        load_s = time.perf_counter() - t0
+        loaded = _rss_mb()
+        backend.transcribe(audio[0])                      # warm-up, not timed
+        hyps, dec = [], []
+        for a in audio:
+            t0 = time.perf_counter()
+            hyps.append(backend.transcribe(a)["text"])
+            dec.append(time.perf_counter() - t0)
+        audio_s = sum(len(a) for a in audio) / WHISPER_SR
+        refs = [(c["text"], h) for c, h in zip(clips, hyps) if c["text"]]
+        out.put({"spec": spec, "backend": repr(backend), "load_s": load_s, "audio_s": audio_s,
+                 "decode_s": sum(dec), "rtf": sum(dec) / max(1e-9, audio_s),
+                 "p50_ms": 1000 * sorted(dec)[len(dec) // 2], "model_mb": loaded - base, "peak_mb": _peak_mb(),
+                 "wer": wer(refs) if refs else None})
+    except Exception as e:
+        out.put({"spec": spec, "error": f"{type(e).__name__}: {e}"})
+
+
+def bench(specs: List[str], clips: List[Dict[str, str]], threads: int = 0) -> List[Dict[str, Any]]:
+    ctx = mp.get_context("spawn")
+    rows = []
+    for spec in specs:
+        q = ctx.Queue()
+        p = ctx.Process(target=_run_spec, args=(spec, clips, threads, q))
+        p.start()
+        rows.append(q.get())
+        p.join()
+        r = rows[-1]
+        print(f"  {spec}: " + (r["error"] if "error" in r else f"RTF {r['rtf']:.3f}"), file=sys.stderr)
+    return rows
+
+
+if __name__ == "__main__":
+    from config import ASR_MODEL
+    from asr import ASR_MODEL_FAST
+    default = ",".join(f"{b}:{m}{ct}" for m in (ASR_MODEL_FAST, ASR_MODEL)
+                       for b, ct in (("whisper", ""), ("faster-whisper", ":int8"), ("faster-whisper", ":int8_float32")))
+    ap = argparse.ArgumentParser(description="ASR backend RTF / memory benchmark")
+    ap.add_argument("--corpus", default="")
+    ap.add_argument("--manifest", default="")
+    ap.add_argument("--specs", default="")
+    ap.add_argument("--threads", type=int, default=0, help="faster-whisper cpu_threads (0 = default)")
+    ap.add_argument("--limit", type=int, default=0)
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+
+    clips = load_clips(args.corpus, args.manifest)[: args.limit or None]
+    if not clips:
+        sys.exit("no clips found")
+    specs = [s for s in (args.specs or default).split(",") if s.strip()]
+    rows = bench(specs, clips, args.threads)
+
+    print(f"\n{len(clips)} clips")
+    print(f"{'spec':<36} {'load s':>7} {'RTF':>6} {'p50 ms':>7} {'model MB':>9} {'peak MB':>8} {'WER':>6}")
+    for r in rows:
+        if "error" in r:
+            print(f"{r['spec']:<36} {r['error']}")
+            continue
+        w = f"{r['wer']:.3f}" if r["wer"] is not None else "-"
+        print(f"{r['backend']:<36} {r['load_s']:>7.1f} {r['rtf']:>6.3f} {r['p50_ms']:>7.0f} "
+              f"{r['model_mb']:>9.0f} {r['peak_mb']:>8.0f} {w:>6}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"saved -> {args.out}")
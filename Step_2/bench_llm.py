@@ -0,0 +1,166 @@
+# extract_fragment benchmark: rule-based fast path vs. the llama.cpp extractor
+#   python bench_llm.py                        # built-in turns
+#   python bench_llm.py --input turns.txt      # one user turn per line
+#   python bench_llm.py --rules-only           # no model needed
+# router tiers: route() latency + accuracy per GGUF
+#   python bench_llm.py --router-eval builtin --models small.gguf,big.gguf
+#   (CSV columns: text, has_context (0/1), action, fields (";"-separated), fragment)
+import csv, time, argparse, statistics
+from typing import List, Tuple
+
+from fragment_rules import extract_fragment_rules
+from config import FRAGMENT_RULES_MIN_CONF
+
+TURNS = [
+    "Find the quote: Albert Einstein was almost considered as a superhuman.",
+    "Complete this new quote as an eminent pioneer in the realm of high.",
+    'Who said this? "Two things are infinite..."',
+    "finish the quote two things are infinite",
+    "can you please finish the quote that goes I have a dream",
+    "find another quote the only thing we have to fear is fear itself",
+    "who said be the change you wish to see in the world",
+    "search for the quote imagination is more important than knowledge",
+    "what is the source of that quote",
+    "is it disputed?",
+    "two things are infinite the universe and human stupidity",
+    "find the quote to be or not to be by Shakespeare",
+    "tell me something about this one",
+    "can you find the one that says don't count your chickens",
+    "find the quote, I think it was something like knowledge is power",
+    "find the quote knowledge is power or something",
+]
+
+# (text, has_context, action, fields, fragment)
+ROUTER_EVAL: List[Tuple[str, bool, str, List[str], str]] = [
+    ("Find the quote: Albert Einstein was almost considered as a superhuman.", False, "search_db", [],
+     "Albert Einstein was almost considered as a superhuman"),
+    ("Complete this new quote as an eminent pioneer in the realm of high.", False, "search_db", ["finish_quote"],
+     "as an eminent pioneer in the realm of high"),
+    ("who said two things are infinite the universe", False, "search_db", ["said_by"], "two things are infinite the universe"),
+    ("who said this?", False, "clarify", ["said_by"], ""),
+    ("who said this?", True, "answer_from_memory", ["said_by"], ""),
+    ("where is it from and when was it said", True, "answer_from_memory", ["source", "when"], ""),
+    ("is it disputed or misattributed?", True, "answer_from_memory", ["disputed_with", "misattributed_to"], ""),
+    ("who is this quote about", True, "answer_from_memory", ["about_person"], ""),
+    ("finish it", True, "answer_from_memory", ["finish_quote"], ""),
+    ("let's start over", True, "reset", [], ""),
+    ("find the quote to be or not to be by Shakespeare", False, "search_db", [], "to be or not to be"),
+    ("hmm not sure", False, "clarify", [], ""),
+    ("can you find the one that says don't count your chickens", False, "search_db", [], "don't count your chickens"),
+    ("find the quote, I think it was something like knowledge is power", False, "search_db", [], "knowledge is power"),
+]
+
+
+def _load_router_eval(path: str):
+    if path == "builtin":
+        return ROUTER_EVAL
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(r["text"], r.get("has_context", "0").strip() in {"1", "true"}, r["action"].strip(),
+                 [x.strip() for x in (r.get("fields") or "").split(";") if x.strip()], (r.get("fragment") or "").strip())
+                for r in csv.DictReader(f)]
+
+
+def router_bench(models: List[str], rows) -> None:
+    import llm as llm_mod
+    llm_mod.ROUTER_MEMO_PATH = ""          # measure the model, not the memo
+    norm = lambda t: " ".join(t.lower().split())
+    for path in models:
+        llm_mod.set_router_model(path)
+        try:
+            llm_mod._ROUTER.get()
+        except RuntimeError as e:
+            print(f"[{path}] {e}")
+            continue
+        lat, act_ok, fld_ok, frag_ok = [], 0, 0, 0
+        for text, ctx, action, fields, fragment in rows:
+            router = llm_mod.LLM()         # fresh per-turn memo
+            t0 = time.perf_counter()
+            r = router.route(text, ctx)
+            lat.append(time.perf_counter() - t0)
+            act_ok += r["action"] == action
+            fld_ok += set(r["fields"]) == set(fields)
+            frag_ok += norm(r["fragment"]) == norm(fragment)
+        n = max(1, len(rows))
+        lat.sort()
+        print(f"[{path}] load {llm_mod._ROUTER.timings['load_s']:.1f}s | route {_ms(lat)}, "
+              f"p90 {1000 * lat[min(len(lat) - 1, int(0.9 * len(lat)))]:.0f} ms | action {act_ok / n:.2f} "
+              f"fields {fld_ok / n:.2f} fragment {frag_ok / n:.2f} (n={len(rows)})")
+
+
+def _ms(xs: List[float]) -> str:
+    return f"mean {1000 * statistics.fmean(xs):.2f} ms, p50 {1000 * statistics.median(xs):.2f} ms" if xs else "n/a"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="extract_fragment: rules vs. LLM")
+    ap.add_argument("--input", default="", help="one user turn per line (default: built-in turns)")
+    ap.add_argument("--rules-only", action="store_true")
+    ap.add_argument("--router-eval", default="", help="'builtin' or a CSV; benchmarks route() per model")
+    ap.add_argument("--models", default="", help="comma list of GGUFs for --router-eval (default: router, then main)")
+    args = ap.parse_args()
+
+    if args.router_eval:
+        from config import LLM_GGUF, LLM_GGUF_ROUTER
+        models = [m for m in args.models.split(",") if m] or [m for m in (LLM_GGUF_ROUTER, LLM_GGUF) if m]
+        router_bench(models, _load_router_eval(args.router_eval))
+        return
+
+    turns = TURNS
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            turns = [l.strip() for l in f if l.strip()]
+
+    rule_t, rule_out = [], []
+    for q in turns:
+        t0 = time.perf_counter()
+        rule_out.append(extract_fragment_rules(q))
+        rule_t.append(time.perf_counter() - t0)
+    confident = sum(1 for _, c in rule_out if c >= FRAGMENT_RULES_MIN_CONF)
+    print(f"Turns {len(turns)} | rules confident (>= {FRAGMENT_RULES_MIN_CONF}) on {confident} "
+          f"({confident / max(1, len(turns)):.0%}) | rules {_ms(rule_t)}")
+    if args.rules_only:
+        for q, (frag, conf) in zip(turns, rule_out):
+            print(f"  {conf:.2f} {frag!r:55} <- {q!r}")
+        return
+
+    import llm as llm_mod
+    try:
+        llm_mod._model()            # wait for the background load
+    except RuntimeError as e:       # no LLM_GGUF: nothing to compare against
+        print(f"{e}; rerun with --rules-only")
+        return
+    print(f"Model load {llm_mod.startup_timings()['llm_load_s']:.2f}s")
+
+    llm_t, agree = [], 0
+    llm_mod.warm_prefixes()
+    model_only = llm_mod.LLM()
+    llm_mod.FRAGMENT_RULES = False
+    for q, (frag, conf) in zip(turns, rule_out):
+        t0 = time.perf_counter()
+        ref = model_only.extract_fragment(q)
+        llm_t.append(time.perf_counter() - t0)
+        if conf >= FRAGMENT_RULES_MIN_CONF:
+            agree += int(frag.lower() == ref.lower())
+            mark = "=" if frag.lower() == ref.lower() else "≠"
+            print(f"  {mark} rules {frag!r} | llm {ref!r}")
+    llm_mod.FRAGMENT_RULES = True
+
+    routed = llm_mod.LLM()
+    routed_t = []
+    for q in turns:
+        t0 = time.perf_counter()
+        routed.extract_fragment(q)
+        routed_t.append(time.perf_counter() - t0)
+
+    st = routed.fragment_summary()
+    print(f"LLM only   : {_ms(llm_t)}")
+    print(f"Rules + LLM: {_ms(routed_t)} | skipped the model on {st['skip_rate']:.0%} of turns")
+    print(f"Route calls {st['llm']} | schema parse failures {model_only.route_stats['parse_failures'] + routed.route_stats['parse_failures']}")
+    for kind, t in llm_mod.llm_metrics()["ttft"].items():
+        print(f"  {kind:7} TTFT p50 {t['ttft_p50_ms']:.0f} ms p90 {t['ttft_p90_ms']:.0f} ms | total p50 {t['total_p50_ms']:.0f} ms (n={t['n']})")
+    print(f"Saved per turn: {1000 * (statistics.fmean(llm_t) - statistics.fmean(routed_t)):.1f} ms | "
+          f"rules agree with the model on {agree}/{confident} confident turns")
+
+
+if __name__ == "__main__":
+    main()
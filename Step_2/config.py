@@ -7,6 +7,19 @@ DEBUG = os.getenv("DEBUG_PRINT", "0") == "1"
 
 # ASR
 ASR_MODEL = os.getenv("ASR_MODEL", "small")
+ASR_BACKEND = os.getenv("ASR_BACKEND", "whisper")                  ## whisper | faster-whisper (CTranslate2)
+ASR_BACKEND_FAST = os.getenv("ASR_BACKEND_FAST", "")               ## backend for ASR_MODEL_FAST; empty = ASR_BACKEND
+ASR_COMPUTE_TYPE = os.getenv("ASR_COMPUTE_TYPE", "int8")           ## faster-whisper: int8 | int8_float32 | float32
+ASR_CPU_THREADS = int(os.getenv("ASR_CPU_THREADS", "0"))           ## faster-whisper, 0 = library default
+ASR_NUM_WORKERS = int(os.getenv("ASR_NUM_WORKERS", "1"))
+ASR_VAD_FILTER = os.getenv("ASR_VAD_FILTER", "1") == "1"           ## faster-whisper: drop non-speech before decoding
+ASR_STREAM = os.getenv("ASR_STREAM", "0") == "1"                   ## decode while the user speaks (ASR_MODEL only)
+ASR_STREAM_STEP_MS = int(os.getenv("ASR_STREAM_STEP_MS", "1000"))   ## re-decode after this much new audio
+ASR_STREAM_WINDOW_S = float(os.getenv("ASR_STREAM_WINDOW_S", "8"))  ## cut the buffer at committed words past this
+ASR_CASCADE = os.getenv("ASR_CASCADE", "1") == "1"                 ## small model only when tiny is unsure
+ASR_CASCADE_MIN_LOGPROB = float(os.getenv("ASR_CASCADE_MIN_LOGPROB", "-0.6"))   ## tiny avg log-prob below this escalates
+ASR_CASCADE_MAX_NO_SPEECH = float(os.getenv("ASR_CASCADE_MAX_NO_SPEECH", "0.5"))
+ASR_CASCADE_SEGMENTS = os.getenv("ASR_CASCADE_SEGMENTS", "0") == "1"  ## re-decode only the weak segments
 
 # Microphone
 MIC_SAMPLE_RATE = int(os.getenv("MIC_SAMPLE_RATE", "16000"))
@@ -17,6 +30,28 @@ MAX_UTTERANCE_SECONDS = int(os.getenv("MAX_UTTERANCE_SECONDS", "25"))
 
 # LLM 
 LLM_GGUF = os.getenv("LLM_GGUF") 
+LLM_CTX = int(os.getenv("LLM_CTX", "4096"))
+LLM_THREADS = int(os.getenv("LLM_THREADS", str(max(1, (os.cpu_count() or 8) - 2))))
+LLM_BATCH = int(os.getenv("LLM_BATCH", "256"))
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1024"))   ## per-session chat history budget
+CHAT_COMPACTION = os.getenv("CHAT_COMPACTION", "summarize")            ## evict | summarize (oldest turns)
+LLM_GGUF_ROUTER = os.getenv("LLM_GGUF_ROUTER", "")     ## small model for route()/intents; empty = use LLM_GGUF
+LLM_ROUTER_CTX = int(os.getenv("LLM_ROUTER_CTX", "2048"))
+LLM_ROUTER_THREADS = int(os.getenv("LLM_ROUTER_THREADS", str(max(1, (os.cpu_count() or 8) // 2))))
+LLM_ROUTER_BATCH = int(os.getenv("LLM_ROUTER_BATCH", "512"))
+FRAGMENT_RULES = os.getenv("FRAGMENT_RULES", "1") == "1"                  ## rule-based extract_fragment fast path
+FRAGMENT_RULES_MIN_CONF = float(os.getenv("FRAGMENT_RULES_MIN_CONF", "0.8"))   ## below this the LLM decides
+ROUTER_MAX_TOKENS = int(os.getenv("ROUTER_MAX_TOKENS", "80"))           ## budget for the combined route() JSON
+LLM_PREFIX_CACHE_SIZE = int(os.getenv("LLM_PREFIX_CACHE_SIZE", "6"))     ## system-prompt KV states kept in RAM, 0 disables
+LLM_PREFIX_CACHE_DIR = os.getenv("LLM_PREFIX_CACHE_DIR", "")             ## e.g. .cache/llm_prefix (states survive restarts)
+ROUTER_MEMO_PATH = os.getenv("ROUTER_MEMO_PATH", ".cache/router_memo.sqlite")   ## empty disables the route() memo
+ROUTER_MEMO_SIZE = int(os.getenv("ROUTER_MEMO_SIZE", "5000"))
+LLM_ROUTE_DEADLINE_S = float(os.getenv("LLM_ROUTE_DEADLINE_S", "8"))    ## route() requests queued longer are dropped, 0 = no deadline
+
+# Intents
+INTENT_CLASSIFIER = os.getenv("INTENT_CLASSIFIER", "1") == "1"           ## local TF-IDF intent model before the LLM mapper
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", ".cache/intent_clf.pkl")   ## relative to Step_2/; (re)trained at startup if missing/stale
+INTENT_MIN_CONF = float(os.getenv("INTENT_MIN_CONF", "0.6"))             ## below this the LLM mapper decides
 
 # Neo4j 
 NEO4J_URI = os.getenv("NEO4J_URI", "neo4j://127.0.0.1:7687")
@@ -24,6 +59,33 @@ NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "******")     ## for security
 NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
 NEO4J_FT_INDEX = os.getenv("NEO4J_FT_INDEX", "quoteTextFT")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "16"))
+NEO4J_ACQUIRE_TIMEOUT = float(os.getenv("NEO4J_ACQUIRE_TIMEOUT", "5.0"))   ## seconds to wait for a pooled connection
+NEO4J_WARMUP_CONNS = int(os.getenv("NEO4J_WARMUP_CONNS", "2"))           ## connections pre-opened by warm_up()
+RETRIEVER_WARMUP = os.getenv("RETRIEVER_WARMUP", "1") == "1"
+NEO4J_RECORD_PATH = os.getenv("NEO4J_RECORD_PATH", "")       ## record every exchange to this tape
+NEO4J_REPLAY_PATH = os.getenv("NEO4J_REPLAY_PATH", "")       ## serve exchanges from this tape (no server)
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "0"))
+REPLAY_STRICT = os.getenv("REPLAY_STRICT", "0") == "1"       ## raise on queries missing from the tape
+
+# Retriever
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "neo4j")     ## neo4j | local
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", ".cache/quote_index")
+RETRIEVER_BATCH = os.getenv("RETRIEVER_BATCH", "1") == "1"     ## all FT variants in one round trip
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))     ## 0 disables the cache
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))    ## seconds, <=0 never expires
+RETRIEVAL_CACHE_PATH = os.getenv("RETRIEVAL_CACHE_PATH", "")             ## e.g. .cache/retrieval_cache.sqlite
+USE_FUZZY_FALLBACK = os.getenv("USE_FUZZY_FALLBACK", "1") == "1"      ## used only if fuzzy_index.py build was run
+FUZZY_BUDGET_MS = float(os.getenv("FUZZY_BUDGET_MS", "15"))
+FUZZY_MIN_SIM = float(os.getenv("FUZZY_MIN_SIM", "0.5"))
+FUZZY_WEIGHT = float(os.getenv("FUZZY_WEIGHT", "0.3"))                ## fuzzy sim share of the 0.35 score term
+USE_DENSE = os.getenv("USE_DENSE", "1") == "1"                       ## used only if dense_index.py build was run (needs sentence-transformers)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")                 ## ft | dense | hybrid
+DENSE_MODEL = os.getenv("DENSE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+DENSE_NPROBE = int(os.getenv("DENSE_NPROBE", "8"))
+DENSE_WEIGHT = float(os.getenv("DENSE_WEIGHT", "0.5"))                 ## share of the 0.35 score term given to dense
+DENSE_MIN_SIM = float(os.getenv("DENSE_MIN_SIM", "0.35"))
+RETRIEVER_DEADLINE_S = float(os.getenv("RETRIEVER_DEADLINE_S", "2.0"))   ## AsyncRetriever per-call budget
 
 # Speaker ID 
 USE_SPK_ID = os.getenv("USE_SPK_ID", "1") == "1"
@@ -34,3 +96,5 @@ SPEAKER_ID_THRESHOLD = float(os.getenv("SPEAKER_ID_THRESHOLD", "0.65"))
 TTS_VOICE = os.getenv("TTS_VOICE", "")     
 TTS_RATE = int(os.getenv("TTS_RATE", "185"))
 TTS_VOLUME = float(os.getenv("TTS_VOLUME", "1.0"))
+TTS_STREAM = os.getenv("TTS_STREAM", "1") == "1"                 ## speak LLM answers sentence by sentence
+TTS_CHUNK_MIN_CHARS = int(os.getenv("TTS_CHUNK_MIN_CHARS", "24"))   ## shortest chunk handed to TTS
@@ -0,0 +1,199 @@
+# Optional dense retrieval tier for paraphrased quote requests.
+# Quote embeddings are computed once on CPU, stored as a float16 matrix and searched with an
+# IVF (k-means coarse quantizer + inverted lists) index; all arrays are memory-mapped. Needs
+# sentence-transformers; without it (or with a stale index) retrieval falls back to full-text only.
+#   python dense_index.py build [--index DIR] [--nlist N]
+#   python dense_index.py add new_quotes.jsonl        # incremental: append + assign to lists, BM25/fuzzy rebuilt
+#   python dense_index.py query "the cosmos has no end, nor does foolishness"
+import json, time, argparse
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+import numpy as np
+
+from config import LOCAL_INDEX_DIR, DENSE_MODEL, DENSE_NPROBE, RETRIEVER_BACKEND, DEBUG
+from local_index import load_snapshot, build_index, SNAPSHOT_FILE
+
+try:
+    from sentence_transformers import SentenceTransformer  # type: ignore
+    _ST_OK = True
+except Exception:
+    _ST_OK = False
+
+class Encoder:
+    """sentence-transformers on CPU; there is no lexical stand-in, so without it the dense tier is off."""
+
+    def __init__(self, model_name: str = DENSE_MODEL) -> None:
+        if not _ST_OK:
+            raise ImportError("sentence-transformers is not installed (pip install sentence-transformers)")
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.name = model_name
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        emb = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        emb = emb.astype(np.float32)
+        emb /= (np.linalg.norm(emb, axis=1, keepdims=True) + 1e-9)
+        return emb
+
+
+def _kmeans(x: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit vectors; returns (k, D) unit centroids."""
+    rng = np.random.default_rng(seed)
+    cent = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ cent.T, axis=1)
+        for c in range(k):
+            members = x[assign == c]
+            if len(members):
+                cent[c] = members.sum(axis=0)
+            else:
+                cent[c] = x[rng.integers(len(x))]
+        cent /= (np.linalg.norm(cent, axis=1, keepdims=True) + 1e-9)
+    return cent
+
+
+def _write_lists(out: Path, assign: np.ndarray, nlist: int) -> None:
+    order = np.argsort(assign, kind="stable").astype(np.int32)
+    offsets = np.zeros(nlist + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+    np.save(out / "dn_list_offsets.npy", offsets)
+    np.save(out / "dn_list_rows.npy", order)
+
+
+def build_dense_index(index_dir: str = LOCAL_INDEX_DIR, nlist: Optional[int] = None, encoder: Optional[Encoder] = None) -> int:
+    out = Path(index_dir)
+    docs = load_snapshot(index_dir)
+    enc = encoder or Encoder()
+    emb = enc.encode([d.get("quote") or "" for d in docs])
+    nlist = nlist or max(1, min(len(emb), int(4 * np.sqrt(max(1, len(emb))))))
+    sample = emb if len(emb) <= 20000 else emb[np.random.default_rng(0).choice(len(emb), 20000, replace=False)]
+    cent = _kmeans(sample, nlist)
+    assign = np.argmax(emb @ cent.T, axis=1)
+
+    np.save(out / "dn_emb.npy", emb.astype(np.float16))
+    np.save(out / "dn_centroids.npy", cent.astype(np.float32))
+    _write_lists(out, assign, nlist)
+    (out / "dn_meta.json").write_text(json.dumps({"model": enc.name, "dim": int(emb.shape[1]), "nlist": nlist}), encoding="utf-8")
+    return len(emb)
+
+
+def add_to_dense_index(index_dir: str, new_docs: List[Dict[str, Any]], encoder: Optional[Encoder] = None) -> int:
+    """Append quotes to the snapshot and to the index; centroids stay fixed (rebuild occasionally).
+    The BM25 postings (and the fuzzy index, if built) are rebuilt from the snapshot so every tier sees the
+    same rows. Ids already in the snapshot are skipped. The Neo4j graph is not touched."""
+    out = Path(index_dir)
+    meta = json.loads((out / "dn_meta.json").read_text(encoding="utf-8"))
+    known = {d.get("id") for d in load_snapshot(index_dir)}
+    new_docs = [d for d in new_docs if d.get("id") not in known]
+    if not new_docs:
+        return 0
+    enc = encoder or Encoder(meta["model"])
+    emb_new = enc.encode([d.get("quote") or "" for d in new_docs])
+
+    emb = np.vstack([np.load(out / "dn_emb.npy").astype(np.float32), emb_new])
+    cent = np.load(out / "dn_centroids.npy")
+    assign = np.argmax(emb @ cent.T, axis=1)
+    np.save(out / "dn_emb.npy", emb.astype(np.float16))
+    _write_lists(out, assign, meta["nlist"])
+    with open(out / SNAPSHOT_FILE, "a", encoding="utf-8") as f:
+        for d in new_docs:
+            f.write(json.dumps(d, ensure_ascii=False) + "\n")
+    # lexical tiers only tokenize, so a rebuild is cheap next to the embedding above
+    build_index(index_dir)
+    if (out / "fz_tokens.json").exists():
+        from fuzzy_index import build_fuzzy_index
+        build_fuzzy_index(index_dir)
+    return len(new_docs)
+
+
+class DenseIndex:
+    def __init__(self, index_dir: str = LOCAL_INDEX_DIR, docs: Optional[List[Dict[str, Any]]] = None,
+                 nprobe: int = DENSE_NPROBE, encoder: Optional[Encoder] = None) -> None:
+        d = Path(index_dir)
+        self.meta = json.loads((d / "dn_meta.json").read_text(encoding="utf-8"))
+        self.docs = docs if docs is not None else load_snapshot(index_dir)
+        self.emb = np.load(d / "dn_emb.npy", mmap_mode="r")
+        self.centroids = np.load(d / "dn_centroids.npy")
+        self.list_offsets = np.load(d / "dn_list_offsets.npy", mmap_mode="r")
+        self.list_rows = np.load(d / "dn_list_rows.npy", mmap_mode="r")
+        self.nprobe = max(1, min(nprobe, len(self.centroids)))
+        if self.meta["model"].startswith("hash"):
+            raise RuntimeError("Dense index was built with the old hashed-n-gram fallback; rebuild it with dense_index.py build")
+        self.encoder = encoder or Encoder(self.meta["model"])
+        if self.encoder.name != self.meta["model"]:
+            raise RuntimeError(f"Dense index was built with {self.meta['model']!r} but the encoder is {self.encoder.name!r}")
+        self._row_of = {row.get("id"): i for i, row in enumerate(self.docs[:len(self.emb)])}
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.encoder.encode([text])[0]
+
+    def search(self, fragment: str, limit: int, qvec: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Approximate top-`limit` quotes by cosine; each row carries `dense` in [-1, 1]."""
+        q = self.embed(fragment) if qvec is None else qvec
+        probe = np.argsort(-(self.centroids @ q))[:self.nprobe]
+        rows = np.concatenate([np.asarray(self.list_rows[int(self.list_offsets[c]):int(self.list_offsets[c + 1])]) for c in probe])
+        if not rows.size:
+            return []
+        rows = np.sort(rows)
+        sims = np.asarray(self.emb[rows], dtype=np.float32) @ q
+        top = np.argsort(-sims)[:limit]
+        if DEBUG: print(f"[DBG] DENSE probed={rows.size} rows in {self.nprobe} lists")
+        return [{**self.docs[int(rows[i])], "dense": float(sims[i])} for i in top.tolist()]
+
+    def similarity(self, qvec: np.ndarray, ids: List[Any]) -> List[Optional[float]]:
+        """Exact cosine for known quote ids (None if the id isn't in the index)."""
+        rows = [self._row_of.get(i) for i in ids]
+        known = [r for r in rows if r is not None]
+        sims = (np.asarray(self.emb[known], dtype=np.float32) @ qvec).tolist() if known else []
+        it = iter(sims)
+        return [next(it) if r is not None else None for r in rows]
+
+
+def load_dense_index(index_dir: str = LOCAL_INDEX_DIR, docs: Optional[List[Dict[str, Any]]] = None) -> Optional[DenseIndex]:
+    """DenseIndex if it has been built under index_dir and its encoder loads, else None (retrieval stays 'ft')."""
+    if not (Path(index_dir) / "dn_meta.json").exists():
+        return None
+    try:
+        return DenseIndex(index_dir, docs=docs)
+    except Exception as e:
+        print(f"[WARN] dense index disabled, using full-text only: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Dense (IVF) quote index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="embed the quotes.jsonl snapshot (run local_index.py build first)")
+    b.add_argument("--index", default=LOCAL_INDEX_DIR)
+    b.add_argument("--nlist", type=int, default=None)
+    a = sub.add_parser("add", help="append quotes from a JSONL file (same fields as the snapshot)")
+    a.add_argument("jsonl")
+    a.add_argument("--index", default=LOCAL_INDEX_DIR)
+    qp = sub.add_parser("query")
+    qp.add_argument("fragment")
+    qp.add_argument("--index", default=LOCAL_INDEX_DIR)
+    qp.add_argument("-k", type=int, default=5)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "build":
+        n = build_dense_index(args.index, nlist=args.nlist)
+        print(f"Embedded {n} quotes in {time.perf_counter() - t0:.1f}s -> {Path(args.index).resolve()}")
+    elif args.cmd == "add":
+        with open(args.jsonl, encoding="utf-8") as f:
+            new_docs = [json.loads(line) for line in f if line.strip()]
+        n = add_to_dense_index(args.index, new_docs)
+        from retrieval_cache import default_cache
+        cache = default_cache()
+        if cache is not None:
+            cache.invalidate()          # cached results refer to the old snapshot
+            cache.close()
+        print(f"Added {n} quotes ({len(new_docs) - n} already indexed) in {time.perf_counter() - t0:.1f}s")
+        if RETRIEVER_BACKEND == "neo4j":
+            print("[WARN] RETRIEVER_BACKEND=neo4j: add these quotes to the graph too, or dense hits will not match it")
+    else:
+        di = DenseIndex(args.index)
+        t1 = time.perf_counter()
+        hits = di.search(args.fragment, args.k)
+        print(f"load {t1 - t0:.2f}s | search {1000 * (time.perf_counter() - t1):.2f} ms")
+        for r in hits:
+            print(f"{r['dense']:.3f}  {r['id']}  {r['quote'][:90]!r}")
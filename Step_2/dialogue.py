@@ -1,17 +1,35 @@
-import re
-from typing import Optional
-from config import DEBUG
+import re, time
+from typing import Optional, Iterator
+from config import DEBUG, RETRIEVER_WARMUP
 from session import get_session
-from retriever import Retriever
-from llm import LLM
+from retriever import make_retriever
+from llm import LLM, startup_timings as llm_startup_timings
 
-_llm = LLM()
-_ret = Retriever()
+_TIMINGS = {}
+_llm = LLM()            # starts the background model load
+_ret = make_retriever()
 
 NEW_QUOTE_RE = re.compile(r'\b(new|another|different)\s+quote\b|\bfind\s+me\s+(?:a|another)\s+quote\b', re.I)
 SMALLTALK_RE = re.compile(r'^(thanks|thank you|ok|okay|hmm|huh|great|nice)\.?$', re.I)
 
-def handle_user_transcript(transcript: str, session_id: str = "default") -> str:
+def startup_check() -> dict:
+    """Warm the retriever (optional) and return its health; call once before the first turn.
+    The LLM keeps loading in the background; see startup_timings()."""
+    t0 = time.perf_counter()
+    if RETRIEVER_WARMUP:
+        try:
+            _ret.warm_up()
+        except Exception as e:
+            if DEBUG: print(f"[DBG] retriever warm-up failed: {e}")
+    health = _ret.health()
+    _TIMINGS["retriever_ready_s"] = time.perf_counter() - t0
+    return health
+
+def startup_timings() -> dict:
+    return {**_TIMINGS, **llm_startup_timings()}
+
+def _plan_turn(transcript: str, session_id: str):
+    """(fixed reply, None) or (None, facts to answer from) for one user turn."""
     text = (transcript or "").strip()
     sess = get_session(session_id)
     has_context = bool(sess.last_facts)
@@ -21,7 +39,7 @@ def handle_user_transcript(transcript: str, session_id: str = "default") -> str:
 
     # short acknowledgement
     if SMALLTALK_RE.fullmatch(text):
-        return "Thank You"
+        return "Thank You", None
 
     # new/another quote clears context for a user
     if NEW_QUOTE_RE.search(text):
@@ -31,7 +49,7 @@ def handle_user_transcript(transcript: str, session_id: str = "default") -> str:
             print("[DBG] NEW_QUOTE -> cleared session context")
 
     # extract quote fragment 
-    fragment = _llm.extract_fragment(text) or ""
+    fragment = _llm.extract_fragment(text, has_context) or ""
     if DEBUG:
         print(f"[DBG] FRAGMENT={fragment!r}")
 
@@ -39,13 +57,25 @@ def handle_user_transcript(transcript: str, session_id: str = "default") -> str:
         row = _ret.search_best(fragment)
         if row:
             sess.last_facts = row
-            return _llm.answer_from_facts(text, row)
+            return None, row
         else:
-            return "I couldn't find that exact quote."
+            return "I couldn't find that exact quote.", None
 
     # no new fragment; if we have context, answer from memory
     if has_context and sess.last_facts:
-        return _llm.answer_from_facts(text, sess.last_facts)
+        return None, sess.last_facts
 
     # otherwise
-    return "Give me a few words from the quote you have in mind."
+    return "Give me a few words from the quote you have in mind.", None
+
+def handle_user_transcript(transcript: str, session_id: str = "default") -> str:
+    reply, facts = _plan_turn(transcript, session_id)
+    return reply if facts is None else _llm.answer_from_facts((transcript or "").strip(), facts)
+
+def handle_user_transcript_stream(transcript: str, session_id: str = "default") -> Iterator[str]:
+    """Same turn as handle_user_transcript, but the answer comes out in sentence chunks for streaming TTS."""
+    reply, facts = _plan_turn(transcript, session_id)
+    if facts is None:
+        yield reply
+    else:
+        yield from _llm.answer_from_facts_stream((transcript or "").strip(), facts)
@@ -1,38 +1,204 @@
-# retrieval evaluation
-import csv, time, statistics
-from retriever import Retriever
+# retrieval evaluation / benchmark
+#   python eval.py --input fragments_id.csv --backends neo4j,cached,local --concurrency 8 --out run.json
+#   python eval.py --record tape.jsonl.gz ...   then   python eval.py --replay tape.jsonl.gz ...  (offline)
+# CSV columns: fragment, gold_id. Quality: Top1 / Top5 / MRR@5. Speed: p50/p90/p99/max, queries/sec.
+import os, csv, json, math, time, asyncio, argparse, statistics, platform
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Any, Optional
+
+from config import (
+    NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_MAX_POOL_SIZE, NEO4J_ACQUIRE_TIMEOUT, RETRIEVER_BACKEND,
+)
+from retriever import make_retriever
+from replay_driver import open_driver
 
 TOPK = 5
-IN   = "C:/Users/shri/Data_Science/NLP/test_dataset/fragments_id.csv"
-# OUT  = "retrieval_eval_results.csv"
+IN   = os.getenv("EVAL_CSV", "test_dataset/fragments_id.csv")
 
-ret = Retriever()
 def rank_of(gold_id, results):
     for i, r in enumerate(results, 1):
         if (r.get("id") or "").strip() == gold_id.strip():
             return i
     return None
 
-lat, n = [], 0
-top1 = top5 = mrr5 = 0.0
-rows_out = []
-
-with open(IN, newline="", encoding="utf-8") as f:
-    for row in csv.DictReader(f):
-        frag = row["fragment"].strip(); gold = row["gold_id"].strip()
-        n += 1
-        t0 = time.perf_counter()
-        results = ret.search_topk(frag, k=TOPK)  
-        dt = time.perf_counter() - t0; lat.append(dt)
+def _pct(sorted_vals: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already-sorted list."""
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, math.ceil(p / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[i]
+
+# backends
+def build_backend(name: str, record: str = "", replay: str = "", latency_ms: float = 0.0):
+    """neo4j | local | cached (RETRIEVER_BACKEND with the result cache on) | async (AsyncRetriever).
+    record/replay wrap the Neo4j driver (see replay_driver.py); they don't apply to local/async."""
+    if name == "async":
+        from async_retriever import AsyncRetriever
+        ret = AsyncRetriever()
+        ret.cache = None
+        return ret
+
+    base = RETRIEVER_BACKEND if name == "cached" else name
+    kwargs = {}
+    if (record or replay) and base == "neo4j":
+        kwargs["driver"] = open_driver(
+            NEO4J_URI, (NEO4J_USER, NEO4J_PASSWORD), record_path=record, replay_path=replay, latency_ms=latency_ms,
+            max_connection_pool_size=NEO4J_MAX_POOL_SIZE, connection_acquisition_timeout=NEO4J_ACQUIRE_TIMEOUT,
+        )
+    if name == "cached":
+        return make_retriever(**kwargs)
+    ret = make_retriever(name, **kwargs)
+    ret.cache = None          # measure retrieval, not cache hits
+    return ret
+
+# one loop for the whole run: the async Neo4j driver is bound to the loop it first ran on
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+def _run_coro(coro):
+    global _LOOP
+    if _LOOP is None:
+        _LOOP = asyncio.new_event_loop()
+    return _LOOP.run_until_complete(coro)
+
+def _close(ret) -> None:
+    res = ret.close()
+    if asyncio.iscoroutine(res):
+        _run_coro(res)
+
+# runners: each returns [(fragment, gold, results, latency_s)] in input order
+def _one(ret, frag: str, gold: str):
+    t0 = time.perf_counter()
+    results = ret.search_topk(frag, k=TOPK)
+    return frag, gold, results, time.perf_counter() - t0
+
+def run_threads(ret, samples, concurrency: int):
+    if concurrency <= 1:
+        return [_one(ret, f, g) for f, g in samples]
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        return list(ex.map(lambda s: _one(ret, *s), samples))
+
+def run_asyncio(ret, samples, concurrency: int):
+    native = asyncio.iscoroutinefunction(getattr(ret, "search_topk", None))
+
+    async def _main():
+        sem = asyncio.Semaphore(max(1, concurrency))
+
+        async def _task(frag, gold):
+            async with sem:
+                t0 = time.perf_counter()
+                if native:
+                    results = await ret.search_topk(frag, k=TOPK)
+                else:
+                    results = await asyncio.to_thread(ret.search_topk, frag, TOPK)
+                return frag, gold, results, time.perf_counter() - t0
+
+        return await asyncio.gather(*(_task(f, g) for f, g in samples))
+
+    return _run_coro(_main())
+
+def evaluate(ret, samples: List[Tuple[str, str]], concurrency: int = 1, runner: str = "threads",
+             warmup: int = 0, repeat: int = 1) -> Dict[str, Any]:
+    native = asyncio.iscoroutinefunction(getattr(ret, "search_topk", None))
+    run = run_asyncio if (runner == "asyncio" or native) else run_threads
+    if warmup:
+        run(ret, samples[:warmup], concurrency)
+
+    t0 = time.perf_counter()
+    out = []
+    for _ in range(max(1, repeat)):
+        out += run(ret, samples, concurrency)
+    wall = time.perf_counter() - t0
+
+    n = len(out)
+    top1 = top5 = mrr5 = 0.0
+    lat, rows_out = [], []
+    variant_hits: Counter = Counter()
+    for frag, gold, results, dt in out:
+        lat.append(dt)
         rank = rank_of(gold, results)
         top1 += 1 if rank == 1 else 0
         top5 += 1 if (rank and rank <= TOPK) else 0
         mrr5 += (1.0 / rank) if (rank and rank <= TOPK) else 0.0
-        rows_out.append({"fragment": frag, "gold_id": gold, "rank": rank or "", "latency_s": f"{dt:.3f}"})
+        # which variant produced the gold hit
+        variant_hits[(results[rank - 1].get("variant") or "?") if rank else "miss"] += 1
+        rows_out.append({"fragment": frag, "gold_id": gold, "rank": rank or "", "latency_s": round(dt, 6)})
+
+    lat_sorted = sorted(lat)
+    return {
+        "n": n,
+        "top1": top1 / max(1, n),
+        "top5": top5 / max(1, n),
+        "mrr5": mrr5 / max(1, n),
+        "p50": statistics.median(lat) if lat else 0.0,
+        "p90": _pct(lat_sorted, 90),
+        "p99": _pct(lat_sorted, 99),
+        "max": lat_sorted[-1] if lat else 0.0,
+        "mean": statistics.fmean(lat) if lat else 0.0,
+        "qps": n / wall if wall > 0 else 0.0,
+        "wall_s": wall,
+        "variant_hits": {v: {"count": c, "rate": c / max(1, n)} for v, c in variant_hits.most_common()},
+        "rows": rows_out,
+    }
+
+def _fmt(tag: str, m: Dict[str, Any]) -> str:
+    return (f"[{tag}] Samples {m['n']} | Top1 {m['top1']:.3f} | Top5 {m['top5']:.3f} | MRR@5 {m['mrr5']:.3f} | "
+            f"p50 {m['p50']:.3f}s p90 {m['p90']:.3f}s p99 {m['p99']:.3f}s max {m['max']:.3f}s | {m['qps']:.1f} q/s")
+
+def main(argv: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    ap = argparse.ArgumentParser(description="Retrieval benchmark (quality + latency + throughput)")
+    ap.add_argument("--input", default=IN, help="CSV with fragment,gold_id (env EVAL_CSV)")
+    ap.add_argument("--backends", default="neo4j", help="comma list of neo4j, local, cached, async")
+    ap.add_argument("--modes", default="", help="comma list of ft, dense, hybrid (default: all available)")
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--runner", choices=["threads", "asyncio"], default="threads")
+    ap.add_argument("--warmup", type=int, default=5, help="queries run before timing starts")
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--limit", type=int, default=0, help="use only the first N samples")
+    ap.add_argument("--out", default="", help="write results JSON here")
+    ap.add_argument("--per-sample", action="store_true", help="include per-fragment rows in the JSON")
+    ap.add_argument("--record", default="", help="record Neo4j exchanges to this tape")
+    ap.add_argument("--replay", default="", help="serve Neo4j exchanges from this tape (no server)")
+    ap.add_argument("--replay-latency-ms", type=float, default=0.0, help="injected per-query latency on replay")
+    args = ap.parse_args(argv)
+
+    with open(args.input, newline="", encoding="utf-8") as f:
+        samples = [(row["fragment"].strip(), row["gold_id"].strip()) for row in csv.DictReader(f)]
+    if args.limit:
+        samples = samples[:args.limit]
+
+    runs = []
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        ret = build_backend(backend, args.record, args.replay, args.replay_latency_ms)
+        try:
+            # FT-only / dense-only / hybrid when a dense index is available
+            available = ["ft", "dense", "hybrid"] if getattr(ret, "dense", None) is not None else ["ft"]
+            modes = [m for m in args.modes.split(",") if m in available] if args.modes else available
+            for mode in modes:
+                if hasattr(ret, "mode"):
+                    ret.mode = mode
+                m = evaluate(ret, samples, args.concurrency, args.runner, args.warmup, args.repeat)
+                m.update({"backend": backend, "mode": mode})
+                if not args.per_sample:
+                    m.pop("rows")
+                print(_fmt(f"{backend}/{mode}", m))
+                print("   hits by variant: " + ", ".join(f"{v} {d['rate']:.2f}" for v, d in m["variant_hits"].items()))
+                if backend == "cached" and getattr(ret, "cache", None) is not None:
+                    m["cache"] = ret.cache.stats()
+                runs.append(m)
+        finally:
+            _close(ret)
 
-ret.close()
+    if args.out:
+        report = {
+            "config": {**vars(args), "topk": TOPK, "python": platform.python_version(), "host": platform.node(),
+                       "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "runs": runs,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results -> {args.out}")
+    return runs
 
-acc1 = top1/max(1,n); rec5 = top5/max(1,n); mrr = mrr5/max(1,n)
-p50 = statistics.median(lat) if lat else 0.0
-p90 = statistics.quantiles(lat, n=10)[8] if len(lat) >= 10 else p50
-print(f"Samples {n} | Top1 {acc1:.3f} | Top5 {rec5:.3f} | MRR@5 {mrr:.3f} | p50 {p50:.3f}s p90 {p90:.3f}s")
+if __name__ == "__main__":
+    main()
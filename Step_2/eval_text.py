@@ -1,10 +1,43 @@
 # signore
-from dialogue import handle_user_transcript
-from session import get_session
+#   python eval_text.py                                  # interactive
+#   python eval_text.py --file turns.txt --replay tape.jsonl.gz   # scripted, Neo4j served from a tape
+import os, sys, time, argparse
 
 if __name__ == "__main__":
-    sid = "tester"           
-    get_session(sid)        
+    ap = argparse.ArgumentParser(description="Text-mode dialogue eval")
+    ap.add_argument("--file", default="", help="one user turn per line; runs non-interactively with timings")
+    ap.add_argument("--record", default="", help="record Neo4j exchanges to this tape")
+    ap.add_argument("--replay", default="", help="serve Neo4j exchanges from this tape (no server)")
+    ap.add_argument("--replay-latency-ms", type=float, default=0.0)
+    args = ap.parse_args()
+
+    # must be set before dialogue (and config) are imported
+    if args.record: os.environ["NEO4J_RECORD_PATH"] = args.record
+    if args.replay: os.environ["NEO4J_REPLAY_PATH"] = args.replay
+    if args.replay_latency_ms: os.environ["REPLAY_LATENCY_MS"] = str(args.replay_latency_ms)
+
+    from dialogue import handle_user_transcript
+    from session import get_session
+
+    sid = "tester"
+    get_session(sid)
+
+    if args.file:
+        lat = []
+        with open(args.file, encoding="utf-8") as f:
+            for line in f:
+                user_in = line.strip()
+                if not user_in:
+                    continue
+                t0 = time.perf_counter()
+                reply = handle_user_transcript(user_in, session_id=sid)
+                lat.append(time.perf_counter() - t0)
+                print(f"You: {user_in}\nBot: {reply}  [{1000 * lat[-1]:.0f} ms]")
+        if lat:
+            lat.sort()
+            print(f"Turns {len(lat)} | p50 {1000 * lat[len(lat) // 2]:.0f} ms | max {1000 * lat[-1]:.0f} ms")
+        sys.exit(0)
+
     print("Text eval mode. Type queries (q to quit).")
 
     while True:
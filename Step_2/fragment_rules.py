@@ -0,0 +1,105 @@
+# Deterministic quote-fragment extractor: the common "find/finish the quote X" and quoted-span
+# phrasings, so LLM.extract_fragment only calls the model when the rules aren't confident.
+#   python fragment_rules.py "Find the quote: two things are infinite"
+import re, sys
+from typing import Tuple
+
+# noise words to strip after extraction (shared with the LLM path)
+NOISE_RE = re.compile(
+    r'\b(new|another|different)\s+quote\b|'
+    r'\b(find|search|look up|complete|finish|continue|tell me|who said|source)\b[: ]?',
+    re.I,
+)
+
+FOLLOWUP_PHRASES = ("who said this", "who said that", "who said it", "who wrote this")
+
+# quoted span: "...", “...”, '...' (apostrophes inside words don't open a span)
+QUOTED_RE = re.compile(r'"([^"]+)"|“([^”]+)”|(?<!\w)\'([^\']+)\'(?!\w)')
+
+# command prefix, e.g. "can you please finish this new quote that goes: ..."
+COMMAND_RE = re.compile(
+    r'^\s*(?:(?:hey|ok|okay|so|and)[, ]+)?(?:(?:can|could|would|will)\s+you\s+)?(?:please\s+)?'
+    r'(?:find|search(?:\s+for)?|look\s+up|complete|finish|continue|tell\s+me|who\s+said|who\s+wrote|get)\s+'
+    r'(?:me\s+)?(?:(?:the|this|that|a|an)\s+)?(?:(?:new|another|different)\s+)?'
+    r'(?:quote|quotation|line|saying)?\s*'
+    r'(?:(?:that|which)\s+(?:goes|says|starts|begins)(?:\s+with)?|starting\s+with|beginning\s+with|of|about)?'
+    r'\s*[:,\-–]?\s*(?P<rest>.*)$',
+    re.I,
+)
+
+# hedging between the command and the fragment: "the one that says", "i think it was", "something like"
+LEAD_RE = re.compile(
+    r'^(?:\s*(?:(?:the\s+)?one\s+(?:that|which)\s+(?:says|goes)|i\s+(?:think|guess|believe)\s+(?:it\s+)?(?:was|is|goes|says)'
+    r'|it\s+(?:was|is|goes|says)|something\s+like|(?:um+|uh+|erm?)\b)[\s,:\-–]*)+',
+    re.I,
+)
+# hedge/filler still inside the remainder: the words are probably not the user's exact quote
+HEDGE_RE = re.compile(
+    r"\b(?:i\s+think|i\s+guess|i\s+believe|maybe|perhaps|probably|something\s+like|or\s+something|"
+    r"sort\s+of|kind\s+of|not\s+sure|i\s+don'?t\s+know|um+|uh+|erm?)\b",
+    re.I,
+)
+
+# left-over question words mean the turn is not a bare fragment
+QUESTION_RE = re.compile(r'^\s*(?:who|what|where|when|why|how|which|is|does|did|can|could)\b|\?\s*$', re.I)
+DEICTIC_RE = re.compile(r'\b(?:this|that|it|the\s+quote)\b', re.I)
+VAGUE_RE = re.compile(r'^\s*(?:something|anything|more|about)\b', re.I)
+AUTHOR_TAIL_RE = re.compile(r'\s+(?:by|from)\s+[A-Z][\w.\'-]*(?:\s+[A-Z][\w.\'-]*)*\s*$')
+
+STRIP = '“”"\' .,:;!?-…'
+
+
+def _finish(frag: str) -> str:
+    frag = frag.strip(STRIP)
+    frag = NOISE_RE.sub("", frag).strip(STRIP)     # strip command/noise words
+    frag = re.sub(r"\s+", " ", frag)
+    return frag if len(re.findall(r"\w+", frag)) >= 3 else ""      # same >=3 word floor as the LLM path
+
+
+def extract_fragment_rules(question: str) -> Tuple[str, float]:
+    """(fragment, confidence in [0, 1]); an empty fragment with high confidence means 'no fragment'."""
+    text = (question or "").strip()
+    qlow = text.lower()
+    if not text:
+        return "", 1.0
+    if any(p in qlow for p in FOLLOWUP_PHRASES):
+        return "", 1.0
+
+    # quoted span wins: the user marked the fragment explicitly
+    spans = [next(g for g in m.groups() if g) for m in QUOTED_RE.finditer(text)]
+    spans = [s for s in spans if len(re.findall(r"\w+", s)) >= 3]
+    if len(spans) == 1:
+        frag = _finish(spans[0])
+        return frag, (0.95 if frag else 0.4)
+
+    m = COMMAND_RE.match(text)
+    if m and m.group("rest"):
+        rest = LEAD_RE.sub("", m.group("rest"))
+        conf = 0.9
+        if HEDGE_RE.search(rest):                  # "... knowledge is power or something": let the model trim it
+            conf = 0.5
+        if AUTHOR_TAIL_RE.search(rest):            # "... by Einstein": let the model drop the name
+            conf = 0.5
+        if QUESTION_RE.search(rest) or "quote" in rest.lower():
+            conf = 0.4
+        if VAGUE_RE.match(rest) or (DEICTIC_RE.search(rest) and len(re.findall(r"\w+", rest)) <= 5):
+            conf = 0.4                             # "tell me more about this one"
+        frag = _finish(rest)
+        return frag, (conf if frag else 0.3)
+
+    # follow-up about the current quote ("what's the source of that quote?")
+    if QUESTION_RE.search(text) and DEICTIC_RE.search(text) and len(re.findall(r"\w+", text)) <= 10:
+        return "", 0.85
+
+    # bare fragment: plausible, but only the model can tell it apart from a question
+    if not QUESTION_RE.search(text) and not NOISE_RE.search(text):
+        frag = _finish(text)
+        if frag:
+            return frag, 0.7
+    return "", 0.0
+
+
+if __name__ == "__main__":
+    for q in sys.argv[1:]:
+        frag, conf = extract_fragment_rules(q)
+        print(f"{conf:.2f}  {frag!r}  <- {q!r}")
@@ -0,0 +1,198 @@
+# Phonetic-key + character-trigram fallback index for ASR-misheard fragments
+# ("jira" for "zira", homophones, split words). Built offline from the quote snapshot
+# written by local_index.py; search_topk falls back to it when the FT variants return < k.
+#   python fuzzy_index.py build [--index DIR]
+#   python fuzzy_index.py query "too things are in finite"
+import re, json, time, bisect, argparse
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
+
+from config import LOCAL_INDEX_DIR, FUZZY_BUDGET_MS, FUZZY_MIN_SIM, DEBUG
+from retriever import _clean_tokens
+from local_index import load_snapshot
+
+PHONETIC_WEIGHT = 0.8          # credit for a same-sound token with weak spelling overlap
+MAX_TRIGRAM_DF = 2000          # drop trigrams shared by more tokens than this (bounds memory + work)
+
+_SOUNDEX = {c: d for d, letters in {"1": "bfpv", "2": "cgjkqsxz", "3": "dt", "4": "l", "5": "mn", "6": "r"}.items() for c in letters}
+
+
+def phonetic_key(word: str) -> str:
+    """Soundex-style key over the whole word (first letter encoded too, so j/z, c/k collide)."""
+    w = re.sub(r"[^a-z]", "", (word or "").lower())
+    w = re.sub(r"^(kn|gn|pn)", "n", w)
+    w = re.sub(r"^wr", "r", w)
+    w = re.sub(r"^ps", "s", w)
+    w = w.replace("ph", "f").replace("ck", "k").replace("gh", "")
+    out, prev = [], ""
+    for ch in w:
+        d = _SOUNDEX.get(ch, "")
+        if d and d != prev:
+            out.append(d)
+        prev = d
+    key = "".join(out)
+    return ("0" + key) if w[:1] in "aeiouy" and w else key
+
+
+def trigrams(token: str) -> List[str]:
+    t = f" {token} "
+    return sorted({t[i:i + 3] for i in range(len(t) - 2)})
+
+
+def _csr(groups: Dict[str, List[int]]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    keys = sorted(groups)
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    flat: List[int] = []
+    for i, k in enumerate(keys):
+        flat.extend(sorted(set(groups[k])))
+        offsets[i + 1] = len(flat)
+    return keys, offsets, np.asarray(flat, dtype=np.int32)
+
+
+def build_fuzzy_index(index_dir: str = LOCAL_INDEX_DIR) -> None:
+    out = Path(index_dir)
+    docs = load_snapshot(index_dir)
+
+    tok_docs: Dict[str, List[int]] = {}
+    for d, row in enumerate(docs):
+        for t in set(_clean_tokens(row.get("quote") or "")):
+            tok_docs.setdefault(t, []).append(d)
+    tokens, tok_offsets, tok_flat = _csr(tok_docs)
+
+    tri: Dict[str, List[int]] = {}
+    phon: Dict[str, List[int]] = {}
+    n_tri = np.zeros(len(tokens), dtype=np.int16)
+    for i, t in enumerate(tokens):
+        grams = trigrams(t)
+        n_tri[i] = len(grams)
+        for g in grams:
+            tri.setdefault(g, []).append(i)
+        k = phonetic_key(t)
+        if len(k) >= 2:
+            phon.setdefault(k, []).append(i)
+    tri = {g: ids for g, ids in tri.items() if len(ids) <= MAX_TRIGRAM_DF}
+    tri_keys, tri_offsets, tri_flat = _csr(tri)
+    phon_keys, phon_offsets, phon_flat = _csr(phon)
+
+    (out / "fz_tokens.json").write_text(json.dumps(tokens), encoding="utf-8")
+    (out / "fz_trigrams.json").write_text(json.dumps(tri_keys), encoding="utf-8")
+    (out / "fz_phonetic.json").write_text(json.dumps(phon_keys), encoding="utf-8")
+    for name, arr in [("tok_offsets", tok_offsets), ("tok_docs", tok_flat), ("tok_ntri", n_tri),
+                      ("tri_offsets", tri_offsets), ("tri_tokens", tri_flat),
+                      ("phon_offsets", phon_offsets), ("phon_tokens", phon_flat)]:
+        np.save(out / f"fz_{name}.npy", arr)
+
+
+class FuzzyIndex:
+    """Token-level fuzzy matcher; arrays are memory-mapped so memory stays bounded by the vocab."""
+
+    def __init__(self, index_dir: str = LOCAL_INDEX_DIR, docs: Optional[List[Dict[str, Any]]] = None,
+                 budget_ms: float = FUZZY_BUDGET_MS, min_sim: float = FUZZY_MIN_SIM) -> None:
+        d = Path(index_dir)
+        self.docs = docs if docs is not None else load_snapshot(index_dir)
+        self.tokens: List[str] = json.loads((d / "fz_tokens.json").read_text(encoding="utf-8"))
+        self._tri_keys: List[str] = json.loads((d / "fz_trigrams.json").read_text(encoding="utf-8"))
+        self._phon_keys: List[str] = json.loads((d / "fz_phonetic.json").read_text(encoding="utf-8"))
+        load = lambda name: np.load(d / f"fz_{name}.npy", mmap_mode="r")
+        self.tok_offsets, self.tok_docs, self.tok_ntri = load("tok_offsets"), load("tok_docs"), load("tok_ntri")
+        self.tri_offsets, self.tri_tokens = load("tri_offsets"), load("tri_tokens")
+        self.phon_offsets, self.phon_tokens = load("phon_offsets"), load("phon_tokens")
+        self.budget_ms = budget_ms
+        self.min_sim = min_sim
+        self.calls = self.over_budget = 0
+        self.last_ms = self.total_ms = 0.0
+
+    @staticmethod
+    def _lookup(keys: List[str], offsets: np.ndarray, flat: np.ndarray, key: str) -> np.ndarray:
+        i = bisect.bisect_left(keys, key)
+        if i >= len(keys) or keys[i] != key:
+            return np.zeros(0, dtype=np.int32)
+        return np.asarray(flat[int(offsets[i]):int(offsets[i + 1])])
+
+    def _similar_tokens(self, term: str) -> Dict[int, float]:
+        """Vocab token id -> similarity (trigram Dice, or PHONETIC_WEIGHT on a sound-alike)."""
+        grams = trigrams(term)
+        hits = [self._lookup(self._tri_keys, self.tri_offsets, self.tri_tokens, g) for g in grams]
+        out: Dict[int, float] = {}
+        if any(h.size for h in hits):
+            ids, shared = np.unique(np.concatenate(hits), return_counts=True)
+            dice = 2.0 * shared / (len(grams) + np.asarray(self.tok_ntri)[ids])
+            keep = dice >= self.min_sim
+            out = dict(zip(ids[keep].tolist(), dice[keep].tolist()))
+        key = phonetic_key(term)
+        if len(key) >= 2:
+            for tid in self._lookup(self._phon_keys, self.phon_offsets, self.phon_tokens, key).tolist():
+                out[tid] = max(out.get(tid, 0.0), PHONETIC_WEIGHT)
+        return out
+
+    def search(self, fragment: str, limit: int) -> List[Dict[str, Any]]:
+        """Best docs by mean per-token fuzzy match; each row carries `fuzzy` in [0, 1]."""
+        t0 = time.perf_counter()
+        q_toks = _clean_tokens(fragment or "")
+        if not q_toks or not self.docs:
+            return []
+
+        per_pos = np.zeros((len(q_toks), len(self.docs)), dtype=np.float32)
+        # single tokens, plus adjacent pairs joined for split words ("in finite" -> "infinite")
+        terms = [(t, (i,)) for i, t in enumerate(q_toks)]
+        terms += [(a + b, (i, i + 1)) for i, (a, b) in enumerate(zip(q_toks, q_toks[1:]))]
+        for term, positions in terms:
+            if 1000 * (time.perf_counter() - t0) > self.budget_ms:
+                self.over_budget += 1
+                break
+            for tid, sim in self._similar_tokens(term).items():
+                docs = np.asarray(self.tok_docs[int(self.tok_offsets[tid]):int(self.tok_offsets[tid + 1])])
+                for p in positions:
+                    np.maximum.at(per_pos[p], docs, sim)
+
+        sims = per_pos.sum(axis=0) / len(q_toks)
+        nz = np.flatnonzero(sims >= self.min_sim)
+        if nz.size > limit:
+            nz = nz[np.argpartition(-sims[nz], limit - 1)[:limit]]
+        nz = nz[np.argsort(-sims[nz], kind="stable")]
+
+        self.calls += 1
+        self.last_ms = 1000 * (time.perf_counter() - t0)
+        self.total_ms += self.last_ms
+        if DEBUG: print(f"[DBG] FUZZY hits={nz.size} in {self.last_ms:.1f} ms")
+        return [{**self.docs[i], "fuzzy": float(sims[i])} for i in nz.tolist()]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "over_budget": self.over_budget,
+            "last_ms": self.last_ms,
+            "avg_ms": (self.total_ms / self.calls) if self.calls else 0.0,
+            "budget_ms": self.budget_ms,
+            "vocab": len(self.tokens),
+        }
+
+
+def load_fuzzy_index(index_dir: str = LOCAL_INDEX_DIR, docs: Optional[List[Dict[str, Any]]] = None) -> Optional[FuzzyIndex]:
+    """FuzzyIndex if it has been built under index_dir, else None."""
+    if not (Path(index_dir) / "fz_tokens.json").exists():
+        return None
+    return FuzzyIndex(index_dir, docs=docs)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Phonetic / trigram fallback index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="build from the quotes.jsonl snapshot (run local_index.py build first)")
+    b.add_argument("--index", default=LOCAL_INDEX_DIR)
+    qp = sub.add_parser("query")
+    qp.add_argument("fragment")
+    qp.add_argument("--index", default=LOCAL_INDEX_DIR)
+    qp.add_argument("-k", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        build_fuzzy_index(args.index)
+        print(f"Fuzzy index built in {time.perf_counter() - t0:.2f}s -> {Path(args.index).resolve()}")
+    else:
+        fz = FuzzyIndex(args.index)
+        for r in fz.search(args.fragment, args.k):
+            print(f"{r['fuzzy']:.2f}  {r['id']}  {r['quote'][:90]!r}")
+        print(fz.stats())
@@ -0,0 +1,440 @@
+# Local intent classifier: char n-gram TF-IDF + multinomial logistic regression over the 13 intents
+# of intent_mapper. Trained on utterances generated from the command phrasings main.py recognizes
+# (plus looser paraphrases the regexes miss). scikit-learn is only needed to train; the fitted model
+# is compiled to a vocabulary dict + numpy weights, so predict() is pure python/numpy (~tens of µs).
+# The model is trained by `train` or at main.py startup when the pickle is missing/stale, never mid-turn.
+#   python intent_classifier.py train              # fit, save to INTENT_MODEL_PATH, print held-out eval
+#   python intent_classifier.py eval [--llm]       # accuracy + latency; --llm also times map_intent_with_llm
+#   python intent_classifier.py check              # main.py's command regexes vs. the templates
+#   python intent_classifier.py predict "could you talk a bit slower"
+import re, ast, sys, time, json, random, pickle, hashlib, argparse, statistics
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
+
+from config import INTENT_MODEL_PATH, INTENT_MIN_CONF, DEBUG
+
+_HERE = Path(__file__).resolve().parent
+MODEL_PATH = str(Path(INTENT_MODEL_PATH) if Path(INTENT_MODEL_PATH).is_absolute() else _HERE / INTENT_MODEL_PATH)
+
+INTENTS = ["reset", "register", "provide_name", "set_voice", "list_voices", "test_voice", "set_rate",
+           "bump_rate", "set_volume", "bump_volume", "new_quote", "query", "smalltalk"]
+
+NGRAMS = (2, 5)
+HIGH_CONF = 0.85
+
+# slot fillers (same vocabulary as main.py's presets)
+VOICES = ["zira", "david", "hazel", "mark", "susan", "george", "jira", "samantha", "daniel", "karen"]
+RATE_WORDS = ["very slow", "slow", "medium", "fast", "very fast", "low", "high"]
+VOLUME_WORDS = ["mute", "low", "medium", "normal", "high", "max", "maximum"]
+NAMES = ["john", "maria", "ali", "sarah connor", "li wei", "omar", "emma stone", "raj", "anna", "peter parker"]
+QUOTES = ["two things are infinite", "be the change you wish to see", "i have a dream", "to be or not to be",
+          "change is the only constant", "speak softly and carry a big stick", "the only thing we have to fear",
+          "actions speak louder than words", "imagination is more important than knowledge",
+          "start where you are", "the unexamined life is not worth living", "stay hungry stay foolish"]
+AUTHORS = ["einstein", "gandhi", "shakespeare", "lincoln", "churchill", "mark twain", "oscar wilde"]
+TOPICS = ["love", "time", "change", "courage", "voices", "speed", "silence", "new beginnings"]
+
+PREFIXES = ["", "", "", "please ", "can you ", "could you ", "i want you to ", "would you "]
+SUFFIXES = ["", "", "", " please", " now", " for me", " thanks"]
+
+TEMPLATES: Dict[str, List[str]] = {
+    "reset": ["reset", "clear context", "clear the context", "clear it", "clear this", "start over", "new session",
+              "let's start over", "forget everything", "wipe the conversation", "clear our conversation",
+              "begin again", "reset the session", "start from scratch", "clear the history", "reset everything",
+              "forget what we talked about"],
+    "register": ["register", "register me", "enroll", "enroll me", "i want to register", "sign me up",
+                 "create a voice profile", "add my voice", "set up my profile", "can i register",
+                 "make me a profile", "learn my voice", "enroll my voice", "remember my voice",
+                 "add more samples to my profile"],
+    "provide_name": ["my name is {name}", "i'm {name}", "call me {name}", "the name is {name}",
+                     "you can call me {name}", "register me as {name}", "enroll me as {name}",
+                     "my name's {name}", "it's {name} here", "i am called {name}"],
+    "set_voice": ["set my voice to {voice}", "change the voice to {voice}", "switch to {voice}",
+                  "use {voice}'s voice", "use the {voice} voice", "i want {voice}", "talk like {voice}",
+                  "switch voice to {voice}", "change my speaker to {voice}", "set my audio to {voice}",
+                  "change voice {voice}", "let {voice} speak", "use voice {voice}"],
+    "list_voices": ["list voices", "show voices", "what voices do you have", "which voices are available",
+                    "list the available voices", "show me all voices", "what voices can i pick",
+                    "read me the voice options", "what are my voice options", "tell me the voices"],
+    "test_voice": ["test", "test my voice", "what's my voice", "what is my voice", "let me hear my voice",
+                   "play a sample", "how do i sound", "say something in my voice", "voice check",
+                   "test the current voice", "what does my voice sound like"],
+    "set_rate": ["set my rate to {rate}", "set my speed to {num}", "set my speaking rate to {rate}",
+                 "make my pace {rate}", "speak at {rate} speed", "change the speaking rate to {num}",
+                 "set the tempo to {rate}", "use a {rate} speaking rate", "rate {num}", "set my tempo to {num}",
+                 "change my speed to {rate}", "speaking speed {rate}", "make my speed {rate}"],
+    "bump_rate": ["faster", "slower", "speak faster", "make faster", "make slower", "talk slower", "slow down",
+                  "speed up", "a bit faster", "you're talking too fast", "too slow", "speak more slowly",
+                  "pick up the pace", "talk quicker", "not so fast", "a little slower"],
+    "set_volume": ["set my volume to {vol}", "set my volume to {volnum}", "make my volume {vol}",
+                   "volume {vol}", "change the volume to {vol}", "set volume to {volnum}", "mute",
+                   "put the volume on {vol}", "volume to {volnum}", "make the volume {vol}"],
+    "bump_volume": ["louder", "quieter", "softer", "make it louder", "make it quieter", "turn it up",
+                    "turn it down", "speak up", "i can't hear you", "too loud", "lower your voice", "be quieter",
+                    "turn the volume up", "volume up", "volume down", "turn louder", "a bit softer"],
+    "new_quote": ["new quote", "another quote", "different quote", "find me a quote", "find me another quote",
+                  "give me another one", "next quote", "let's do another quote", "i have a new quote",
+                  "try a different quote", "new one", "something else", "let's try another quote"],
+    "query": ["who said {quote}", "finish the quote {quote}", "complete the quote {quote}",
+              "where is the quote {quote} from", "is {quote} misattributed", "when did {author} say {quote}",
+              "what's the source of {quote}", "find me the quote about {topic}", "who wrote that",
+              "who said that", "what's the rest of it", "quote about {topic}", "{quote}",
+              "what did {author} say about {topic}", "is that quote disputed", "who said this quote",
+              "find the quote {quote} by {author}", "tell me the citation", "search for the quote {quote}",
+              "what is the source of that quote", "when was it said", "is it really by {author}"],
+    "smalltalk": ["hi", "hello", "hey", "yo", "thanks", "thank you", "ok", "okay", "good morning",
+                  "how are you", "nice", "cool", "great thanks", "hello there", "good evening", "thanks a lot",
+                  "that's great", "awesome"],
+}
+
+# how each template family is filled; utterances are generated, not hand-labeled
+FILLERS = {
+    "name": NAMES, "voice": VOICES, "rate": RATE_WORDS, "num": ["120", "150", "185", "200", "240", "90"],
+    "vol": VOLUME_WORDS, "volnum": ["0", "0.3", "0.5", "0.75", "1", "1.0"], "quote": QUOTES,
+    "author": AUTHORS, "topic": TOPICS,
+}
+
+# looser phrasings kept out of training (what the LLM fallback used to be for)
+HELD_OUT: List[Tuple[str, str]] = [
+    ("could you please reset our chat", "reset"), ("wipe everything and start fresh", "reset"),
+    ("i'd like to enroll my voice please", "register"), ("please register my voice", "register"),
+    ("hello my name is Jane Doe", "provide_name"), ("you may call me Bob", "provide_name"),
+    ("can you switch the voice to hazel please", "set_voice"), ("i prefer the zira voice", "set_voice"),
+    ("which voices can you do", "list_voices"), ("show me the voices you have", "list_voices"),
+    ("let me hear how i sound", "test_voice"), ("can you test my voice", "test_voice"),
+    ("set the speaking speed to very fast", "set_rate"), ("change my pace to 160", "set_rate"),
+    ("could you talk a bit slower", "bump_rate"), ("please speak a little faster", "bump_rate"),
+    ("set the volume to low please", "set_volume"), ("put my volume at 0.4", "set_volume"),
+    ("can you be a bit louder", "bump_volume"), ("you're way too loud", "bump_volume"),
+    ("give me a different quote", "new_quote"), ("let's move on to another quote", "new_quote"),
+    ("who said actions speak louder than words", "query"), ("finish the quote change is the only constant", "query"),
+    ("what's the source of that one", "query"), ("hi there", "smalltalk"), ("thanks so much", "smalltalk"),
+]
+
+
+def generate(seed: int = 0, per_template: int = 6, wrap: bool = True) -> List[Tuple[str, str]]:
+    """(text, intent) pairs: every template, filled and (wrap=True) wrapped in a few polite prefixes/suffixes."""
+    rng = random.Random(seed)
+    out = []
+    for intent, templates in TEMPLATES.items():
+        for tpl in templates:
+            slots = re.findall(r"\{(\w+)\}", tpl)
+            n = per_template if slots else max(2, per_template // 2)
+            for _ in range(n):
+                text = tpl.format(**{s: rng.choice(FILLERS[s]) for s in slots})
+                if wrap and intent not in ("query", "smalltalk"):
+                    text = rng.choice(PREFIXES) + text + rng.choice(SUFFIXES)
+                out.append((text, intent))
+    return sorted(set(out))
+
+
+def data_version() -> str:
+    """Changes whenever the templates or features change, so a stale pickle is retrained."""
+    blob = json.dumps([INTENTS, TEMPLATES, FILLERS, PREFIXES, SUFFIXES, NGRAMS], sort_keys=True)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+
+
+def normalize(text: str) -> str:
+    t = (text or "").strip().lower()
+    t = re.sub(r"[’`]", "'", t)
+    t = re.sub(r"[!?…,;:\"]+|\.(?!\d)", " ", t)            # keep decimals ("volume to 0.4")
+    return re.sub(r"\s+", " ", t).strip()
+
+
+def char_ngrams(text: str, lo: int = NGRAMS[0], hi: int = NGRAMS[1]) -> List[str]:
+    """Same n-grams as sklearn's analyzer='char_wb' (words padded with one space)."""
+    grams = []
+    for w in text.split():
+        w = f" {w} "
+        L = len(w)
+        for n in range(lo, hi + 1):
+            grams.extend(w[i:i + n] for i in range(max(1, L - n + 1)))
+            if L <= n:                                 # a short word counts once
+                break
+    return grams
+
+
+class IntentModel:
+    """Compiled TF-IDF + logistic regression; no scikit-learn needed to predict."""
+
+    def __init__(self, vocab: Dict[str, int], idf: np.ndarray, coef: np.ndarray, intercept: np.ndarray,
+                 classes: List[str], version: str) -> None:
+        self.vocab, self.idf, self.classes, self.version = vocab, idf.astype(np.float32), [str(c) for c in classes], version
+        self.coef_t = np.ascontiguousarray(coef.T, dtype=np.float32)     # (n_features, n_classes)
+        self.intercept = intercept.astype(np.float32)
+
+    def proba(self, text: str) -> np.ndarray:
+        counts: Dict[int, int] = {}
+        for g in char_ngrams(normalize(text)):
+            j = self.vocab.get(g)
+            if j is not None:
+                counts[j] = counts.get(j, 0) + 1
+        if not counts:
+            z = self.intercept.copy()
+        else:
+            idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            w = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))) * self.idf[idx]
+            w /= np.sqrt(float(w @ w)) or 1.0
+            z = w @ self.coef_t[idx] + self.intercept
+        z = np.exp(z - z.max())
+        return z / z.sum()
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        p = self.proba(text)
+        k = int(p.argmax())
+        return self.classes[k], float(p[k])
+
+
+def train(pairs: Optional[List[Tuple[str, str]]] = None, C: float = 20.0) -> IntentModel:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    data = pairs if pairs is not None else generate()
+    texts = [normalize(t) for t, _ in data]
+    labels = [y for _, y in data]
+    vec = TfidfVectorizer(analyzer="char_wb", ngram_range=NGRAMS, sublinear_tf=True, lowercase=False, min_df=1)
+    X = vec.fit_transform(texts)
+    clf = LogisticRegression(C=C, max_iter=3000).fit(X, labels)
+    vocab = {g: int(j) for g, j in vec.vocabulary_.items()}
+    return IntentModel(vocab, vec.idf_, clf.coef_, clf.intercept_, list(clf.classes_), data_version())
+
+
+def save(model: IntentModel, path: str = MODEL_PATH) -> None:
+    # plain dict + arrays, so the pickle does not depend on how this module was imported
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump({"vocab": model.vocab, "idf": model.idf, "coef": model.coef_t.T, "intercept": model.intercept,
+                     "classes": model.classes, "version": model.version}, f)
+
+
+_MODEL: Optional[IntentModel] = None
+_LOAD_FAILED = False
+
+
+def load(path: str = MODEL_PATH, retrain: bool = False) -> Optional[IntentModel]:
+    """Cached model. A missing or stale pickle is (re)trained only with retrain=True (startup), never mid-turn;
+    without it a stale model is still used and a missing one disables the classifier."""
+    global _MODEL, _LOAD_FAILED
+    if _MODEL is not None and (not retrain or _MODEL.version == data_version()):
+        return _MODEL
+    if _LOAD_FAILED and not retrain:
+        return None
+    model = _MODEL
+    if model is None:
+        try:
+            with open(path, "rb") as f:
+                model = IntentModel(**pickle.load(f))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            if DEBUG: print(f"[DBG] intent model {path} unreadable: {e}")
+    if not retrain:
+        if DEBUG and model is not None and model.version != data_version():
+            print(f"[DBG] intent model {path} is stale (run: python intent_classifier.py train)")
+    elif model is None or model.version != data_version():
+        try:
+            t0 = time.perf_counter()
+            model = train()
+            save(model, path)
+            if DEBUG: print(f"[DBG] intent model trained in {time.perf_counter() - t0:.2f}s -> {path}")
+        except ImportError:
+            if DEBUG: print("[DBG] scikit-learn not installed; " +
+                            ("using stale intent model" if model else "intent classifier disabled"))
+    _MODEL = model
+    _LOAD_FAILED = model is None
+    return _MODEL
+
+
+# slots (the same fields intent_mapper's LLM prompt asks for)
+NAME_RE = re.compile(r"\b(?:my name is|my name's|name is|call me|i'm|i am|it's|as)\s+(?P<name>[a-z][a-z' -]*)", re.I)
+NAME_STOP_RE = re.compile(r"\s+(?:here|please|now|thanks|for me|and|but)\b.*$", re.I)
+VOICE_RE = re.compile(r"\b(?:to|use|want|like|let|prefer|voice)\s+(?:the\s+)?(?P<voice>[a-z][a-z'-]*)", re.I)
+VOICE_STOP = {"the", "a", "my", "voice", "speak", "please", "now", "you", "it", "use", "to", "me"}
+RATE_NUM_RE = re.compile(r"\b(?P<num>\d{2,3})\b")
+VOLUME_NUM_RE = re.compile(r"\b(?P<num>0(?:\.\d+)?|1(?:\.0+)?)\b")
+
+
+def _word_slot(t: str, words: List[str]) -> Optional[str]:
+    for w in sorted(words, key=len, reverse=True):          # "very slow" before "slow"
+        if re.search(rf"\b{w}\b", t):
+            return w
+    return None
+
+
+def extract_slots(intent: str, text: str) -> Dict[str, Any]:
+    t = normalize(text)
+    if intent == "provide_name":
+        m = NAME_RE.search(t)
+        if m:
+            name = NAME_STOP_RE.sub("", m.group("name")).strip()
+            if 2 <= len(name) <= 40:
+                return {"name": " ".join(w.capitalize() for w in name.split()[:4])}
+    elif intent == "set_voice":
+        for m in VOICE_RE.finditer(t):
+            v = re.sub(r"'s$", "", m.group("voice"))
+            if v not in VOICE_STOP:
+                return {"voice": "Zira" if v == "jira" else v.capitalize()}
+    elif intent == "set_rate":
+        m = RATE_NUM_RE.search(t)
+        if m:
+            return {"rate": int(m.group("num"))}
+        w = _word_slot(t, RATE_WORDS)
+        if w:
+            return {"rate": w}
+    elif intent == "bump_rate":
+        slower = re.search(r"\b(slow|slower|slowly|too fast|so fast)\b", t) and "too slow" not in t
+        return {"direction": "slower" if slower else "faster"}
+    elif intent == "set_volume":
+        w = _word_slot(t, VOLUME_WORDS)
+        if w:
+            return {"volume": w}
+        m = VOLUME_NUM_RE.search(t)
+        if m:
+            return {"volume": float(m.group("num"))}
+    elif intent == "bump_volume":
+        if re.search(r"\b(soft|softer)\b", t):
+            return {"direction": "softer"}
+        quieter = re.search(r"\b(quiet|quieter|down|lower|too loud)\b", t)
+        return {"direction": "quieter" if quieter else "louder"}
+    return {}
+
+
+def confidence_label(p: float) -> str:
+    return "high" if p >= HIGH_CONF else ("medium" if p >= INTENT_MIN_CONF else "low")
+
+
+def classify_intent(text: str) -> Optional[Dict[str, Any]]:
+    """{"intent","slots","confidence","score"} like intent_mapper, or None when no model is available."""
+    model = load()
+    if model is None:
+        return None
+    intent, p = model.predict(text)
+    return {"intent": intent, "slots": extract_slots(intent, text), "confidence": confidence_label(p), "score": p}
+
+
+# eval / latency
+def _timed(fn, texts: List[str], repeat: int = 1) -> Tuple[List[Any], List[float]]:
+    outs, lat = [], []
+    for _ in range(repeat):
+        outs = []
+        for t in texts:
+            t0 = time.perf_counter()
+            outs.append(fn(t))
+            lat.append(time.perf_counter() - t0)
+    return outs, lat
+
+
+def _lat(lat: List[float]) -> str:
+    xs = sorted(lat)
+    p = lambda q: 1e6 * xs[min(len(xs) - 1, int(q * len(xs)))]
+    return f"p50={p(0.5):.0f}µs p90={p(0.9):.0f}µs mean={1e6 * statistics.fmean(xs):.0f}µs"
+
+
+def evaluate(model: IntentModel, pairs: List[Tuple[str, str]], label: str) -> float:
+    preds, lat = _timed(model.predict, [t for t, _ in pairs], repeat=5)
+    wrong = [(t, y, p) for (t, y), (p, _) in zip(pairs, preds) if p != y]
+    acc = 1 - len(wrong) / max(1, len(pairs))
+    print(f"{label}: n={len(pairs)} accuracy={acc:.3f}  latency {_lat(lat)}")
+    for t, y, p in wrong[:15]:
+        print(f"   miss: {t!r} expected={y} got={p}")
+    return acc
+
+
+# main.py's deterministic command regexes, by the intent each one settles
+MAIN_REGEX_INTENTS = {
+    "RESET_RE": "reset", "REGISTER_ONLY_RE": "register", "REGISTER_RE": "provide_name",
+    "MY_NAME_IS_RE": "provide_name", "SET_VOICE_RE": "set_voice", "LIST_VOICES_RE": "list_voices",
+    "TEST_VOICE_RE": "test_voice", "SET_RATE_NUM_RE": "set_rate", "SET_RATE_WORD_RE": "set_rate",
+    "ADJUST_RATE_RE": "bump_rate", "SET_VOLUME_NUM_RE": "set_volume", "SET_VOLUME_WORD_RE": "set_volume",
+    "ADJUST_VOLUME_RE": "bump_volume", "NEW_QUOTE_RE": "new_quote", "SMALLTALK_RE": "smalltalk",
+}
+
+
+def main_regexes(path: Path = _HERE / "main.py") -> Dict[str, "re.Pattern"]:
+    """The re.compile(...) constants of main.py, read with ast (importing main.py loads audio, ASR, TTS)."""
+    out = {}
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if not (isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)
+                and isinstance(node.value, ast.Call) and ast.unparse(node.value.func) == "re.compile"):
+            continue
+        args = node.value.args
+        flags = 0
+        for f in ast.walk(args[1]) if len(args) > 1 else ():
+            if isinstance(f, ast.Attribute):
+                flags |= getattr(re, f.attr)
+        out[node.targets[0].id] = re.compile(ast.literal_eval(args[0]), flags)
+    return out
+
+
+def check_main_regexes(pairs: Optional[List[Tuple[str, str]]] = None) -> List[str]:
+    """Problems where the templates and main.py disagree: a command regex none of its intent's utterances
+    match (main.py recognizes a phrasing the templates lack), or one that matches another intent's utterance."""
+    pairs = pairs if pairs is not None else generate(per_template=12, wrap=False)
+    regexes = main_regexes()
+    problems = [f"{name} not found in main.py" for name in MAIN_REGEX_INTENTS if name not in regexes]
+    for name, intent in MAIN_REGEX_INTENTS.items():
+        rx = regexes.get(name)
+        if rx is None:
+            continue
+        hits = [(t, y) for t, y in pairs if rx.search(normalize(t))]
+        if not any(y == intent for _, y in hits):
+            problems.append(f"{name} ({intent}) matches none of its templates")
+        problems += [f"{name} ({intent}) matches {t!r} labeled {y}" for t, y in hits if y != intent][:3]
+    return problems
+
+
+def _split(pairs: List[Tuple[str, str]], seed: int = 1, frac: float = 0.2):
+    rng = random.Random(seed)
+    test = [p for p in pairs if rng.random() < frac]
+    tset = set(test)
+    return [p for p in pairs if p not in tset], test
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local intent classifier")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("train", help="fit on generated utterances and save the compiled model")
+    sub.add_parser("check", help="check main.py's command regexes against the templates")
+    e = sub.add_parser("eval", help="held-out accuracy and per-call latency")
+    e.add_argument("--llm", action="store_true", help="also time intent_mapper.map_intent_with_llm (needs LLM_GGUF)")
+    pr = sub.add_parser("predict")
+    pr.add_argument("text", nargs="+")
+    args = ap.parse_args()
+
+    if args.cmd in ("train", "check"):
+        problems = check_main_regexes()
+        for p in problems:
+            print(f"[WARN] {p}")
+        if args.cmd == "check":
+            print(f"{len(MAIN_REGEX_INTENTS)} main.py regexes, {len(problems)} problems")
+            sys.exit(1 if problems else 0)
+        t0 = time.perf_counter()
+        model = train()
+        print(f"trained on {len(generate())} utterances, {len(model.vocab)} n-grams in {time.perf_counter() - t0:.2f}s")
+        save(model)
+        print(f"saved -> {MODEL_PATH}")
+        evaluate(model, HELD_OUT, "held-out paraphrases")
+    elif args.cmd == "eval":
+        try:
+            fit, test = _split(generate())
+            evaluate(train(fit), test, "generated, 20% held out of training")
+        except ImportError:
+            print("scikit-learn not installed: skipping the train/test split")
+        model = load()
+        if model is None:
+            sys.exit("no intent model: run `python intent_classifier.py train` (needs scikit-learn)")
+        evaluate(model, HELD_OUT, "held-out paraphrases")
+        if args.llm:
+            from intent_mapper import map_intent_with_llm
+            texts = [t for t, _ in HELD_OUT]
+            map_intent_with_llm(texts[0])                   # model load + warm-up outside the timing
+            outs, lat = _timed(map_intent_with_llm, texts)
+            acc = sum(o.get("intent") == y for o, (_, y) in zip(outs, HELD_OUT)) / len(HELD_OUT)
+            _, clat = _timed(classify_intent, texts, repeat=5)
+            print(f"LLM mapper:  accuracy={acc:.3f}  latency p50={1000 * statistics.median(lat):.0f}ms")
+            print(f"classifier:  {_lat(clat)}  (with slot extraction)")
+            print(f"speed-up ≈ {statistics.median(lat) / statistics.median(clat):.0f}x")
+    else:
+        for t in args.text:
+            print(json.dumps({"text": t, **(classify_intent(t) or {"error": "no model"})}))
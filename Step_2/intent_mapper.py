@@ -1,8 +1,20 @@
-# optional LLM Intent mapper. If want to try set the USE_LLM_INTENTS =1 in the main.py
-from typing import Dict, Any
-import json
-from llm import LLM  
-_llm = LLM()        
+# Intent mapper: the local classifier (intent_classifier.py) answers first; the LLM is asked only
+# when it is unsure or unavailable. Set USE_LLM_INTENTS=0 in main.py to never call the LLM.
+from typing import Dict, Any, Optional
+import json, time
+
+from config import INTENT_CLASSIFIER, INTENT_MIN_CONF, DEBUG
+
+_llm = None
+intent_stats = {"classifier": 0, "llm": 0, "classifier_ms": 0.0, "llm_ms": 0.0}
+
+
+def _get_llm():
+    global _llm
+    if _llm is None:
+        from llm import LLM
+        _llm = LLM()
+    return _llm
 
 INTENT_PROMPT = (
     'You are an intent mapper. Return ONLY compact JSON with this schema: '
@@ -23,7 +35,11 @@ INTENT_PROMPT = (
 )
 
 def map_intent_with_llm(text: str) -> Dict[str, Any]:
-    raw = _llm.chat(text=f'User: "{text}"', system=INTENT_PROMPT)
+    from llm import LLMUnavailable
+    try:
+        raw = _get_llm().classify(f'User: "{text}"', system=INTENT_PROMPT)     # router model, no chat history
+    except LLMUnavailable:
+        return {"intent": "query", "slots": {}, "confidence": "low"}
     try:
         obj = json.loads(raw)
         if not isinstance(obj, dict):
@@ -35,3 +51,26 @@ def map_intent_with_llm(text: str) -> Dict[str, Any]:
     slots = obj.get("slots") if isinstance(obj.get("slots"), dict) else {}
     conf = obj.get("confidence") if obj.get("confidence") in ("low", "medium", "high") else "low"
     return {"intent": intent, "slots": slots, "confidence": conf}
+
+
+def map_intent(text: str, use_llm: bool = True) -> Dict[str, Any]:
+    """Classifier result when its score clears INTENT_MIN_CONF, else the LLM mapper's (if allowed)."""
+    res: Optional[Dict[str, Any]] = None
+    if INTENT_CLASSIFIER:
+        from intent_classifier import classify_intent, load
+        load()                                   # first call reads the model (main trains it at startup); not counted
+        t0 = time.perf_counter()
+        res = classify_intent(text)
+        intent_stats["classifier"] += 1
+        intent_stats["classifier_ms"] += 1000 * (time.perf_counter() - t0)
+        if DEBUG and res: print(f"[DBG] INTENT_CLF={res['intent']} p={res['score']:.2f} SLOTS={res['slots']}")
+        if res and res["score"] >= INTENT_MIN_CONF:
+            return {k: res[k] for k in ("intent", "slots", "confidence")}
+    if not use_llm:
+        return {k: res[k] for k in ("intent", "slots", "confidence")} if res else \
+            {"intent": "query", "slots": {}, "confidence": "low"}
+    t0 = time.perf_counter()
+    out = map_intent_with_llm(text)
+    intent_stats["llm"] += 1
+    intent_stats["llm_ms"] += 1000 * (time.perf_counter() - t0)
+    return out
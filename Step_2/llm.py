@@ -1,14 +1,22 @@
-import os, re, json
-from typing import List, Dict
+import os, re, json, time, threading
+from typing import List, Dict, Iterable, Iterator, Optional
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
-from config import DEBUG
+from config import (
+    DEBUG, FRAGMENT_RULES, FRAGMENT_RULES_MIN_CONF, ROUTER_MAX_TOKENS, LLM_PREFIX_CACHE_SIZE, LLM_PREFIX_CACHE_DIR,
+    TTS_CHUNK_MIN_CHARS, ROUTER_MEMO_PATH, ROUTER_MEMO_SIZE, LLM_ROUTE_DEADLINE_S,
+    LLM_CTX, LLM_THREADS, LLM_BATCH, LLM_ROUTER_CTX, LLM_ROUTER_THREADS, LLM_ROUTER_BATCH,
+    CHAT_HISTORY_TOKENS, CHAT_COMPACTION,
+)
+from fragment_rules import NOISE_RE, FOLLOWUP_PHRASES, extract_fragment_rules
+from prefix_cache import PrefixCache, TTFTStats
+from llm_scheduler import LLMScheduler, DeadlineExceeded
+from router_memo import RouterMemo, model_fingerprint, prompt_hash
 
 load_dotenv(override=True)
 
 MODEL_PATH = os.getenv("LLM_GGUF")
-if not MODEL_PATH or not os.path.exists(MODEL_PATH):
-    raise RuntimeError("Set LLM_GGUF to your .gguf path")
+ROUTER_MODEL_PATH = os.getenv("LLM_GGUF_ROUTER")
 
 MISTRAL_INSTRUCT_TEMPLATE = r"""{{ bos_token }}{% for message in messages %}
 {% if message['role'] == 'system' %}[INST] <<SYS>>
@@ -17,22 +25,36 @@ MISTRAL_INSTRUCT_TEMPLATE = r"""{{ bos_token }}{% for message in messages %}
 {{ message['content'] }}{% elif message['role'] == 'assistant' %}
 {{ message['content'] }}[/INST]{% endif %}{% endfor %}"""
 
-# extractor (3 shot) 
-SYSTEM_EXTRACT = (
-  "You are a precise span extractor. Return ONLY JSON: {\"fragment\": string}.\n"
-  "Goal: extract ONLY the quote fragment to search for (not commands or author names).\n"
-  "Remove command words: new quote, another quote, different quote, find, search, look up, "
-  "complete, finish, continue, tell me, who said, source.\n"
-  "Do NOT include author names or sources. Do NOT include trailing punctuation.\n"
-  "If you cannot find at least 3 meaningful words of the quote, return {\"fragment\": \"\"}.\n"
+# router: fragment + requested fields + next action in one schema-constrained call
+ROUTE_FIELDS = ["said_by", "about_person", "misattributed_to", "disputed_with", "source", "finish_quote", "when"]
+ROUTE_ACTIONS = ["answer_from_memory", "search_db", "clarify", "reset"]
+ROUTE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"type": "string", "enum": ROUTE_ACTIONS},
+        "fields": {"type": "array", "items": {"type": "string", "enum": ROUTE_FIELDS}, "maxItems": 4},
+        "fragment": {"type": "string"},
+    },
+    "required": ["action", "fields", "fragment"],
+}
+
+SYSTEM_ROUTE = (
+  "Route a user turn for a quotes assistant. Return JSON {\"action\", \"fields\", \"fragment\"}.\n"
+  "fragment: ONLY the quote words to search for; no command words (new/another quote, find, search, look up, "
+  "complete, finish, continue, tell me, who said, source), no author names, no trailing punctuation. "
+  "Use \"\" if there are fewer than 3 quote words.\n"
+  "fields: what the user asks about the quote (said_by, about_person, misattributed_to, disputed_with, source, "
+  "finish_quote, when); [] if unclear.\n"
+  "action: reset if they ask to reset/clear/start over; search_db if they give a fragment or ask to find/complete a "
+  "specific quote; answer_from_memory if has_context=true and they ask a follow-up about this/that/the quote/it; "
+  "clarify otherwise (e.g. 'who said this?' with has_context=false).\n"
   "\nExamples:\n"
-  "Q: Find the quote: Albert Einstein was almost considered as a superhuman.\n"
-  "A: {\"fragment\": \"Albert Einstein was almost considered as a superhuman\"}\n"
-  "Q: Complete this new quote as an eminent pioneer in the realm of high.\n"
-  "A: {\"fragment\": \"as an eminent pioneer in the realm of high\"}\n"
-  "Q: Who said this? \"Two things are infinite...\"\n"
-  "A: {\"fragment\": \"Two things are infinite\"}\n"
-  "No extra text."
+  "has_context=false user: Find the quote: Albert Einstein was almost considered as a superhuman.\n"
+  "{\"action\": \"search_db\", \"fields\": [], \"fragment\": \"Albert Einstein was almost considered as a superhuman\"}\n"
+  "has_context=false user: Complete this new quote as an eminent pioneer in the realm of high.\n"
+  "{\"action\": \"search_db\", \"fields\": [\"finish_quote\"], \"fragment\": \"as an eminent pioneer in the realm of high\"}\n"
+  "has_context=true user: who said it and where is it from?\n"
+  "{\"action\": \"answer_from_memory\", \"fields\": [\"said_by\", \"source\"], \"fragment\": \"\"}"
 )
 
 SYSTEM_ANSWER = (
@@ -41,27 +63,11 @@ SYSTEM_ANSWER = (
   "If multiple matches exist, show the best 1–3 with author and source. Do not invent authors or sources."
 )
 
-SYSTEM_REQUEST_FIELDS = (
-  "You map a user question about a quote into a list of requested fields.\n"
-  "Return ONLY JSON like: {\"fields\": [ ... ]}\n"
-  "Valid fields:\n"
-  "  - \"said_by\"\n  - \"about_person\"\n  - \"misattributed_to\"\n  - \"disputed_with\"\n  - \"source\"\n  - \"finish_quote\"\n  - \"when\"\n"
-  "Rules:\n1) Use plural intent if user asks for more than one thing.\n2) If unclear, return an empty list.\nNo extra text."
-)
-
-SYSTEM_DECIDE = (
-  "Decide the next action for a quotes assistant.\n"
-  "Return ONLY JSON:{\"action\": one_of[\"answer_from_memory\",\"search_db\",\"clarify\",\"reset\"], \"query\": string}\n"
-  "Definitions:\n- answer_from_memory: user asks about the SAME quote and we already have context.\n"
-  "- search_db: user mentions a NEW quote or gives a fragment; provide a minimal search query.\n"
-  "- clarify: the request is unclear; ask the user to provide a quote fragment.\n"
-  "- reset: user asks to reset/clear/start over.\n"
-  "Rules:\n1) has_context=true means we already have the last quote facts.\n"
-  "2) If user says reset/clear/start over -> action=reset.\n"
-  "3) If has_context=true AND the user asks follow-ups (who/about/source/finish/disputed/when) possibly with 'this/that/the quote/it' -> action=answer_from_memory.\n"
-  "4) If has_context=false and the user asks a follow-up like 'who said this?' with no quote given -> action=clarify.\n"
-  "5) If the user provides a quote fragment or asks to find/complete a specific quote -> action=search_db with a minimal query (only the fragment words).\n"
-  "6) No extra text."
+SYSTEM_FACTS = (
+  "You are a quotes assistant.\n"
+  "Answer ONLY from the facts provided below.\n"
+  "Be concise but do NOT invent missing text.\n"
+  "If there is a quote text, prefer outputting the quote verbatim."
 )
 
 def _json_only(s: str) -> dict:
@@ -72,51 +78,358 @@ def _json_only(s: str) -> dict:
             pass
     return {}
 
-from llama_cpp import Llama  
-_llama = Llama(
-    model_path=MODEL_PATH,
-    n_ctx=4096,
-    n_threads=max(1, (os.cpu_count() or 8) - 2),
-    n_batch=256,
-    verbose=False,
-    chat_template=MISTRAL_INSTRUCT_TEMPLATE,
-    seed=0,
-)
+# Models load on background threads (start_loading); only _complete() waits for them.
+# Each model has its own scheduler thread, the only thread that touches it once loaded.
+# Router calls (route, intent) go to the small LLM_GGUF_ROUTER model when set, everything else to LLM_GGUF.
+ROUTER_KINDS = {"route", "intent"}
+_TTFT = TTFTStats()
+
+class LLMUnavailable(RuntimeError):
+    """The model failed to load (missing GGUF, bad path, llama_cpp not installed)."""
+
+class _ModelSlot:
+    def __init__(self, name: str, path: Optional[str], env: str, warm: List[str], chat_template: Optional[str] = None,
+                 n_ctx: int = 4096, n_threads: int = 4, n_batch: int = 256) -> None:
+        self.name, self.path, self.env, self.warm = name, path, env, warm
+        self.llama_kwargs = dict(n_ctx=n_ctx, n_threads=n_threads, n_batch=n_batch, chat_template=chat_template)
+        self.llama = None
+        self.prefix: Optional[PrefixCache] = None
+        self.error: Optional[Exception] = None
+        self.sched = LLMScheduler(name=f"llm-{name}")
+        self.timings = {"load_s": None, "prefix_warm_s": None, "wait_s": 0.0}
+        self._ready = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name=f"llm-load-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _load(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            if not self.path or not os.path.exists(self.path):
+                raise RuntimeError(f"Set {self.env} to your .gguf path")
+            from llama_cpp import Llama
+            self.llama = Llama(model_path=self.path, verbose=False, seed=0, **self.llama_kwargs)
+            if LLM_PREFIX_CACHE_SIZE > 0:
+                self.prefix = PrefixCache(self.llama, self.path, LLM_PREFIX_CACHE_SIZE, LLM_PREFIX_CACHE_DIR)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.timings["load_s"] = time.perf_counter() - t0
+            self._ready.set()
+        if DEBUG: print(f"[DBG] LLM[{self.name}] loaded in {self.timings['load_s']:.2f}s" + (f" (error: {self.error})" if self.error else ""))
+
+        if self.error is None:
+            t1 = time.perf_counter()
+            try:
+                self.warm_prefixes()     # system-prompt KV states, so the first call skips their prefill
+            except Exception as e:
+                if DEBUG: print(f"[DBG] LLM[{self.name}] prefix warm-up failed: {e}")
+            self.timings["prefix_warm_s"] = time.perf_counter() - t1
+
+    def ready(self) -> bool:
+        return self._ready.is_set() and self.error is None
+
+    def get(self):
+        """The loaded Llama; blocks until the background load finishes, raises if it failed."""
+        if not self._ready.is_set():
+            self.start()
+            t0 = time.perf_counter()
+            self._ready.wait()
+            self.timings["wait_s"] += time.perf_counter() - t0
+        if self.error is not None:
+            raise LLMUnavailable(f"LLM unavailable: {self.error}")
+        return self.llama
+
+    def warm_prefixes(self, systems: List[str] | None = None) -> None:
+        """Evaluate the fixed system prompts once (or load them from LLM_PREFIX_CACHE_DIR)."""
+        if self.prefix is None:
+            return
+        llama = self.get()
+        for system in systems or self.warm:
+            if not self.prefix.has(system):
+                self.sched.call("warmup", lambda s=system: self.prefix.prime(s, lambda: _prefill(llama, s)),
+                                PRIORITY["warmup"])
+
+def _router_slot(path: Optional[str]) -> "_ModelSlot":
+    return _ModelSlot("router", path, "LLM_GGUF_ROUTER", [SYSTEM_ROUTE], chat_template=None,   # the GGUF's own template
+                      n_ctx=LLM_ROUTER_CTX, n_threads=LLM_ROUTER_THREADS, n_batch=LLM_ROUTER_BATCH)
+
+_MAIN = _ModelSlot("main", MODEL_PATH, "LLM_GGUF",
+                   [SYSTEM_FACTS, SYSTEM_ANSWER] if ROUTER_MODEL_PATH else [SYSTEM_ROUTE, SYSTEM_FACTS, SYSTEM_ANSWER],
+                   chat_template=MISTRAL_INSTRUCT_TEMPLATE, n_ctx=LLM_CTX, n_threads=LLM_THREADS, n_batch=LLM_BATCH)
+_ROUTER = _router_slot(ROUTER_MODEL_PATH) if ROUTER_MODEL_PATH else _MAIN
+
+def _slot_for(kind: str) -> "_ModelSlot":
+    return _ROUTER if kind in ROUTER_KINDS else _MAIN
+
+def start_loading() -> None:
+    """Begin loading the model(s) in the background (idempotent); the small router model first."""
+    _ROUTER.start()
+    _MAIN.start()
+
+def set_router_model(path: Optional[str]) -> None:
+    """Point router calls at another GGUF (None/"" = the main model); used by bench_llm.py."""
+    global _ROUTER, _MEMO
+    _ROUTER = _router_slot(path) if path and path != _MAIN.path else _MAIN
+    _MEMO = None
+    _ROUTER.start()
+
+def llm_ready() -> bool:
+    return _MAIN.ready()
+
+def _model():
+    """The main Llama; blocks until it is loaded."""
+    return _MAIN.get()
+
+def startup_timings() -> dict:
+    """Model load / prefix warm-up seconds (None until done) and total time callers spent waiting."""
+    out = {"llm_load_s": _MAIN.timings["load_s"], "llm_prefix_warm_s": _MAIN.timings["prefix_warm_s"],
+           "llm_wait_s": _MAIN.timings["wait_s"], "llm_ready": _MAIN.ready(),
+           "llm_error": str(_MAIN.error) if _MAIN.error else None}
+    if _ROUTER is not _MAIN:
+        out.update({"router_load_s": _ROUTER.timings["load_s"], "router_wait_s": _ROUTER.timings["wait_s"],
+                    "router_ready": _ROUTER.ready(), "router_error": str(_ROUTER.error) if _ROUTER.error else None})
+    return out
+
+# priority per call kind: short router calls jump ahead of long answer generations
+PRIORITY = {"route": 0, "intent": 0, "facts": 1, "answer": 2, "chat": 2, "warmup": 3}
+
+def _prefill(llama, system: str) -> None:
+    """Evaluate only the system prompt (empty user turn, one token), the part every call with it shares."""
+    llama.create_chat_completion(messages=[{"role": "system", "content": system}, {"role": "user", "content": ""}],
+                                 temperature=0.0, max_tokens=1)
+
+def _generate(slot: "_ModelSlot", kind: str, messages: List[Dict[str, str]], t_submit: float, kwargs: dict) -> Iterator[str]:
+    """Runs on the slot's scheduler thread, which owns the model."""
+    system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+    llama = slot.get()
+    if slot.prefix is not None and system and not slot.prefix.restore(system):
+        slot.prefix.prime(system, lambda: _prefill(llama, system))
+    ttft = None
+    try:
+        for ch in llama.create_chat_completion(messages=messages, stream=True, **kwargs):
+            delta = (ch["choices"][0].get("delta") or {}).get("content") or ""
+            if delta:
+                if ttft is None:
+                    ttft = time.perf_counter() - t_submit
+                yield delta
+    finally:
+        total = time.perf_counter() - t_submit
+        _TTFT.add(kind, ttft if ttft is not None else total, total)
+        if DEBUG: print(f"[DBG] LLM[{slot.name}] {kind} ttft={1000 * (ttft or total):.0f} ms total={1000 * total:.0f} ms")
+
+def _complete_stream(kind: str, messages: List[Dict[str, str]], deadline_s: Optional[float] = None,
+                     slot: Optional["_ModelSlot"] = None, **kwargs) -> Iterator[str]:
+    """Text deltas as the model produces them. Raises DeadlineExceeded if the request sat queued past deadline_s."""
+    slot = slot or _slot_for(kind)
+    slot.get()                  # surface a failed load in the caller, not on the scheduler thread
+    t_submit = time.perf_counter()
+    return slot.sched.stream(kind, lambda: _generate(slot, kind, messages, t_submit, kwargs),
+                             PRIORITY.get(kind, 2), deadline_s)
+
+def _complete(kind: str, messages: List[Dict[str, str]], deadline_s: Optional[float] = None,
+              slot: Optional["_ModelSlot"] = None, **kwargs) -> str:
+    return "".join(_complete_stream(kind, messages, deadline_s, slot, **kwargs)).strip()
+
+# sentence-sized chunks for TTS: cut after . ! ? … (plus closing quotes) once a chunk is long enough
+_SENT_END_RE = re.compile(r'[.!?…]+["”\')\]]*\s+|\n+')
+# case-sensitive on purpose: "plan B." and "said no." end sentences; "J.R.R." (two+ initials) does not
+_ABBREV_RE = re.compile(r'(?:\b(?:Mr|Mrs|Ms|Dr|St|Jr|Sr|Prof|vs|e\.g|i\.e|etc)|\b(?:[A-Z]\.){1,}[A-Z])\.\s+$')
+
+def sentence_chunks(deltas: Iterable[str], min_chars: int = TTS_CHUNK_MIN_CHARS) -> Iterator[str]:
+    buf = ""
+    for d in deltas:
+        buf += d
+        start = 0
+        for m in _SENT_END_RE.finditer(buf):
+            if m.end() - start < min_chars or _ABBREV_RE.search(buf[start:m.end()]):
+                continue
+            chunk = buf[start:m.end()].strip()
+            start = m.end()
+            if chunk:
+                yield chunk
+        buf = buf[start:]
+    if buf.strip():
+        yield buf.strip()
+
+def warm_prefixes() -> None:
+    _ROUTER.warm_prefixes()
+    if _MAIN is not _ROUTER:
+        _MAIN.warm_prefixes()
+
+# disk memo for the temperature-0 route() call; usable before the model has finished loading
+_MEMO = None
+_MEMO_LOCK = threading.Lock()
+
+def _router_memo():
+    global _MEMO
+    if not ROUTER_MEMO_PATH or not _ROUTER.path:
+        return None
+    with _MEMO_LOCK:
+        if _MEMO is None:
+            try:
+                _MEMO = RouterMemo(ROUTER_MEMO_PATH, model_fingerprint(_ROUTER.path),
+                                   prompt_hash(SYSTEM_ROUTE, ROUTE_SCHEMA, ROUTER_MAX_TOKENS), max_items=ROUTER_MEMO_SIZE)
+            except Exception as e:
+                if DEBUG: print(f"[DBG] router memo disabled: {e}")
+                return None
+        return _MEMO
+
+def llm_metrics() -> dict:
+    slots = [_MAIN] if _ROUTER is _MAIN else [_ROUTER, _MAIN]
+    return {"models": {sl.name: {"path": sl.path, "prefix_cache": sl.prefix.stats() if sl.prefix is not None else None,
+                                 "scheduler": sl.sched.stats()} for sl in slots},
+            "ttft": _TTFT.summary(), "router_memo": _MEMO.stats() if _MEMO is not None else None}
+
+def count_tokens(text: str) -> int:
+    """Main-model token count once it is loaded; ~4 chars/token before that."""
+    if not text:
+        return 0
+    if _MAIN.ready():
+        try:
+            return len(_MAIN.llama.tokenize(text.encode("utf-8"), add_bos=False))
+        except Exception:
+            pass
+    return len(text) // 4 + 1
+
+_MSG_OVERHEAD = 4      # role/template tokens per message
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Head of text that fits in max_tokens, cut at a word boundary."""
+    n = count_tokens(text)
+    while text and n > max_tokens:
+        head = text[:int(len(text) * max_tokens / n * 0.9)]
+        text = head.rsplit(" ", 1)[0] if " " in head else head
+        n = count_tokens(text)
+    return text
 
 @dataclass
 class ChatState:
+    """Chat history kept under a token budget; the oldest turns are evicted or folded into a short summary."""
     history: List[Dict[str, str]] = field(default_factory=list)
+    budget_tokens: int = CHAT_HISTORY_TOKENS
+    mode: str = CHAT_COMPACTION            # evict | summarize
+    summary: str = ""
+    tokens: List[int] = field(default_factory=list, repr=False)
+    stats: Dict[str, int] = field(default_factory=lambda: {"calls": 0, "replayed_tokens": 0, "max_replayed": 0,
+                                                           "compactions": 0, "evicted_msgs": 0,
+                                                           "truncated_msgs": 0})
+
     def add(self, role: str, content: str) -> None:
         self.history.append({"role": role, "content": content})
+        self.tokens.append(count_tokens(content) + _MSG_OVERHEAD)
+        self._compact(self.budget_tokens)
+
     def clear(self) -> None:
-        self.history.clear()
-
-def _as_messages(system: str, user: str, history: List[Dict[str,str]] | None = None):
-    msgs = [{"role": "system", "content": system}]
-    if history:
-        msgs += history
-    msgs.append({"role": "user", "content": user})
-    return msgs
-
-# noise words to strip after extraction
-NOISE_RE = re.compile(
-    r'\b(new|another|different)\s+quote\b|'
-    r'\b(find|search|look up|complete|finish|continue|tell me|who said|source)\b[: ]?',
-    re.I,
-)
+        self.history.clear(); self.tokens.clear()
+        self.summary = ""
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens) + (count_tokens(self.summary) + 2 * _MSG_OVERHEAD if self.summary else 0)
+
+    def _compact(self, budget: int) -> None:
+        if self.total_tokens <= budget:
+            return
+        dropped = []
+        # oldest first, a user/assistant pair at a time; the latest exchange always stays
+        while len(self.history) > 2 and self.total_tokens > budget:
+            n = 2 if len(self.history) > 1 and self.history[1]["role"] == "assistant" else 1
+            dropped += self.history[:n]
+            del self.history[:n], self.tokens[:n]
+            if self.mode == "summarize":
+                self.summary = self._fold(self.summary, dropped[-n:], max(48, budget // 4))
+        if self.total_tokens > budget:
+            self.summary = ""
+        # still over: the latest exchange alone is too big, so trim its longest message
+        truncated = 0
+        while self.total_tokens > budget and self.history:
+            i = max(range(len(self.tokens)), key=self.tokens.__getitem__)
+            room = self.tokens[i] - _MSG_OVERHEAD - (self.total_tokens - budget)
+            if room <= 0:
+                dropped.append(self.history.pop(i)); self.tokens.pop(i)
+                continue
+            self.history[i] = {**self.history[i], "content": _truncate(self.history[i]["content"], room)}
+            self.tokens[i] = count_tokens(self.history[i]["content"]) + _MSG_OVERHEAD
+            truncated += 1
+        if not dropped and not truncated:
+            return
+        self.stats["compactions"] += 1
+        self.stats["evicted_msgs"] += len(dropped)
+        self.stats["truncated_msgs"] += truncated
+        if DEBUG: print(f"[DBG] CHAT compacted: dropped {len(dropped)} msgs, truncated {truncated}, now {self.total_tokens} tokens")
+
+    @staticmethod
+    def _fold(summary: str, msgs: List[Dict[str, str]], max_tokens: int) -> str:
+        """Extractive summary: first sentence of each dropped message, oldest lines trimmed to fit."""
+        lines = [l for l in summary.split("\n") if l]
+        for m in msgs:
+            first = re.split(r"(?<=[.!?])\s", m["content"].strip(), maxsplit=1)[0][:160]
+            lines.append(f"{m['role']}: {first}")
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def messages(self, system: str, user: str, reserve: int = 256) -> List[Dict[str, str]]:
+        """Prompt for the next call; compacts first so system + history + user + reserve fits the context."""
+        room = LLM_CTX - reserve - count_tokens(system) - 2 * _MSG_OVERHEAD
+        if count_tokens(user) > room:
+            user = _truncate(user, max(0, room))       # an oversized message can't push past n_ctx
+        fixed = count_tokens(system) + count_tokens(user) + 2 * _MSG_OVERHEAD
+        self._compact(max(0, min(self.budget_tokens, LLM_CTX - reserve - fixed)))
+        msgs = [{"role": "system", "content": system}]
+        if self.summary:
+            # as a leading exchange, so the system prompt (and its cached KV state) stays fixed
+            msgs += [{"role": "user", "content": f"(Summary of our earlier conversation)\n{self.summary}"},
+                     {"role": "assistant", "content": "Noted."}]
+        msgs += self.history
+        msgs.append({"role": "user", "content": user})
+        replayed = fixed + self.total_tokens
+        self.stats["calls"] += 1
+        self.stats["replayed_tokens"] += replayed
+        self.stats["max_replayed"] = max(self.stats["max_replayed"], replayed)
+        return msgs
 
 class LLM:
     def __init__(self):
-        self.chat_state = ChatState()
+        start_loading()
+        self.chat_states: Dict[str, ChatState] = {}       # per session
+        # extract_fragment routing: turns served by the rules vs. the model, and model time spent
+        self.fragment_stats = {"rules": 0, "followup": 0, "llm": 0, "llm_s": 0.0}
+        # route(): one constrained call per turn shared by the three routers
+        self.route_stats = {"calls": 0, "memo_hits": 0, "disk_memo_hits": 0, "parse_failures": 0, "deadline_drops": 0,
+                            "unavailable": 0}
+        self._route_memo = None
+
+    def fragment_summary(self) -> dict:
+        """Counters plus the share of turns that skipped the model and the estimated time saved."""
+        st = dict(self.fragment_stats)
+        total = st["rules"] + st["followup"] + st["llm"]
+        skipped = st["rules"] + st["followup"]
+        mean_llm = st["llm_s"] / st["llm"] if st["llm"] else 0.0
+        st.update({"turns": total, "skip_rate": skipped / total if total else 0.0,
+                   "mean_llm_ms": 1000 * mean_llm, "saved_ms_est": 1000 * mean_llm * skipped})
+        return st
 
     def _chat_complete(self, system: str, user: str, max_tokens: int = 128) -> str:
-        out = _llama.create_chat_completion(
-            messages=[{"role": "system", "content": system},
-                      {"role": "user", "content": user}],
-            temperature=0.2,
-            max_tokens=max_tokens,
-        )
-        return (out["choices"][0]["message"]["content"] or "").strip()
+        return _complete("facts", [{"role": "system", "content": system},
+                                   {"role": "user", "content": user}],
+                         temperature=0.2, max_tokens=max_tokens)
+
+    def _clean_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """_clean_answer applied to the first sentence of a streamed reply."""
+        first = True
+        for c in chunks:
+            if first:
+                first = False
+                c = self._clean_answer(c)
+            if c:
+                yield c
 
     @staticmethod
     def _clean_answer(s: str) -> str:
@@ -134,53 +447,101 @@ class LLM:
         return s
 
     # Routers
-    def extract_fragment(self, question: str) -> str:
+    def extract_fragment(self, question: str, has_context: bool = False) -> str:
         qlow = (question or "").lower()
-        if any(phrase in qlow for phrase in ["who said this", "who said that", "who said it", "who wrote this"]):    #follow-sup
+        if any(phrase in qlow for phrase in FOLLOWUP_PHRASES):    #follow-sup
+            self.fragment_stats["followup"] += 1
             if DEBUG: 
                 print(f"[DBG] FRAGMENT skipped for follow-up: {question!r}")
             return ""
 
-        out = _llama.create_chat_completion(
-            messages=[{"role": "system", "content": SYSTEM_EXTRACT},
-                      {"role": "user", "content": question}],
-            temperature=0.0, max_tokens=64,
-        )
-        data = _json_only(out["choices"][0]["message"]["content"])
+        # deterministic fast path; the model only sees turns the rules aren't sure about
+        if FRAGMENT_RULES:
+            frag, conf = extract_fragment_rules(question)
+            if conf >= FRAGMENT_RULES_MIN_CONF:
+                self.fragment_stats["rules"] += 1
+                if DEBUG: print(f"[DBG] FRAGMENT(rules, conf={conf:.2f})={frag!r}")
+                return frag
+
+        t0 = time.perf_counter()
+        frag = self.route(question, has_context)["fragment"]
+        self.fragment_stats["llm"] += 1
+        self.fragment_stats["llm_s"] += time.perf_counter() - t0
+        return frag
+
+    def extract_requested_fields(self, question: str, has_context: bool = False) -> list[str]:
+        return list(self.route(question, has_context)["fields"])
+
+    def decide_action(self, user_text: str, has_context: bool) -> dict:
+        r = self.route(user_text, has_context)
+        if DEBUG: print(f"[DBG] DECIDE_ACTION has_context={has_context} action={r['action']} query={r['fragment']!r}")
+        return {"action": r["action"], "query": r["fragment"]}
+
+    @staticmethod
+    def _route_fallback(user_text: str) -> dict:
+        """No model answer: search whatever fragment the rules found (even if unsure), else ask for one."""
+        frag, _conf = extract_fragment_rules(user_text)
+        return {"fragment": frag, "fields": [], "action": "search_db" if frag else "clarify"}
+
+    def route(self, user_text: str, has_context: bool = False) -> dict:
+        """fragment, fields and action from one constrained completion; memoized for the current turn."""
+        key = (user_text, bool(has_context))
+        if self._route_memo is not None and self._route_memo[0] == key:
+            self.route_stats["memo_hits"] += 1
+            return self._route_memo[1]
+
+        memo = _router_memo()
+        mkey = memo.key(user_text, bool(has_context)) if memo is not None else None
+        if memo is not None:
+            hit = memo.get(mkey)
+            if hit is not None:
+                self.route_stats["disk_memo_hits"] += 1
+                self._route_memo = (key, hit)
+                if DEBUG: print(f"[DBG] ROUTE (memo) -> {hit}")
+                return hit
+
+        prompt = f"has_context={str(bool(has_context)).lower()} user: {user_text}"
+        t0 = time.perf_counter()
+        try:
+            raw = _complete("route", [{"role": "system", "content": SYSTEM_ROUTE},
+                                      {"role": "user", "content": prompt}],
+                            deadline_s=LLM_ROUTE_DEADLINE_S or None,
+                            temperature=0.0, max_tokens=ROUTER_MAX_TOKENS,
+                            response_format={"type": "json_object", "schema": ROUTE_SCHEMA})   # grammar-constrained decoding
+        except DeadlineExceeded:
+            # queued behind long generations: don't answer late
+            self.route_stats["deadline_drops"] += 1
+            return self._route_fallback(user_text)
+        except LLMUnavailable as e:
+            self.route_stats["unavailable"] += 1
+            if DEBUG: print(f"[DBG] ROUTE skipped: {e}")
+            return self._route_fallback(user_text)
+        dt = time.perf_counter() - t0
+        self.route_stats["calls"] += 1
+        raw_ok = True
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:       # only if max_tokens cut the object short
+            self.route_stats["parse_failures"] += 1
+            raw_ok = False                 # don't memoize a truncated answer
+            data = _json_only(raw)
+
         frag = (data.get("fragment") or "").strip()
         frag = frag.strip('“”"\' .,:;!?-')        # strip punct
         frag = NOISE_RE.sub("", frag).strip('“”"\' .,:;!?-')     # strip command/noise words
         tokens = re.findall(r"\w+", frag)
         frag = frag if len(tokens) >= 3 else ""                 # require a minimum frag len >=3
-        if DEBUG: print(f"[DBG] FRAGMENT={frag!r}")
-        return frag
-
-    def extract_requested_fields(self, question: str) -> list[str]:
-        out = _llama.create_chat_completion(
-            messages=[{"role": "system", "content": SYSTEM_REQUEST_FIELDS},
-                      {"role": "user", "content": question}],
-            temperature=0.0, max_tokens=64,
-        )
-        data = _json_only(out["choices"][0]["message"]["content"])
-        fields = data.get("fields") or []
-        allowed = {"said_by","about_person","misattributed_to",
-                   "disputed_with","source","finish_quote","when"}
-        return [f for f in (x.strip() for x in fields) if f in allowed]
-
-    def decide_action(self, user_text: str, has_context: bool) -> dict:
-        prompt = f"has_context={str(has_context).lower()}\nuser: {user_text}"
-        out = _llama.create_chat_completion(
-            messages=[{"role": "system", "content": SYSTEM_DECIDE},
-                      {"role": "user", "content": prompt}],
-            temperature=0.0, max_tokens=96,
-        )
-        data = _json_only(out["choices"][0]["message"]["content"])
+        fields = [f for f in (str(x).strip() for x in data.get("fields") or []) if f in ROUTE_FIELDS]
         action = (data.get("action") or "").strip()
-        if action not in {"answer_from_memory","search_db","clarify","reset"}:
+        if action not in ROUTE_ACTIONS:
             action = "clarify"
-        query = (data.get("query") or "").strip()
-        if DEBUG: print(f"[DBG] DECIDE_ACTION has_context={has_context} action={action} query={query!r}")
-        return {"action": action, "query": query}
+
+        result = {"fragment": frag, "fields": fields, "action": action}
+        self._route_memo = (key, result)
+        if memo is not None and raw_ok:
+            memo.put(mkey, result)
+        if DEBUG: print(f"[DBG] ROUTE {1000 * dt:.0f} ms -> {result}")
+        return result
 
     # Draft Response
     def answer_from_fields(self, question: str, facts: dict, fields: list[str], labeled: bool = True) -> str:
@@ -241,7 +602,8 @@ class LLM:
 
         return " ".join(p for p in parts if p)
 
-    def answer_from_data(self, question: str, results: list[dict]) -> str:
+    def answer_from_data(self, question: str, results: list[dict], stream: bool = False):
+        """Reply text, or an iterator of sentence chunks when stream=True."""
         lines = []
         for i, r in enumerate(results[:5], 1):
             q = (r.get("quote") or "").replace("\n", " ").strip()
@@ -260,14 +622,22 @@ class LLM:
             "- Return a short, natural answer (1–3 sentences). Include author and source when present."
         )
 
-        out = _llama.create_chat_completion(
-            messages=[{"role": "system", "content": SYSTEM_ANSWER},
-                      {"role": "user", "content": prompt}],
-            temperature=0.4, max_tokens=220,
-        )
-        return out["choices"][0]["message"]["content"].strip()
-
-    def answer_from_facts(self, question: str, facts: dict) -> str:
+        msgs = [{"role": "system", "content": SYSTEM_ANSWER},
+                {"role": "user", "content": prompt}]
+        if stream:
+            return sentence_chunks(_complete_stream("answer", msgs, temperature=0.4, max_tokens=220))
+        return _complete("answer", msgs, temperature=0.4, max_tokens=220)
+
+    def answer_from_facts_stream(self, question: str, facts: dict) -> Iterator[str]:
+        """Template answers come out as one chunk; the LLM rephrase streams sentence by sentence."""
+        res = self.answer_from_facts(question, facts, stream=True)
+        if isinstance(res, str):
+            if res:
+                yield res
+        else:
+            yield from res
+
+    def answer_from_facts(self, question: str, facts: dict, stream: bool = False):
         import re
 
         q = (question or "").strip().lower()
@@ -342,24 +712,58 @@ class LLM:
         # LLM rephrase
         rel_lines = [f"- {p.get('rel')}: {p.get('name')}" for p in people if p.get("name")]
         rel_block = "\n".join(rel_lines) if rel_lines else "(none)"
-        system = (
-            "You are a quotes assistant.\n"
-            "Answer ONLY from the facts provided below.\n"
-            "Be concise but do NOT invent missing text.\n"
-            "If there is a quote text, prefer outputting the quote verbatim."
-        )
+        system = SYSTEM_FACTS
         context = f"Quote: {quote}\nSource: {src}\nConnections:\n{rel_block}\n"
         user = f"{context}\nUser question: {question}\nYour answer:"
-        raw = self._chat_complete(system, user, max_tokens=128)
+        try:
+            if stream:
+                msgs = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+                return self._clean_stream(sentence_chunks(_complete_stream("facts", msgs, temperature=0.2, max_tokens=128)))
+            raw = self._chat_complete(system, user, max_tokens=128)
+        except (LLMUnavailable, DeadlineExceeded) as e:
+            if DEBUG: print(f"[DBG] FACTS rephrase skipped: {e}")
+            # plain template from whatever the row has
+            parts = [f"Said by {author}." if author else "", f"About {_join(about_p)}." if about_p else "",
+                     f"Source: {src}." if src else ""]
+            return " ".join(p for p in parts if p) or "I don't have more on that one."
         return self._clean_answer(raw)
 
+    def classify(self, text: str, system: str, max_tokens: int = 96) -> str:
+        """Short temperature-0 call on the router model, outside the chat history (intent mapping)."""
+        return _complete("intent", [{"role": "system", "content": system}, {"role": "user", "content": text}],
+                         temperature=0.0, max_tokens=max_tokens)
+
     # ---------- Simple chat ----------
-    def chat(self, text: str, system: str = "You are helpful.") -> str:
-        out = _llama.create_chat_completion(
-            messages=_as_messages(system, text, self.chat_state.history),
-            temperature=0.6,
-            max_tokens=256,
-        )
-        reply = out["choices"][0]["message"]["content"].strip()
-        self.chat_state.add("user", text); self.chat_state.add("assistant", reply)
+    def chat_state_for(self, session_id: str = "default") -> ChatState:
+        if session_id not in self.chat_states:
+            self.chat_states[session_id] = ChatState()
+        return self.chat_states[session_id]
+
+    @property
+    def chat_state(self) -> ChatState:
+        return self.chat_state_for("default")
+
+    def chat_metrics(self) -> dict:
+        """Per session: history tokens, calls, mean/max tokens replayed per call, compactions."""
+        out = {}
+        for sid, st in self.chat_states.items():
+            calls = st.stats["calls"]
+            out[sid] = {**st.stats, "history_tokens": st.total_tokens, "messages": len(st.history),
+                        "mean_replayed": st.stats["replayed_tokens"] / calls if calls else 0.0}
+        return out
+
+    def chat(self, text: str, system: str = "You are helpful.", session_id: str = "default") -> str:
+        state = self.chat_state_for(session_id)
+        reply = _complete("chat", state.messages(system, text, reserve=256),
+                          temperature=0.6, max_tokens=256)
+        state.add("user", text); state.add("assistant", reply)
         return reply
+
+    def chat_stream(self, text: str, system: str = "You are helpful.", session_id: str = "default") -> Iterator[str]:
+        state = self.chat_state_for(session_id)
+        parts = []
+        for chunk in sentence_chunks(_complete_stream("chat", state.messages(system, text, reserve=256),
+                                                      temperature=0.6, max_tokens=256)):
+            parts.append(chunk)
+            yield chunk
+        state.add("user", text); state.add("assistant", " ".join(parts))
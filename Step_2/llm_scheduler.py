@@ -0,0 +1,145 @@
+# Single worker thread that owns the llama model and serves completions from any number of callers.
+# Lower priority value runs first (short router calls before long answers); FIFO within a priority.
+# Requests whose deadline has passed by the time they reach the front are dropped, not computed.
+import itertools, queue, threading, time
+from collections import deque
+from typing import Callable, Optional, Dict, Any, Iterator, Iterable
+
+from config import DEBUG
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request waited past its deadline and was dropped unserved."""
+
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class _Request:
+    def __init__(self, kind: str, fn: Callable, priority: int, deadline: Optional[float], stream: bool) -> None:
+        self.kind, self.fn, self.priority, self.deadline = kind, fn, priority, deadline
+        self.enqueued = time.perf_counter()
+        self.out: "queue.Queue[Any]" = queue.Queue()       # result, stream items, _END or _Failure
+        self.stream = stream
+        self.cancelled = False
+
+
+class LLMScheduler:
+    def __init__(self, name: str = "llm-scheduler", keep: int = 512) -> None:
+        self.name = name
+        self._q: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._kinds: Dict[str, Dict[str, Any]] = {}
+        self._keep = keep
+        self.busy_kind: Optional[str] = None
+
+    # submit
+    def _ensure_worker(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _submit(self, kind: str, fn: Callable, priority: int, deadline_s: Optional[float], stream: bool) -> _Request:
+        deadline = time.perf_counter() + deadline_s if deadline_s else None
+        req = _Request(kind, fn, priority, deadline, stream)
+        d = self._kind(kind)
+        with self._stats_lock:
+            d["submitted"] += 1
+        self._ensure_worker()
+        self._q.put((priority, next(self._seq), req))
+        return req
+
+    def call(self, kind: str, fn: Callable[[], Any], priority: int = 1, deadline_s: Optional[float] = None) -> Any:
+        """Run fn() on the model thread and wait for its result."""
+        item = self._submit(kind, fn, priority, deadline_s, stream=False).out.get()
+        if isinstance(item, _Failure):
+            raise item.exc
+        return item
+
+    def stream(self, kind: str, fn: Callable[[], Iterable[Any]], priority: int = 2,
+               deadline_s: Optional[float] = None) -> Iterator[Any]:
+        """Items of fn()'s iterator as the model thread produces them; closing early stops the generation."""
+        req = self._submit(kind, fn, priority, deadline_s, stream=True)
+        try:
+            while True:
+                item = req.out.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.exc
+                yield item
+        finally:
+            req.cancelled = True
+
+    # worker
+    def _worker(self) -> None:
+        while True:
+            _, _, req = self._q.get()
+            started = time.perf_counter()
+            wait = started - req.enqueued
+            if req.deadline is not None and started > req.deadline:
+                self._record(req.kind, "dropped", wait)
+                req.out.put(_Failure(DeadlineExceeded(f"{req.kind} request waited {wait:.2f}s past its deadline")))
+                if DEBUG: print(f"[DBG] LLM scheduler dropped stale {req.kind} request (waited {wait:.2f}s)")
+                continue
+
+            self.busy_kind = req.kind
+            outcome = "completed"
+            try:
+                if req.stream:
+                    it = iter(req.fn())
+                    try:
+                        for item in it:
+                            if req.cancelled:
+                                break
+                            req.out.put(item)
+                    finally:
+                        close = getattr(it, "close", None)
+                        if close:
+                            close()
+                    req.out.put(_END)
+                else:
+                    req.out.put(req.fn())
+            except BaseException as e:
+                outcome = "failed"
+                req.out.put(_Failure(e))
+            finally:
+                self.busy_kind = None
+                self._record(req.kind, outcome, wait, time.perf_counter() - started)
+
+    # metrics
+    def _kind(self, kind: str) -> Dict[str, Any]:
+        with self._stats_lock:
+            return self._kinds.setdefault(kind, {"submitted": 0, "completed": 0, "failed": 0, "dropped": 0,
+                                                 "wait": deque(maxlen=self._keep), "service": deque(maxlen=self._keep)})
+
+    def _record(self, kind: str, outcome: str, wait: float, service: Optional[float] = None) -> None:
+        d = self._kind(kind)
+        with self._stats_lock:
+            d[outcome] += 1
+            d["wait"].append(wait)
+            if service is not None:
+                d["service"].append(service)
+
+    def depth(self) -> int:
+        return self._q.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        def _p(xs, q):
+            xs = sorted(xs)
+            return 1000 * xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+        with self._stats_lock:
+            kinds = {k: {"submitted": d["submitted"], "completed": d["completed"], "failed": d["failed"],
+                         "dropped": d["dropped"], "wait_p50_ms": _p(d["wait"], 0.5), "wait_p90_ms": _p(d["wait"], 0.9),
+                         "service_p50_ms": _p(d["service"], 0.5), "service_p90_ms": _p(d["service"], 0.9)}
+                     for k, d in self._kinds.items()}
+        return {"queue_depth": self.depth(), "busy": self.busy_kind, "kinds": kinds}
@@ -0,0 +1,287 @@
+# In-process BM25 index over a snapshot of :Quote nodes (no Neo4j needed at query time).
+#   python local_index.py build [--out DIR]      # snapshot Neo4j -> array-backed index
+#   python local_index.py query "two things are infinite"
+import re, json, math, bisect, argparse, time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
+
+from config import LOCAL_INDEX_DIR
+from retriever import Retriever, _clean_tokens
+from retrieval_cache import RetrievalCache, default_cache
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNAPSHOT_FILE = "quotes.jsonl"
+
+_SNAPSHOT_CYPHER = """
+MATCH (node:Quote)
+WITH node,
+     [(node)-[r:SAID_BY|ABOUT|MISATTRIBUTED_TO|DISPUTED_WITH]->(p:Person)
+       | {rel: type(r), name: p.name}] AS people
+RETURN node.id AS id,
+       node.text AS quote,
+       node.source AS source,
+       node.heading_context AS heading_context,
+       node.status AS status,
+       people
+"""
+
+_PHRASE_RE = re.compile(r'^"(?P<body>[^"]*)"(?:~(?P<slop>\d+))?$')
+
+
+# snapshot I/O
+def dump_snapshot(driver, database: str, out_dir: str) -> int:
+    """Write every :Quote (with its people) to <out_dir>/quotes.jsonl; returns the row count."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with driver.session(database=database) as sess, open(out / SNAPSHOT_FILE, "w", encoding="utf-8") as f:
+        for row in sess.run(_SNAPSHOT_CYPHER).data():
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+def load_snapshot(index_dir: str) -> List[Dict[str, Any]]:
+    with open(Path(index_dir) / SNAPSHOT_FILE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# build
+def build_index(index_dir: str) -> None:
+    """Tokenize the snapshot and write the postings arrays next to it."""
+    out = Path(index_dir)
+    docs = load_snapshot(index_dir)
+
+    inv: Dict[str, List[Tuple[int, List[int]]]] = {}
+    doc_len = np.zeros(len(docs), dtype=np.int32)
+    for d, row in enumerate(docs):
+        toks = _clean_tokens(row.get("quote") or "")
+        doc_len[d] = len(toks)
+        positions: Dict[str, List[int]] = {}
+        for pos, t in enumerate(toks):
+            positions.setdefault(t, []).append(pos)
+        for t, ps in positions.items():
+            inv.setdefault(t, []).append((d, ps))
+
+    terms = sorted(inv)
+    post_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    post_docs, post_tf, pos_offsets, flat_pos = [], [], [0], []
+    for i, t in enumerate(terms):
+        for d, ps in inv[t]:
+            post_docs.append(d)
+            post_tf.append(len(ps))
+            flat_pos.extend(ps)
+            pos_offsets.append(len(flat_pos))
+        post_offsets[i + 1] = len(post_docs)
+
+    (out / "terms.json").write_text(json.dumps(terms), encoding="utf-8")
+    np.save(out / "post_offsets.npy", post_offsets)
+    np.save(out / "post_docs.npy", np.asarray(post_docs, dtype=np.int32))
+    np.save(out / "post_tf.npy", np.asarray(post_tf, dtype=np.int32))
+    np.save(out / "pos_offsets.npy", np.asarray(pos_offsets, dtype=np.int64))
+    np.save(out / "positions.npy", np.asarray(flat_pos, dtype=np.int32))
+    np.save(out / "doc_len.npy", doc_len)
+
+
+class QuoteIndex:
+    """Read-only BM25 index; postings are memory-mapped from `index_dir`."""
+
+    def __init__(self, index_dir: str = LOCAL_INDEX_DIR, mmap: bool = True) -> None:
+        d = Path(index_dir)
+        mode = "r" if mmap else None
+        self.docs = load_snapshot(index_dir)
+        self.terms: List[str] = json.loads((d / "terms.json").read_text(encoding="utf-8"))
+        self._term_id = {t: i for i, t in enumerate(self.terms)}
+        self.post_offsets = np.load(d / "post_offsets.npy", mmap_mode=mode)
+        self.post_docs = np.load(d / "post_docs.npy", mmap_mode=mode)
+        self.post_tf = np.load(d / "post_tf.npy", mmap_mode=mode)
+        self.pos_offsets = np.load(d / "pos_offsets.npy", mmap_mode=mode)
+        self.positions = np.load(d / "positions.npy", mmap_mode=mode)
+        self.doc_len = np.load(d / "doc_len.npy", mmap_mode=mode)
+        self.n_docs = len(self.docs)
+        self.avgdl = float(self.doc_len.mean()) if self.n_docs else 1.0
+        self._norm = BM25_K1 * (1 - BM25_B + BM25_B * np.asarray(self.doc_len, dtype=np.float32) / max(self.avgdl, 1e-9))
+
+    # postings
+    def _span(self, tid: int) -> Tuple[int, int]:
+        return int(self.post_offsets[tid]), int(self.post_offsets[tid + 1])
+
+    def _idf(self, df: int) -> float:
+        return math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def _term_scores(self, tid: int) -> Tuple[np.ndarray, np.ndarray]:
+        s, e = self._span(tid)
+        docs = np.asarray(self.post_docs[s:e])
+        tf = np.asarray(self.post_tf[s:e], dtype=np.float32)
+        return docs, self._idf(e - s) * tf / (tf + self._norm[docs])
+
+    def _doc_positions(self, tid: int, doc: int) -> Optional[np.ndarray]:
+        s, e = self._span(tid)
+        j = s + int(np.searchsorted(self.post_docs[s:e], doc))
+        if j >= e or int(self.post_docs[j]) != doc:
+            return None
+        return np.asarray(self.positions[int(self.pos_offsets[j]):int(self.pos_offsets[j + 1])])
+
+    def _prefix_ids(self, prefix: str) -> range:
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix + "\uffff")
+        return range(lo, hi)
+
+    # query types
+    def _terms(self, words: List[str], require_all: bool) -> np.ndarray:
+        acc = np.zeros(self.n_docs, dtype=np.float32)
+        hits = np.zeros(self.n_docs, dtype=np.int32)
+        n_clauses = 0
+        for w in words:
+            n_clauses += 1
+            if w.endswith("*"):
+                # Lucene rewrites prefix queries to constant score (1.0 per clause)
+                ids = self._prefix_ids(w[:-1]) if w[:-1] else range(0)
+                if not ids:
+                    continue
+                matched = np.zeros(self.n_docs, dtype=bool)
+                for tid in ids:
+                    s, e = self._span(tid)
+                    matched[np.asarray(self.post_docs[s:e])] = True
+                acc[matched] += 1.0
+                hits[matched] += 1
+            else:
+                tid = self._term_id.get(w)
+                if tid is None:
+                    continue
+                docs, sc = self._term_scores(tid)
+                acc[docs] += sc
+                hits[docs] += 1
+        if require_all:
+            acc[hits < n_clauses] = 0.0
+        return acc
+
+    def _phrase(self, words: List[str], slop: int) -> np.ndarray:
+        acc = np.zeros(self.n_docs, dtype=np.float32)
+        tids = [self._term_id.get(w) for w in words]
+        if not tids or any(t is None for t in tids):
+            return acc
+        cand = None
+        for tid in tids:
+            s, e = self._span(tid)
+            docs = np.asarray(self.post_docs[s:e])
+            cand = docs if cand is None else np.intersect1d(cand, docs, assume_unique=True)
+        idf = sum(self._idf(self._span(t)[1] - self._span(t)[0]) for t in tids)
+        for doc in cand.tolist():
+            freq = self._phrase_freq([self._doc_positions(t, doc) for t in tids], slop)
+            if freq > 0:
+                acc[doc] = idf * freq / (freq + self._norm[doc])
+        return acc
+
+    @staticmethod
+    def _phrase_freq(plists: List[np.ndarray], slop: int) -> float:
+        """In-order sloppy match: each anchor contributes 1/(1+distance) when distance <= slop."""
+        freq = 0.0
+        for p0 in plists[0].tolist():
+            cur, dist = p0, 0
+            for pl in plists[1:]:
+                j = int(np.searchsorted(pl, cur + 1))
+                if j >= len(pl):
+                    dist = slop + 1
+                    break
+                dist += int(pl[j]) - cur - 1
+                cur = int(pl[j])
+            if dist <= slop:
+                freq += 1.0 / (1.0 + dist)
+        return freq
+
+    def score(self, q: str) -> np.ndarray:
+        """Score every doc for one Lucene string of the shapes `_variants()` produces."""
+        q = (q or "").strip()
+        m = _PHRASE_RE.match(q)
+        if m:
+            words = _clean_tokens(m.group("body"))
+            return self._phrase(words, int(m.group("slop") or 0))
+        parts = q.split()
+        require_all = "AND" in parts
+        words = [w.lower() for w in parts if w not in ("AND", "OR")]
+        return self._terms(words, require_all)
+
+    def search(self, q: str, limit: int) -> List[Dict[str, Any]]:
+        scores = self.score(q)
+        nz = np.flatnonzero(scores > 0)
+        if nz.size > limit:
+            nz = nz[np.argpartition(-scores[nz], limit - 1)[:limit]]
+        nz = nz[np.argsort(-scores[nz], kind="stable")]
+        return [{**self.docs[i], "score": float(scores[i])} for i in nz.tolist()]
+
+
+class LocalRetriever(Retriever):
+    """Retriever backed by QuoteIndex; same search_topk / search_best API, no driver."""
+
+    def __init__(self, index_dir: str = LOCAL_INDEX_DIR, cache: Optional[RetrievalCache] = None) -> None:
+        self.driver = None
+        self.db = None
+        self.index = index_dir
+        self.qindex = QuoteIndex(index_dir)
+        self._setup(False, cache, index_dir=index_dir, docs=self.qindex.docs)     # batched=False: no round trips to save
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.close()
+
+    def _run_many(self, q: str, limit: int) -> List[Dict[str, Any]]:
+        return self.qindex.search(q, limit)
+
+    def warm_up(self, n_conns: int = 0) -> Dict[str, float]:
+        """Touch the memory-mapped postings once so the first question doesn't page-fault them in."""
+        t0 = time.perf_counter()
+        self._run_many("warmup", limit=1)
+        for arr in (self.qindex.post_docs, self.qindex.post_tf, self.qindex.positions):
+            np.asarray(arr).sum()
+        return {"connect_ms": 0.0, "index_ms": 1000 * (time.perf_counter() - t0)}
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {}
+
+    def health(self) -> Dict[str, Any]:
+        ok = self.qindex.n_docs > 0
+        out = {"ok": ok, "backend": "local", "index": self.index, "docs": self.qindex.n_docs}
+        if not ok:
+            out["error"] = f"local index {self.index!r} is empty"
+        return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local BM25 quote index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="snapshot :Quote nodes from Neo4j and build the index")
+    b.add_argument("--out", default=LOCAL_INDEX_DIR)
+    b.add_argument("--from-snapshot", action="store_true", help="skip Neo4j; rebuild from an existing quotes.jsonl")
+    qp = sub.add_parser("query", help="run search_topk against the local index")
+    qp.add_argument("fragment")
+    qp.add_argument("--index", default=LOCAL_INDEX_DIR)
+    qp.add_argument("-k", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        if not args.from_snapshot:
+            ret = Retriever()
+            try:
+                n = dump_snapshot(ret.driver, ret.db, args.out)
+            finally:
+                ret.close()
+            print(f"Snapshot: {n} quotes -> {Path(args.out) / SNAPSHOT_FILE}")
+        t0 = time.perf_counter()
+        build_index(args.out)
+        cache = default_cache()
+        if cache is not None:
+            cache.invalidate()          # cached results refer to the old snapshot
+            cache.close()
+        print(f"Index built in {time.perf_counter() - t0:.2f}s -> {Path(args.out).resolve()}")
+    else:
+        t0 = time.perf_counter()
+        ret = LocalRetriever(args.index)
+        t1 = time.perf_counter()
+        results = ret.search_topk(args.fragment, k=args.k)
+        t2 = time.perf_counter()
+        print(f"load {t1 - t0:.3f}s | search {1000 * (t2 - t1):.2f} ms")
+        for r in results:
+            print(f"{r['_rerank']:.3f}  {r['score']:.2f}  {r['id']}  {r['quote'][:90]!r}")
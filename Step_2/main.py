@@ -1,26 +1,21 @@
 
-import os, re, tempfile, time
+import os, re, time
 from pathlib import Path
 from dotenv import load_dotenv
-import soundfile as sf
-import numpy as np
-
-from audio_utils import record_utterance_wav
-from asr import transcribe_file, transcribe_file_fast
-from dialogue import handle_user_transcript
-from tts import speak, list_voices, resolve_voice_id_and_name
+from audio_utils import record_utterance
+from asr import transcribe_file, transcribe_file_fast, transcribe_fast_info, escalate, cascade_metrics
+from dialogue import handle_user_transcript, handle_user_transcript_stream, startup_check, startup_timings
+from tts import speak, speak_stream, list_voices, resolve_voice_id_and_name
 from speaker_id import SpeakerID
 from user_prefs import set_voice_prefs, get_prefs
 from session import clear_session
-from config import USE_SPK_ID, SPEAKER_DB_PATH, SPEAKER_ID_THRESHOLD, DEBUG
+from config import (USE_SPK_ID, SPEAKER_DB_PATH, SPEAKER_ID_THRESHOLD, DEBUG, TTS_STREAM, INTENT_CLASSIFIER,
+                    ASR_STREAM, ASR_CASCADE)
+from asr_stream import StreamingTranscriber
 
-# optional (LLM intents)
+# fuzzy intents: local classifier first, LLM only when it is unsure (USE_LLM_INTENTS=0: never)
 USE_LLM_INTENTS = bool(int(os.getenv("USE_LLM_INTENTS", "1")))
-if USE_LLM_INTENTS:
-    from intent_mapper import map_intent_with_llm
-else:
-    def map_intent_with_llm(_text: str):
-        return {"intent": "query", "slots": {}, "confidence": "low"}
+from intent_mapper import map_intent
 
 # regex hints
 COMMAND_HINT_RE = re.compile(
@@ -164,15 +159,13 @@ def _do_enrollment_flow(sid: SpeakerID, name: str) -> bool:
         print(f"\nLine {idx}/5:\n» {sentence}")
         speak(f"Line {idx}. After the beep, please read this line.")
         speak(sentence)
-        with tempfile.TemporaryDirectory() as td:
-            p = os.path.join(td, f"enroll_{idx}.wav")
-            record_utterance_wav(p)
-            try:
-                sid.enroll(name, p)
-            except Exception as e:
-                print(f"[ERR] enrollment sample {idx} failed: {e}")
-                speak("Sorry, that sample failed. Let's move to the next line.")
-                continue
+        audio, sr = record_utterance()
+        try:
+            sid.enroll(name, audio, sr)
+        except Exception as e:
+            print(f"[ERR] enrollment sample {idx} failed: {e}")
+            speak("Sorry, that sample failed. Let's move to the next line.")
+            continue
     speak(f"All set. I have registered you as {name}.")
     print(f"\nEnrolled '{name}' with {len(ENROLL_PROMPTS)} samples.")
     print(f"[INFO] Speaker DB: {(Path('.cache')/'speakers.json').resolve()}")
@@ -384,20 +377,20 @@ def _handle_system_intents(text: str, sid: SpeakerID | None) -> bool:
         speak("Okay, fresh start. What's the new quote?", user_id=uid)
         return True
 
-    # LLM fallback for fuzzy phrasing (optional) 
-    if not USE_LLM_INTENTS:
+    # classifier / LLM fallback for fuzzy phrasing
+    if not (INTENT_CLASSIFIER or USE_LLM_INTENTS):
         return False
     if not COMMAND_HINT_RE.search(t) or len(t.split()) < 2 or len(t) > 200:
         return False
     try:
-        intent_obj = map_intent_with_llm(raw)
+        intent_obj = map_intent(raw, use_llm=USE_LLM_INTENTS)
     except Exception as e:
-        if DEBUG: print(f"[DBG] LLM intent mapping error: {e}")
+        if DEBUG: print(f"[DBG] intent mapping error: {e}")
         return False
 
     i = intent_obj.get("intent", "query")
     s = intent_obj.get("slots", {})
-    if DEBUG: print(f"[DBG] LLM_INTENT={i}  SLOTS={s}")
+    if DEBUG: print(f"[DBG] INTENT={i}  SLOTS={s}  CONF={intent_obj.get('confidence')}")
 
     handled = False
     if i == "reset":
@@ -436,102 +429,154 @@ def run_interactive():
     print("  say 'test my voice' to hear your current voice.")
 
     global sid, _LAST_SPK, _LAST_SPK_TS, ACTIVE_SESSION, _RECENT_RECOG_NAME, _RECENT_RECOG_TS
+
+    # fail fast if retrieval can't work, instead of on the first spoken question
+    health = startup_check()
+    if not health.get("ok"):
+        print(f"[ERR] Retriever not ready ({health.get('backend')}): {health.get('error')}")
+        return
+    if DEBUG: print(f"[DBG] RETRIEVER_HEALTH={health}")
+    timings = startup_timings()
+    if timings.get("llm_error"):
+        print(f"[WARN] {timings['llm_error']} (rule-based answers only)")
+    if INTENT_CLASSIFIER:
+        # (re)train a missing/stale intent model now rather than on the first fuzzy command
+        from intent_classifier import load as load_intent_model
+        t0 = time.perf_counter()
+        if load_intent_model(retrain=True) is None:
+            print("[WARN] intent classifier unavailable (pip install scikit-learn, then: python intent_classifier.py train)")
+        if DEBUG: print(f"[DBG] intent model ready in {1000 * (time.perf_counter() - t0):.0f} ms")
+    if DEBUG: print(f"[DBG] STARTUP_TIMINGS={timings}")
+
     sid = _ensure_sid() if USE_SPK_ID else None
     ACTIVE_SESSION = "default"
 
     while True:
         try:
             input("\n↩️  Press Enter to start recording...")
-            with tempfile.TemporaryDirectory() as td:
-                wav_path = os.path.join(td, "utt.wav")
 
-                # Record mic → WAV
-                record_utterance_wav(wav_path)
+            # Record mic → float32 buffer, shared by reference with speaker ID and ASR
+            # (streaming: decode while recording, final text right after the silence)
+            stream_text = None
+            if ASR_STREAM:
+                st = StreamingTranscriber(on_partial=lambda p: print(f"\r… {p}", end="", flush=True)).start()
+                audio, sr = record_utterance(on_frame=st.feed)
+                stream_text = st.finish()
+                t_stream = time.perf_counter()
+                print()
+            else:
+                audio, sr = record_utterance()
+            if not len(audio):
+                print("ASR heard nothing.")
+                continue
+
+            # Identify speaker (optional) + stickiness for very short clips
+            recognized_user, score = None, None
+            dur = float(len(audio)) / float(sr or 16000)
 
-                # Identify speaker (optional) + stickiness for very short clips
-                recognized_user, score = None, None
-                dur = 0.0
+            if sid is not None:
                 try:
-                    data, sr = sf.read(wav_path)
-                    if getattr(data, "ndim", 1) > 1:
-                        data = np.mean(data, axis=1)
-                    dur = float(len(data)) / float(sr or 16000)
-                except Exception:
-                    dur = 0.0
-
-                if sid is not None:
-                    try:
-                        res = sid.identify(wav_path)  # name or (name, score)
-                        if isinstance(res, tuple) and len(res) >= 2:
-                            recognized_user, score = res[0], float(res[1])
-                        else:
-                            recognized_user = res
-                            score = None
-                    except Exception as e:
-                        recognized_user = None
-                        if DEBUG: print(f"[DBG] identify error: {e}")
-
-                    now = time.time()
-                    if recognized_user:
-                        # update last-recognized & recent-recog trackers
-                        _LAST_SPK, _LAST_SPK_TS = recognized_user, now
-                        _RECENT_RECOG_NAME, _RECENT_RECOG_TS = recognized_user, now
-                        if DEBUG: print(f"👤 Recognized: {recognized_user} (score={score})")
+                    res = sid.identify(audio, sr)  # name or (name, score)
+                    if isinstance(res, tuple) and len(res) >= 2:
+                        recognized_user, score = res[0], float(res[1])
                     else:
-                        # If super short clip, keep last speaker for shorts
-                        if dur < STICKY_SHORT_SEC and _LAST_SPK and (now - _LAST_SPK_TS) < STICKY_TTL_SEC:
-                            recognized_user = _LAST_SPK
-                            if DEBUG: print(f"[SID] Short {dur:.2f}s → sticking to {_LAST_SPK}")
-                        else:
-                            if DEBUG: print(f"[SID] No ID (dur {dur:.2f}s); not sticking")
-
-                # FAST ASR for command intents 
-                text_fast = transcribe_file_fast(wav_path, language=None)
-                if DEBUG: print(f"[DBG] FAST_ASR={text_fast!r}")
-
-                # Decide if we should switch session BEFORE handling intents
+                        recognized_user = res
+                        score = None
+                except Exception as e:
+                    recognized_user = None
+                    if DEBUG: print(f"[DBG] identify error: {e}")
+
+                now = time.time()
                 if recognized_user:
-                    _maybe_switch_session(recognized_user, score, dur, text_fast or "")
-
-                if text_fast and _handle_system_intents(text_fast, sid):
-                    print(f"🗣️ You ({ACTIVE_SESSION}) [fast-intent]: {text_fast}")
-                    continue
-
-                # Full ASR for normal Q&A
-                text = transcribe_file(wav_path, language=None)
-                if not text:
-                    print("ASR heard nothing.")
-                    continue
-
-                # Follow-up rescue: if looks like follow-up & no ID switch this turn,
-                # temporarily stick to last speaker within LONG_STICKY_TTL_SEC
-                t_norm = _norm_intent_text(text)
-                if (recognized_user is None) and FOLLOWUP_RE.search(t_norm) and _LAST_SPK:
-                    now = time.time()
-                    if (now - _LAST_SPK_TS) < LONG_STICKY_TTL_SEC:
-                        recognized_user = _LAST_SPK
-                        if DEBUG:
-                            print(f"[SID] Follow-up rescue → sticking to {_LAST_SPK} "
-                                  f"(age={(now-_LAST_SPK_TS):.1f}s)")
-                        # Ensure ACTIVE_SESSION follows this rescue for this turn
-                        _maybe_switch_session(recognized_user, score, dur, text)
-
-                print(f"🗣️ You ({ACTIVE_SESSION}): {text}")
-
-                # Intents again on full text
-                if _handle_system_intents(text, sid):
-                    continue
-
-                # Normal Q&A flow — always use ACTIVE_SESSION
-                if DEBUG: print(f"[SID] Active session this turn: {ACTIVE_SESSION}")
-                reply = handle_user_transcript(text, session_id=ACTIVE_SESSION)
-                print(f"🤖 Bot:\n{reply}")
-
-                # Speak with user's preferred voice
-                if reply and reply.strip():
-                    speak(reply, user_id=ACTIVE_SESSION)
+                    # update last-recognized & recent-recog trackers
+                    _LAST_SPK, _LAST_SPK_TS = recognized_user, now
+                    _RECENT_RECOG_NAME, _RECENT_RECOG_TS = recognized_user, now
+                    if DEBUG: print(f"👤 Recognized: {recognized_user} (score={score})")
                 else:
+                    # If super short clip, keep last speaker for shorts
+                    if dur < STICKY_SHORT_SEC and _LAST_SPK and (now - _LAST_SPK_TS) < STICKY_TTL_SEC:
+                        recognized_user = _LAST_SPK
+                        if DEBUG: print(f"[SID] Short {dur:.2f}s → sticking to {_LAST_SPK}")
+                    else:
+                        if DEBUG: print(f"[SID] No ID (dur {dur:.2f}s); not sticking")
+
+            # FAST ASR for command intents (cascade: also scores tiny's confidence)
+            fast = None
+            if ASR_STREAM:
+                text_fast = stream_text
+            elif ASR_CASCADE:
+                fast = transcribe_fast_info(audio, language=None, sr=sr)
+                text_fast = fast["text"]
+            else:
+                text_fast = transcribe_file_fast(audio, language=None, sr=sr)
+            if DEBUG: print(f"[DBG] FAST_ASR={text_fast!r}")
+
+            # Decide if we should switch session BEFORE handling intents
+            if recognized_user:
+                _maybe_switch_session(recognized_user, score, dur, text_fast or "")
+
+            if text_fast and _handle_system_intents(text_fast, sid):
+                print(f"🗣️ You ({ACTIVE_SESSION}) [fast-intent]: {text_fast}")
+                continue
+
+            # Full ASR for normal Q&A
+            if ASR_STREAM:
+                text, t_text = stream_text, t_stream
+            elif ASR_CASCADE:
+                # small model only if tiny was unsure
+                casc = escalate(audio, fast, language=None, sr=sr)
+                text, t_text = casc["text"], time.perf_counter()
+                if DEBUG:
+                    print(f"[DBG] ASR_CASCADE tier={casc['tier']} logprob={fast['avg_logprob']:.2f} "
+                          f"no_speech={fast['no_speech_prob']:.2f} escalation_rate={cascade_metrics()['escalation_rate']:.2f}")
+            else:
+                text = transcribe_file(audio, language=None, sr=sr)
+                t_text = time.perf_counter()
+            if not text:
+                print("ASR heard nothing.")
+                continue
+
+            # Follow-up rescue: if looks like follow-up & no ID switch this turn,
+            # temporarily stick to last speaker within LONG_STICKY_TTL_SEC
+            t_norm = _norm_intent_text(text)
+            if (recognized_user is None) and FOLLOWUP_RE.search(t_norm) and _LAST_SPK:
+                now = time.time()
+                if (now - _LAST_SPK_TS) < LONG_STICKY_TTL_SEC:
+                    recognized_user = _LAST_SPK
+                    if DEBUG:
+                        print(f"[SID] Follow-up rescue → sticking to {_LAST_SPK} "
+                              f"(age={(now-_LAST_SPK_TS):.1f}s)")
+                    # Ensure ACTIVE_SESSION follows this rescue for this turn
+                    _maybe_switch_session(recognized_user, score, dur, text)
+
+            print(f"🗣️ You ({ACTIVE_SESSION}): {text}")
+
+            # Intents again on full text
+            if _handle_system_intents(text, sid):
+                continue
+
+            # Normal Q&A flow — always use ACTIVE_SESSION
+            if DEBUG: print(f"[SID] Active session this turn: {ACTIVE_SESSION}")
+            if TTS_STREAM:
+                # speak each sentence as soon as it is generated; track time-to-first-audio
+                print("🤖 Bot:")
+                st = speak_stream(handle_user_transcript_stream(text, session_id=ACTIVE_SESSION),
+                                  user_id=ACTIVE_SESSION, t0=t_text, on_chunk=lambda c: print(c, flush=True))
+                if not st["chunks"]:
                     print("[TTS] Nothing to speak (empty reply).")
+                if DEBUG and st["first_audio_s"] is not None:
+                    print(f"[DBG] TTFA={st['first_audio_s']:.2f}s  generation={st['gen_s']:.2f}s  "
+                          f"total={st['total_s']:.2f}s  chunks={st['chunks']}")
+                continue
+
+            reply = handle_user_transcript(text, session_id=ACTIVE_SESSION)
+            print(f"🤖 Bot:\n{reply}")
+
+            # Speak with user's preferred voice
+            if reply and reply.strip():
+                speak(reply, user_id=ACTIVE_SESSION)
+            else:
+                print("[TTS] Nothing to speak (empty reply).")
 
         except KeyboardInterrupt:
             print("\n👋 Bye!")
@@ -0,0 +1,122 @@
+# KV-state cache for fixed system prompts.
+# llama.cpp reuses the longest token prefix already in its context, so restoring the state
+# captured right after a system prompt's prefill means only the user suffix is prefilled.
+# Stats tell real restores (load_state) apart from calls whose prefix was already resident.
+# States are bounded (LRU, a few tens of MB each) and optionally pickled to disk per model.
+import hashlib, os, pickle, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+from config import DEBUG
+
+
+class PrefixCache:
+    def __init__(self, llama, model_path: str, max_items: int = 6, disk_dir: str = "") -> None:
+        self.llama = llama
+        self.max_items = max(1, int(max_items))
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._states: "OrderedDict[str, Any]" = OrderedDict()
+        self._loaded: Optional[str] = None        # prefix whose tokens are currently in the context
+        self._lock = threading.Lock()
+        try:
+            mtime = os.path.getmtime(model_path)
+        except OSError:
+            mtime = 0
+        self._model_tag = f"{os.path.basename(model_path or '')}:{mtime:.0f}"
+        self.resident = self.restores = self.misses = self.primes = self.disk_loads = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def _key(self, system: str) -> str:
+        return hashlib.sha1(f"{self._model_tag}\x00{system}".encode("utf-8")).hexdigest()[:20]
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return self.disk_dir / f"{key}.state" if self.disk_dir else None
+
+    def _put(self, key: str, state) -> None:
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_items:
+            self._states.popitem(last=False)
+
+    def has(self, system: str) -> bool:
+        key = self._key(system)
+        return key in self._states or (self.disk_dir is not None and self._disk_path(key).exists())
+
+    def restore(self, system: str) -> bool:
+        """Load the state for `system` before a call (on the thread that owns the model)."""
+        key = self._key(system)
+        with self._lock:
+            if self._loaded == key:                # context already starts with this prefix: nothing to load
+                self.resident += 1
+                return True
+            state = self._states.get(key)
+            if state is None and self.disk_dir:
+                p = self._disk_path(key)
+                if p.exists():
+                    try:
+                        with open(p, "rb") as f:
+                            state = pickle.load(f)
+                        self._put(key, state)
+                        self.disk_loads += 1
+                    except Exception as e:
+                        if DEBUG: print(f"[DBG] prefix state {p} unreadable: {e}")
+            if state is None:
+                self.misses += 1
+                return False
+            self._states.move_to_end(key)
+            self.llama.load_state(state)
+            self._loaded = key
+            self.restores += 1
+            return True
+
+    def prime(self, system: str, prefill: Callable[[], None]) -> None:
+        """Run prefill() (evaluates just the system prompt) and save that state for `system`."""
+        key = self._key(system)
+        with self._lock:
+            prefill()
+            self._loaded = key
+            self.primes += 1
+            state = self.llama.save_state()
+            self._put(key, state)
+            p = self._disk_path(key)
+            if p is not None and not p.exists():
+                try:
+                    with open(p, "wb") as f:
+                        pickle.dump(state, f)
+                except Exception as e:
+                    if DEBUG: print(f"[DBG] prefix state {p} not saved: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.restores + self.resident
+        total = hits + self.misses
+        return {"size": len(self._states), "max_items": self.max_items, "restores": self.restores,
+                "resident": self.resident, "misses": self.misses, "primes": self.primes, "disk_loads": self.disk_loads,
+                "hit_rate": hits / total if total else 0.0,
+                "restore_rate": self.restores / total if total else 0.0}
+
+
+class TTFTStats:
+    """Time-to-first-token and total latency per call kind."""
+
+    def __init__(self, keep: int = 512) -> None:
+        self.keep = keep
+        self._data: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, ttft_s: float, total_s: float) -> None:
+        with self._lock:
+            d = self._data.setdefault(kind, {"ttft": [], "total": []})
+            d["ttft"].append(ttft_s); d["total"].append(total_s)
+            for v in d.values():
+                del v[:-self.keep]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        def _p(xs, q):
+            xs = sorted(xs)
+            return 1000 * xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+        with self._lock:
+            return {k: {"n": len(d["ttft"]), "ttft_p50_ms": _p(d["ttft"], 0.5), "ttft_p90_ms": _p(d["ttft"], 0.9),
+                        "total_p50_ms": _p(d["total"], 0.5)} for k, d in self._data.items()}
+
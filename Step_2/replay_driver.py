@@ -0,0 +1,176 @@
+# Record-and-replay stand-in for the Neo4j driver, for deterministic offline benchmarks.
+# Record:  NEO4J_RECORD_PATH=.cache/neo4j_tape.jsonl.gz python eval.py ...   (live server)
+# Replay:  NEO4J_REPLAY_PATH=.cache/neo4j_tape.jsonl.gz python eval.py ...   (no server)
+# A tape is gzip'd JSONL, one {"k", "cypher", "params", "rows"} per distinct (cypher, params).
+import gzip, hashlib, json, re, threading, time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from config import DEBUG
+
+
+class ReplayMiss(LookupError):
+    """A query that is not on the tape (strict replay only)."""
+
+
+def exchange_key(cypher: str, params: Optional[Dict[str, Any]]) -> str:
+    norm = re.sub(r"\s+", " ", cypher or "").strip()
+    blob = norm + "\x00" + json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def load_tape(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    tape: Dict[str, List[Dict[str, Any]]] = {}
+    if Path(path).exists():
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    rec = json.loads(line)
+                    tape[rec["k"]] = rec["rows"]
+    return tape
+
+
+# replay
+class _ReplayResult:
+    def __init__(self, rows: List[Dict[str, Any]]) -> None:
+        self._rows = rows
+
+    def data(self) -> List[Dict[str, Any]]:
+        return [dict(r) for r in self._rows]
+
+    def single(self):
+        return dict(self._rows[0]) if self._rows else None
+
+    def consume(self) -> None:
+        return None
+
+
+class _ReplaySession:
+    def __init__(self, driver: "ReplayDriver") -> None:
+        self._driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    def run(self, cypher: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> _ReplayResult:
+        return _ReplayResult(self._driver._lookup(cypher, {**(parameters or {}), **kwargs}))
+
+
+class ReplayDriver:
+    """Serves recorded rows from memory; `latency_ms` is added to every run() to mimic the network."""
+
+    def __init__(self, path: str, latency_ms: float = 0.0, strict: bool = False) -> None:
+        self.path = path
+        self.latency_ms = latency_ms
+        self.strict = strict
+        self._tape = load_tape(path)
+        self.hits = self.misses = 0
+        if DEBUG: print(f"[DBG] REPLAY tape {path}: {len(self._tape)} exchanges")
+
+    def _lookup(self, cypher: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000.0)
+        rows = self._tape.get(exchange_key(cypher, params))
+        if rows is None:
+            self.misses += 1
+            if self.strict:
+                short = re.sub(r"\s+", " ", cypher)[:80]
+                raise ReplayMiss(f"not on tape {self.path}: {short!r} {params}")
+            return []
+        self.hits += 1
+        return rows
+
+    def session(self, **kwargs) -> _ReplaySession:
+        return _ReplaySession(self)
+
+    def verify_connectivity(self) -> None:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+# record
+class _RecordingResult:
+    def __init__(self, driver: "RecordingDriver", result, cypher: str, params: Dict[str, Any]) -> None:
+        self._driver, self._result, self._cypher, self._params = driver, result, cypher, params
+
+    def data(self) -> List[Dict[str, Any]]:
+        rows = self._result.data()
+        self._driver._record(self._cypher, self._params, rows)
+        return rows
+
+    def single(self):
+        rec = self._result.single()
+        self._driver._record(self._cypher, self._params, [rec.data()] if rec is not None else [])
+        return rec
+
+    def consume(self):
+        out = self._result.consume()
+        self._driver._record(self._cypher, self._params, [])
+        return out
+
+
+class _RecordingSession:
+    def __init__(self, driver: "RecordingDriver", sess) -> None:
+        self._driver, self._sess = driver, sess
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._sess.close()
+
+    def run(self, cypher: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> _RecordingResult:
+        params = {**(parameters or {}), **kwargs}
+        return _RecordingResult(self._driver, self._sess.run(cypher, params), cypher, params)
+
+
+class RecordingDriver:
+    """Wraps a real driver and appends every new (cypher, params) -> rows exchange to the tape."""
+
+    def __init__(self, driver, path: str) -> None:
+        self._driver = driver
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._seen = set(load_tape(path))
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def _record(self, cypher: str, params: Dict[str, Any], rows: List[Dict[str, Any]]) -> None:
+        k = exchange_key(cypher, params)
+        with self._lock:
+            if k in self._seen:
+                return
+            self._seen.add(k)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps({"k": k, "cypher": cypher, "params": params, "rows": rows}, default=str) + "\n")
+            self.recorded += 1
+
+    def session(self, **kwargs) -> _RecordingSession:
+        return _RecordingSession(self, self._driver.session(**kwargs))
+
+    def verify_connectivity(self) -> None:
+        return self._driver.verify_connectivity()
+
+    def close(self) -> None:
+        self._driver.close()
+
+
+def open_driver(uri: str, auth, record_path: str = "", replay_path: str = "", latency_ms: float = 0.0,
+                strict: bool = False, **driver_kwargs):
+    """Real driver, a RecordingDriver around it, or a ReplayDriver (no server needed)."""
+    if replay_path:
+        return ReplayDriver(replay_path, latency_ms=latency_ms, strict=strict)
+    from neo4j import GraphDatabase
+    driver = GraphDatabase.driver(uri, auth=auth, **driver_kwargs)
+    return RecordingDriver(driver, record_path) if record_path else driver
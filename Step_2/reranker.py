@@ -0,0 +1,128 @@
+# Batched reranker for Retriever candidates.
+# Same 0.55 coverage / 0.35 normalized FT score / 0.10 phrase bonus weighting as
+# Retriever._score_candidate, but the fragment is tokenized once, quote tokens are cached
+# by quote id as integer ids, and the whole pool is scored in one NumPy pass.
+# Candidates carrying a `dense` cosine (hybrid retrieval) get it blended into the score term;
+# fuzzy-only candidates get FUZZY_WEIGHT * their fuzzy similarity there instead of an FT score.
+#   python reranker.py        # micro-benchmark vs. the per-pair scorer
+import random, threading, time
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple
+import numpy as np
+
+from config import DENSE_WEIGHT, FUZZY_WEIGHT
+from retriever import _clean_tokens
+
+
+class Reranker:
+    def __init__(self, max_cached: int = 50000, dense_weight: float = DENSE_WEIGHT,
+                 fuzzy_weight: float = FUZZY_WEIGHT) -> None:
+        self.max_cached = max_cached
+        self.dense_weight = dense_weight
+        self.fuzzy_weight = fuzzy_weight
+        self._vocab: Dict[str, int] = {}
+        self._quotes: "OrderedDict[Any, Tuple[np.ndarray, str]]" = OrderedDict()
+        self._lock = threading.Lock()      # token caches are shared by concurrent search_topk calls
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vocab.clear()
+            self._quotes.clear()
+
+    def _quote_entry(self, cand: Dict[str, Any]) -> Tuple[np.ndarray, str]:
+        """(unique token ids, space-joined tokens) for a candidate, cached by quote id."""
+        key = cand.get("id")
+        hit = self._quotes.get(key) if key is not None else None
+        if hit is not None:
+            self._quotes.move_to_end(key)
+            return hit
+
+        toks = _clean_tokens(cand.get("quote") or "")
+        ids = np.fromiter((self._vocab.setdefault(t, len(self._vocab)) for t in set(toks)), dtype=np.int32)
+        entry = (ids, " ".join(toks))
+        if key is not None:
+            self._quotes[key] = entry
+            if len(self._quotes) > self.max_cached:
+                self._quotes.popitem(last=False)
+        return entry
+
+    def score(self, fragment: str, cands: List[Dict[str, Any]]) -> np.ndarray:
+        """Rerank score for every candidate, in input order."""
+        n = len(cands)
+        if not n:
+            return np.zeros(0, dtype=np.float64)
+
+        q_toks = _clean_tokens(fragment)
+        q_set = set(q_toks)
+        with self._lock:
+            entries = [self._quote_entry(c) for c in cands]
+            q_ids = np.fromiter((self._vocab[t] for t in q_set if t in self._vocab), dtype=np.int32)
+
+        # coverage: |q ∩ c| / |q| over a flattened (CSR-style) token-id array
+        lens = np.fromiter((len(e[0]) for e in entries), dtype=np.int64, count=n)
+        flat = np.concatenate([e[0] for e in entries]) if lens.sum() else np.zeros(0, dtype=np.int32)
+        seg = np.repeat(np.arange(n), lens)
+        overlap = np.bincount(seg, weights=np.isin(flat, q_ids), minlength=n)
+        coverage = overlap / max(1, len(q_set))
+
+        # phrase bonus: substring test on the joined tokens (same as the per-pair scorer)
+        q_joined = " ".join(q_toks)
+        phrase = np.fromiter((1.0 if q_joined in e[1] else 0.0 for e in entries), dtype=np.float64, count=n)
+
+        # Lucene scores aren't bounded; lightly normalize with a cap
+        def _f(c):
+            try:
+                return float(c["score"])
+            except Exception:
+                return None
+        raw = [_f(c) for c in cands]
+        score_norm = np.array([min(s / 10.0, 1.0) if s is not None else 0.0 for s in raw], dtype=np.float64)
+        # fuzzy-only hits: a discounted feature of their own, not a pseudo Lucene score
+        fz = np.array([float(c.get("fuzzy") or 0.0) if c.get("variant") == "fuzzy" else 0.0 for c in cands])
+        score_norm = np.where(fz > 0, self.fuzzy_weight * fz, score_norm)
+
+        # hybrid: fuse the dense cosine into the score term (no-op when no candidate has one)
+        if self.dense_weight > 0 and any(c.get("dense") is not None for c in cands):
+            dense = np.array([max(0.0, float(c.get("dense") or 0.0)) for c in cands], dtype=np.float64)
+            score_norm = (1.0 - self.dense_weight) * score_norm + self.dense_weight * dense
+
+        return 0.55 * coverage + 0.35 * score_norm + 0.10 * phrase
+
+
+def _bench(sizes=(20, 50, 100, 200, 500), reps: int = 50) -> None:
+    from retriever import Retriever
+
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(2000)] + ["universe", "infinite", "things", "human", "stupidity"]
+    fragment = "two things are infinite the universe"
+
+    def _quote():
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(8, 40)))
+        return body + (" two things are infinite: the universe" if rng.random() < 0.2 else "")
+
+    print(f"{'pool':>5} {'per-pair ms':>12} {'batched cold ms':>16} {'batched warm ms':>16} {'speedup':>8}  same order")
+    for n in sizes:
+        pool = [{"id": f"q{i}", "quote": _quote(), "score": rng.uniform(0, 15)} for i in range(n)]
+
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            ref = [Retriever._score_candidate(None, fragment, c) for c in pool]
+        t_ref = (time.perf_counter() - t0) / reps
+
+        rr = Reranker()
+        t0 = time.perf_counter()
+        rr.score(fragment, pool)
+        t_cold = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            got = rr.score(fragment, pool)
+        t_warm = (time.perf_counter() - t0) / reps
+
+        order = lambda xs: sorted(range(n), key=lambda i: (xs[i], pool[i]["score"]), reverse=True)
+        same = order(ref) == order(list(got))
+        print(f"{n:>5} {1000 * t_ref:>12.3f} {1000 * t_cold:>16.3f} {1000 * t_warm:>16.3f} {t_ref / t_warm:>7.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    _bench()
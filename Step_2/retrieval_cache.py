@@ -0,0 +1,117 @@
+# Bounded LRU + TTL cache for Retriever.search_topk results, with an optional sqlite tier
+# so a restart doesn't begin cold. Call invalidate() after re-ingesting the graph.
+import copy, json, sqlite3, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from config import RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL, RETRIEVAL_CACHE_PATH, DEBUG
+
+Result = List[Dict[str, Any]]
+
+
+class RetrievalCache:
+    def __init__(self, max_items: int = RETRIEVAL_CACHE_SIZE, ttl_s: float = RETRIEVAL_CACHE_TTL,
+                 disk_path: Optional[str] = RETRIEVAL_CACHE_PATH or None, max_disk_items: Optional[int] = None) -> None:
+        self.max_items = max(1, int(max_items))
+        self.ttl_s = float(ttl_s)
+        self.max_disk_items = max_disk_items or 20 * self.max_items
+        self._mem: "OrderedDict[str, Tuple[float, Result]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.disk_hits = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, ts REAL, value TEXT)")
+            self._db.commit()
+
+    @staticmethod
+    def key(tokens: List[str], k: int, min_score: float, per_variant_limit: Optional[int] = None, mode: str = "ft") -> str:
+        return json.dumps([tokens, k, float(min_score), per_variant_limit, mode])
+
+    def _fresh(self, ts: float) -> bool:
+        return self.ttl_s <= 0 or (time.time() - ts) < self.ttl_s
+
+    def _put_mem(self, key: str, ts: float, value: Result) -> None:
+        self._mem[key] = (ts, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Result]:
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                if self._fresh(item[0]):
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(item[1])
+                del self._mem[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT ts, value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if self._fresh(row[0]):
+                        value = json.loads(row[1])
+                        self._put_mem(key, row[0], value)
+                        self.hits += 1; self.disk_hits += 1
+                        return copy.deepcopy(value)
+                    self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.expirations += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Result) -> None:
+        ts = time.time()
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._put_mem(key, ts, value)
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO cache (key, ts, value) VALUES (?, ?, ?)",
+                                     (key, ts, json.dumps(value, default=str)))
+                    # keep the disk tier bounded too: drop the oldest rows
+                    self._db.execute(
+                        "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_items,),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    if DEBUG: print(f"[DBG] retrieval cache disk write failed: {e}")
+
+    def invalidate(self) -> None:
+        """Drop every cached result (memory and disk), e.g. after the graph is re-ingested."""
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._mem),
+            "max_items": self.max_items,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def default_cache() -> Optional[RetrievalCache]:
+    """Cache configured from env; RETRIEVAL_CACHE_SIZE=0 disables it."""
+    return RetrievalCache() if RETRIEVAL_CACHE_SIZE > 0 else None
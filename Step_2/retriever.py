@@ -1,15 +1,32 @@
 
-import re
+import re, threading, time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
-from neo4j import GraphDatabase
 from config import (
     NEO4J_URI,
     NEO4J_USER,
     NEO4J_PASSWORD,
     NEO4J_DATABASE,
     NEO4J_FT_INDEX,
+    NEO4J_MAX_POOL_SIZE,
+    NEO4J_ACQUIRE_TIMEOUT,
+    NEO4J_WARMUP_CONNS,
+    NEO4J_RECORD_PATH,
+    NEO4J_REPLAY_PATH,
+    REPLAY_LATENCY_MS,
+    REPLAY_STRICT,
+    RETRIEVER_BATCH,
+    RETRIEVER_BACKEND,
+    LOCAL_INDEX_DIR,
+    USE_FUZZY_FALLBACK,
+    USE_DENSE,
+    RETRIEVAL_MODE,
+    DENSE_MIN_SIM,
     DEBUG,
 )
+from retrieval_cache import RetrievalCache, default_cache
+from replay_driver import open_driver
 
 # stopwords kept minimal to preserve meaning
 STOP = set(
@@ -63,11 +80,116 @@ ORDER BY score DESC
 LIMIT $limit
 """
 
+# Batched form of _CYPHER: all Lucene variants in one round trip.
+# `i` keeps the variant order so the caller can replay the sequential early-stop.
+_CYPHER_BATCH = """
+UNWIND range(0, size($queries) - 1) AS i
+CALL {
+  WITH i
+  CALL db.index.fulltext.queryNodes($index, $queries[i]) YIELD node, score
+  WITH node, score
+  ORDER BY score DESC
+  LIMIT $limit
+  RETURN node, score
+}
+WITH i, node, score,
+     [(node)-[r:SAID_BY|ABOUT|MISATTRIBUTED_TO|DISPUTED_WITH]->(p:Person)
+       | {rel: type(r), name: p.name}] AS people
+RETURN i,
+       node.id AS id,
+       node.text AS quote,
+       node.source AS source,
+       node.heading_context AS heading_context,
+       node.status AS status,
+       people,
+       score
+ORDER BY i, score DESC
+"""
+
+def _merge_rows(pool: Dict[str, Dict[str, Any]], q: str, rows: List[Dict[str, Any]], min_score: float) -> None:
+    """Keep rows scoring >= min_score, tagged with their variant; max score per id wins."""
+    for r in rows:
+        try:
+            if float(r["score"]) < min_score:
+                continue
+        except Exception:
+            continue
+
+        r["variant"] = q
+        rid = r["id"]
+        if rid not in pool or float(r["score"]) > float(pool[rid]["score"]):
+            pool[rid] = r
+
+def _fuzzy_fill(fuzzy, fragment: str, pool: Dict[str, Dict[str, Any]], limit: int) -> None:
+    """Fallback tier: add phonetic/trigram matches that the FT variants missed (FT score 0, own `fuzzy` sim)."""
+    for r in fuzzy.search(fragment, limit):
+        if r["id"] not in pool:
+            r["variant"] = "fuzzy"
+            r["score"] = 0.0
+            pool[r["id"]] = r
+
+def _dense_fuse(dense, fragment: str, pool: Dict[str, Dict[str, Any]], limit: int) -> None:
+    """Attach a `dense` cosine to pooled rows and add dense-only hits (FT score 0)."""
+    qvec = dense.embed(fragment)
+    ids = list(pool)
+    for rid, sim in zip(ids, dense.similarity(qvec, ids)):
+        pool[rid]["dense"] = sim
+    for r in dense.search(fragment, limit, qvec=qvec):
+        if r["id"] not in pool and r["dense"] >= DENSE_MIN_SIM:
+            r["variant"] = "dense"
+            r["score"] = 0.0
+            pool[r["id"]] = r
+
+def _rerank_pool(reranker, fragment: str, pool: Dict[str, Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    cands = list(pool.values())
+    for c, s in zip(cands, reranker.score(fragment, cands)):
+        c["_rerank"] = float(s)
+
+    # fuzzy-only hits fill gaps; they never outrank a candidate that matched a full-text variant
+    cands.sort(key=lambda x: (x.get("variant") != "fuzzy", x["_rerank"], x["score"]), reverse=True)
+    return cands[:k]
+
 class Retriever:
-    def __init__(self) -> None:
-        self.driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    def __init__(self, batched: bool = RETRIEVER_BATCH, cache: Optional[RetrievalCache] = None, driver=None) -> None:
+        self.max_pool_size = NEO4J_MAX_POOL_SIZE
+        self.acquire_timeout = NEO4J_ACQUIRE_TIMEOUT
+        # real driver, or a recording / replaying stand-in (see replay_driver.py)
+        self.driver = driver or open_driver(
+            NEO4J_URI, (NEO4J_USER, NEO4J_PASSWORD),
+            record_path=NEO4J_RECORD_PATH, replay_path=NEO4J_REPLAY_PATH,
+            latency_ms=REPLAY_LATENCY_MS, strict=REPLAY_STRICT,
+            max_connection_pool_size=self.max_pool_size,
+            connection_acquisition_timeout=self.acquire_timeout,
+        )
         self.db = NEO4J_DATABASE
         self.index = NEO4J_FT_INDEX
+        self._setup(batched, cache)
+
+    def _setup(self, batched: bool, cache: Optional[RetrievalCache],
+               index_dir: str = LOCAL_INDEX_DIR, docs: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Backend-independent state (shared with subclasses that have no driver)."""
+        from reranker import Reranker
+        self.batched = batched
+        self.cache = cache if cache is not None else default_cache()
+        self.reranker = Reranker()
+        self.fuzzy = None
+        if USE_FUZZY_FALLBACK:
+            from fuzzy_index import load_fuzzy_index
+            self.fuzzy = load_fuzzy_index(index_dir, docs=docs)
+        self.dense = None
+        if USE_DENSE:
+            from dense_index import load_dense_index
+            self.dense = load_dense_index(index_dir, docs=docs)
+        self.mode = RETRIEVAL_MODE
+        # pool metrics (sessions hold one pooled connection while running)
+        self._lock = threading.Lock()
+        self.in_use = self.peak_in_use = self.sessions = 0
+        self.query_s_total = 0.0
+
+    @property
+    def effective_mode(self) -> str:
+        """RETRIEVAL_MODE, downgraded to 'ft' when no dense index is loaded."""
+        return self.mode if self.dense is not None else "ft"
 
     def close(self) -> None:
         """Close the underlying Neo4j driver."""
@@ -75,16 +197,113 @@ class Retriever:
             self.driver.close()
         except Exception:
             pass
+        if self.cache is not None:
+            self.cache.close()
+
+    def invalidate_cache(self) -> None:
+        """Forget cached results; call after the graph is re-ingested."""
+        if self.cache is not None:
+            self.cache.invalidate()
+        self.reranker.clear()
+
+    @contextmanager
+    def _session(self):
+        """driver.session() with in-use / peak / timing counters."""
+        with self._lock:
+            self.in_use += 1
+            self.sessions += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        t0 = time.perf_counter()
+        try:
+            with self.driver.session(database=self.db) as sess:
+                yield sess
+        finally:
+            with self._lock:
+                self.in_use -= 1
+                self.query_s_total += time.perf_counter() - t0
 
     def _run_many(self, q: str, limit: int) -> List[Dict[str, Any]]:
         """Run the FT query with the given Lucene string and LIMIT."""
-        with self.driver.session(database=self.db) as sess:
+        with self._session() as sess:
             return sess.run(
                 _CYPHER,
                 {"index": self.index, "q": q, "limit": limit},
             ).data()
 
+    def _run_batch(self, queries: List[str], limit: int) -> List[List[Dict[str, Any]]]:
+        """Run all FT queries in a single round trip; returns one row list per query."""
+        if not queries:
+            return []
+        with self._session() as sess:
+            rows = sess.run(
+                _CYPHER_BATCH,
+                {"index": self.index, "queries": queries, "limit": limit},
+            ).data()
+        out: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        for r in rows:
+            out[r.pop("i")].append(r)
+        return out
+
+    # startup
+    def warm_up(self, n_conns: int = NEO4J_WARMUP_CONNS) -> Dict[str, float]:
+        """Pre-open pooled connections and fault in the FT index so the first question is not cold."""
+        t0 = time.perf_counter()
+
+        def _ping(_):
+            with self._session() as sess:
+                sess.run("RETURN 1").consume()
+
+        n = max(1, min(n_conns, self.max_pool_size))
+        with ThreadPoolExecutor(max_workers=n) as ex:
+            list(ex.map(_ping, range(n)))       # concurrent, so n distinct connections stay pooled
+        t1 = time.perf_counter()
+        self._run_many("warmup", limit=1)
+        t2 = time.perf_counter()
+        if DEBUG: print(f"[DBG] RETRIEVER warm-up: {n} conns {1000*(t1-t0):.0f} ms, FT {1000*(t2-t1):.0f} ms")
+        return {"connect_ms": 1000 * (t1 - t0), "index_ms": 1000 * (t2 - t1)}
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {
+            "max_pool_size": self.max_pool_size,
+            "acquire_timeout_s": self.acquire_timeout,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "sessions": self.sessions,
+            "avg_session_ms": (1000 * self.query_s_total / self.sessions) if self.sessions else 0.0,
+        }
+
+    def health(self) -> Dict[str, Any]:
+        """Connectivity + FT index state; `ok` is False with an `error` when retrieval can't work."""
+        t0 = time.perf_counter()
+        out: Dict[str, Any] = {"ok": False, "backend": "neo4j", "index": self.index}
+        try:
+            self.driver.verify_connectivity()
+            with self._session() as sess:
+                rec = sess.run(
+                    "SHOW INDEXES YIELD name, state WHERE name = $index RETURN state",
+                    {"index": self.index},
+                ).single()
+            out["index_state"] = rec["state"] if rec else None
+            out["ok"] = out["index_state"] == "ONLINE"
+            if not out["ok"]:
+                out["error"] = f"full-text index {self.index!r} is {out['index_state'] or 'missing'}"
+        except Exception as e:
+            out["error"] = f"{type(e).__name__}: {e}"
+        out["latency_ms"] = 1000 * (time.perf_counter() - t0)
+        out.update(self.pool_stats())
+        return out
+
+    def _iter_variant_hits(self, fragment: str, limit: int):
+        """Yield (variant, rows) in variant order, one query per variant or all at once."""
+        queries = _variants(fragment)
+        if self.batched:
+            yield from zip(queries, self._run_batch(queries, limit=limit))
+        else:
+            for q in queries:
+                yield q, self._run_many(q, limit=limit)
+
     # simple, transparent re-ranker: token coverage + phrase bonus + normalized FT score
+    # (per-pair reference; search_topk uses the batched Reranker with the same weights)
     def _score_candidate(self, fragment: str, cand: Dict[str, Any]) -> float:
         q_toks = set(_clean_tokens(fragment))
         c_toks = set(_clean_tokens(cand["quote"]))
@@ -102,36 +321,52 @@ class Retriever:
         return 0.55 * coverage + 0.35 * score_norm + 0.10 * phrase_bonus
 
     def search_topk(self, fragment: str, k: int = 5, min_score: float = 3.0, per_variant_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        if self.cache is None:
+            return self._search_topk(fragment, k, min_score, per_variant_limit)
+
+        key = self.cache.key(_clean_tokens(fragment or ""), k, min_score, per_variant_limit, self.effective_mode)
+        hit = self.cache.get(key)
+        if hit is not None:
+            if DEBUG: print(f"[DBG] RETRIEVAL_CACHE hit {key}")
+            return hit
+        top = self._search_topk(fragment, k, min_score, per_variant_limit)
+        self.cache.put(key, top)
+        return top
+
+    def _search_topk(self, fragment: str, k: int, min_score: float, per_variant_limit: Optional[int]) -> List[Dict[str, Any]]:
         limit = per_variant_limit if per_variant_limit is not None else max(k, 5)
 
+        mode = self.effective_mode
+
         pool: Dict[str, Dict[str, Any]] = {}
-        for q in _variants(fragment):
-            rows = self._run_many(q, limit=limit)
-            if DEBUG:
-                print(f"[DBG] FT_QUERY={q!r}  HITS={len(rows)}")
-            for r in rows:
-                try:
-                    if float(r["score"]) < min_score:
-                        continue
-                except Exception:
-                    continue
-
-                rid = r["id"]
-                if rid not in pool or float(r["score"]) > float(pool[rid]["score"]):
-                    pool[rid] = r
-
-            if len(pool) >= 3 * k:
-                break
-
-        # re-rank
-        cands = list(pool.values())
-        for c in cands:
-            c["_rerank"] = self._score_candidate(fragment, c)
-
-        cands.sort(key=lambda x: (x["_rerank"], x["score"]), reverse=True)
-        return cands[:k]
+        if mode != "dense":
+            for q, rows in self._iter_variant_hits(fragment, limit):
+                if DEBUG:
+                    print(f"[DBG] FT_QUERY={q!r}  HITS={len(rows)}")
+                _merge_rows(pool, q, rows, min_score)
+
+                if len(pool) >= 3 * k:
+                    break
+
+            if self.fuzzy is not None and len(pool) < k:
+                _fuzzy_fill(self.fuzzy, fragment, pool, limit)
+
+        if mode != "ft":
+            _dense_fuse(self.dense, fragment, pool, limit)
+
+        return _rerank_pool(self.reranker, fragment, pool, k)
 
     def search_best(self, fragment: str, min_score: float = 3.0) -> Optional[Dict[str, Any]]:
         """Convenience wrapper: return only the best candidate after rerank."""
         top = self.search_topk(fragment, k=5, min_score=min_score)
         return top[0] if top else None
+
+
+def make_retriever(backend: str = RETRIEVER_BACKEND, **kwargs) -> Retriever:
+    """Build the retriever selected by RETRIEVER_BACKEND (neo4j | local)."""
+    if backend == "local":
+        from local_index import LocalRetriever
+        return LocalRetriever(**kwargs)
+    if backend != "neo4j":
+        raise ValueError(f"Unknown RETRIEVER_BACKEND {backend!r} (expected neo4j or local)")
+    return Retriever(**kwargs)
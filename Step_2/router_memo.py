@@ -0,0 +1,116 @@
+# Disk-backed memo for temperature-0 router calls (LLM.route).
+# Key = (system prompt + schema hash, GGUF fingerprint, normalized input); rows written under a
+# different prompt or model are dropped on open, so editing a prompt or swapping the GGUF invalidates it.
+import hashlib, json, os, re, sqlite3, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from config import DEBUG
+
+
+def model_fingerprint(path: str, block: int = 1 << 20) -> str:
+    """Size + mtime + first/last MiB of the model file; cheap even for multi-GB GGUFs."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    h = hashlib.sha1(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        h.update(f.read(block))
+        if st.st_size > block:
+            f.seek(max(block, st.st_size - block))
+            h.update(f.read(block))
+    return h.hexdigest()[:16]
+
+
+def prompt_hash(*parts: Any) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_input(text: str) -> str:
+    t = (text or "").strip().lower()
+    t = re.sub(r'[“”"]', '"', t)
+    t = re.sub(r'[.!?…,;:]+$', '', t)
+    return re.sub(r'\s+', ' ', t)
+
+
+class RouterMemo:
+    def __init__(self, path: str, model_tag: str, prompt_tag: str, max_items: int = 5000, mem_items: int = 256) -> None:
+        self.model_tag, self.prompt_tag = model_tag, prompt_tag
+        self.max_items = max(1, int(max_items))
+        self.mem_items = max(1, int(mem_items))
+        self._mem: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.disk_hits = self.evictions = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, model TEXT, prompt TEXT, "
+                         "value TEXT, used REAL)")
+        # automatic invalidation: anything from another model file or prompt version is stale
+        cur = self._db.execute("DELETE FROM memo WHERE model != ? OR prompt != ?", (model_tag, prompt_tag))
+        self.invalidated = cur.rowcount
+        self._db.commit()
+        if DEBUG and self.invalidated: print(f"[DBG] router memo: dropped {self.invalidated} stale rows")
+
+    def key(self, text: str, *extra: Any) -> str:
+        return hashlib.sha1(json.dumps([self.prompt_tag, self.model_tag, normalize_input(text), *extra])
+                            .encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            val = self._mem.get(key)
+            if val is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return dict(val)
+            row = self._db.execute("SELECT value FROM memo WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            val = json.loads(row[0])
+            self._db.execute("UPDATE memo SET used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self._put_mem(key, val)
+            self.hits += 1; self.disk_hits += 1
+            return dict(val)
+
+    def _put_mem(self, key: str, val: Dict[str, Any]) -> None:
+        self._mem[key] = val
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.mem_items:
+            self._mem.popitem(last=False)
+
+    def put(self, key: str, val: Dict[str, Any]) -> None:
+        with self._lock:
+            self._put_mem(key, dict(val))
+            try:
+                self._db.execute("INSERT OR REPLACE INTO memo (key, model, prompt, value, used) VALUES (?, ?, ?, ?, ?)",
+                                 (key, self.model_tag, self.prompt_tag, json.dumps(val), time.time()))
+                # LRU on disk: drop the least recently used rows past max_items
+                cur = self._db.execute(
+                    "DELETE FROM memo WHERE key IN (SELECT key FROM memo ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_items,),
+                )
+                self.evictions += max(0, cur.rowcount)
+                self._db.commit()
+            except sqlite3.Error as e:
+                if DEBUG: print(f"[DBG] router memo write failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._db.execute("DELETE FROM memo")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM memo").fetchone()[0]
+        return {"size": size, "max_items": self.max_items, "hits": self.hits, "disk_hits": self.disk_hits,
+                "misses": self.misses, "evictions": self.evictions, "invalidated_on_open": self.invalidated,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self) -> None:
+        self._db.close()
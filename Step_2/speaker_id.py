@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Union
 import json, numpy as np
 import soundfile as sf
 
@@ -72,27 +72,34 @@ class SpeakerID:
     def _embed(self, wav: np.ndarray, sr: int) -> np.ndarray:
         if self.model is not None:
             import torch  # type: ignore
-            t = torch.tensor(wav).float().unsqueeze(0)
+            t = torch.from_numpy(np.ascontiguousarray(wav, dtype=np.float32)).unsqueeze(0)   # shares memory
             with torch.no_grad():
                 emb = self.model.encode_batch(t, normalize=True).squeeze(0).squeeze(0).cpu().numpy()
             return _l2(emb.astype(np.float32))
         return _mfcc_embed(wav, sr)
 
-    def enroll(self, name: str, wav_path: str) -> None:
-        wav, sr = sf.read(wav_path)
+    @staticmethod
+    def _mono(audio: Union[str, np.ndarray], sr: Optional[int]) -> Tuple[np.ndarray, int]:
+        """Path (read with soundfile) or an in-memory float32 buffer, used without copying."""
+        if isinstance(audio, str):
+            wav, sr = sf.read(audio, dtype="float32")
+        else:
+            wav = np.asarray(audio, dtype=np.float32)
         if wav.ndim > 1:
             wav = wav.mean(axis=1)
-        emb = self._embed(wav.astype("float32"), int(sr))
+        return wav, int(sr or 16000)
+
+    def enroll(self, name: str, audio: Union[str, np.ndarray], sr: Optional[int] = None) -> None:
+        wav, sr = self._mono(audio, sr)
+        emb = self._embed(wav, sr)
         self.db.add(name, emb)
 
-    def identify(self, wav_path: str) -> Optional[str]:
-        wav, sr = sf.read(wav_path)
-        if wav.ndim > 1:
-            wav = wav.mean(axis=1)
+    def identify(self, audio: Union[str, np.ndarray], sr: Optional[int] = None) -> Optional[str]:
+        wav, sr = self._mono(audio, sr)
         dur = len(wav) / float(sr)
         if dur < 0.8:  # min_seconds gate to avoid junk IDs on interjections
             return None
-        q = self._embed(wav.astype("float32"), int(sr))  # (D,)
+        q = self._embed(wav, sr)                          # (D,)
         names, M = self.db.names_and_matrix()            # M: (N,D)
         if M is None or not names:
             return None
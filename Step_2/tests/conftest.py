@@ -0,0 +1,137 @@
+# Shared fixtures: a tiny quote corpus and an in-memory stand-in for the Neo4j driver.
+# Run from Step_2/:  python -m pytest -q tests
+import json, os, re, sys
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# no disk caches, optional indexes or models while testing
+os.environ.update({
+    "RETRIEVAL_CACHE_SIZE": "0",
+    "RETRIEVAL_CACHE_PATH": "",
+    "USE_FUZZY_FALLBACK": "0",
+    "USE_DENSE": "0",
+    "LLM_GGUF": "",
+    "LLM_GGUF_ROUTER": "",
+    "ROUTER_MEMO_PATH": "",
+    "LLM_PREFIX_CACHE_DIR": "",
+    "NEO4J_RECORD_PATH": "",
+    "NEO4J_REPLAY_PATH": "",
+    "DEBUG_PRINT": "0",
+})
+
+QUOTES: List[Dict[str, Any]] = [
+    {"id": "q1", "quote": "Two things are infinite: the universe and human stupidity; and I'm not sure about the universe.",
+     "people": [{"rel": "MISATTRIBUTED_TO", "name": "Albert Einstein"}]},
+    {"id": "q2", "quote": "Imagination is more important than knowledge.",
+     "people": [{"rel": "SAID_BY", "name": "Albert Einstein"}]},
+    {"id": "q3", "quote": "Knowledge is power.",
+     "people": [{"rel": "SAID_BY", "name": "Francis Bacon"}]},
+    {"id": "q4", "quote": "The only thing we have to fear is fear itself.",
+     "people": [{"rel": "SAID_BY", "name": "Franklin D. Roosevelt"}]},
+    {"id": "q5", "quote": "Don't count your chickens before they hatch.",
+     "people": [{"rel": "SAID_BY", "name": "Aesop"}]},
+    {"id": "q6", "quote": "The universe is under no obligation to make sense to you.",
+     "people": [{"rel": "SAID_BY", "name": "Neil deGrasse Tyson"}]},
+    {"id": "q7", "quote": "Knowledge speaks, but wisdom listens.",
+     "people": [{"rel": "SAID_BY", "name": "Jimi Hendrix"}]},
+]
+
+
+def _row(doc: Dict[str, Any], score: float) -> Dict[str, Any]:
+    return {"id": doc["id"], "quote": doc["quote"], "source": None, "heading_context": None,
+            "status": None, "people": list(doc["people"]), "score": score}
+
+
+def fake_ft(q: str, limit: int, docs: List[Dict[str, Any]] = QUOTES) -> List[Dict[str, Any]]:
+    """Crude Lucene stand-in: 2 points per matched clause, AND/phrase need every clause."""
+    m = re.match(r'^"(?P<body>[^"]*)"(?:~\d+)?$', q.strip())
+    words = (m.group("body") if m else q).split()
+    words = [w.lower() for w in words if w not in ("AND", "OR")]
+    require_all = bool(m) or "AND" in q.split()
+    out = []
+    for d in docs:
+        toks = re.findall(r"[a-z0-9']+", d["quote"].lower())
+        n = sum(any(t.startswith(w[:-1]) for t in toks) if w.endswith("*") else w in toks for w in words)
+        if n and (not require_all or n == len(words)):
+            out.append(_row(d, 2.0 * n + (1.0 if m else 0.0)))
+    out.sort(key=lambda r: (-r["score"], r["id"]))
+    return out[:limit]
+
+
+class _Result:
+    def __init__(self, rows: List[Dict[str, Any]]) -> None:
+        self._rows = rows
+
+    def data(self) -> List[Dict[str, Any]]:
+        return [dict(r) for r in self._rows]
+
+    def single(self):
+        return dict(self._rows[0]) if self._rows else None
+
+    def consume(self) -> None:
+        return None
+
+
+class _Session:
+    def __init__(self, driver: "FakeGraphDriver") -> None:
+        self._driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    def run(self, cypher: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> _Result:
+        from retriever import _CYPHER, _CYPHER_BATCH
+        p = {**(parameters or {}), **kwargs}
+        self._driver.runs += 1
+        if cypher == _CYPHER:
+            return _Result(fake_ft(p["q"], p["limit"]))
+        if cypher == _CYPHER_BATCH:
+            return _Result([{"i": i, **r} for i, q in enumerate(p["queries"]) for r in fake_ft(q, p["limit"])])
+        if cypher.startswith("SHOW INDEXES"):
+            return _Result([{"state": self._driver.index_state}] if self._driver.index_state else [])
+        return _Result([])
+
+
+class FakeGraphDriver:
+    """Answers the retriever's Cypher from QUOTES; counts round trips in `runs`."""
+
+    def __init__(self, index_state: Optional[str] = "ONLINE") -> None:
+        self.index_state = index_state
+        self.runs = 0
+
+    def session(self, **kwargs) -> _Session:
+        return _Session(self)
+
+    def verify_connectivity(self) -> None:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def graph_driver() -> FakeGraphDriver:
+    return FakeGraphDriver()
+
+
+@pytest.fixture
+def index_dir(tmp_path) -> str:
+    """QUOTES written as a local snapshot and built into a BM25 index."""
+    from local_index import SNAPSHOT_FILE, build_index
+    with open(tmp_path / SNAPSHOT_FILE, "w", encoding="utf-8") as f:
+        for d in QUOTES:
+            row = _row(d, 0.0)
+            del row["score"]
+            f.write(json.dumps(row) + "\n")
+    build_index(str(tmp_path))
+    return str(tmp_path)
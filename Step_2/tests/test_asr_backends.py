@@ -0,0 +1,87 @@
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import asr_backends
+from asr_backends import ASRBackend, FasterWhisperBackend, WhisperBackend, make_backend
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        ASRBackend("tiny")
+
+    class NoTranscribe(ASRBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        NoTranscribe("tiny")
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError, match="unknown ASR backend"):
+        make_backend("vosk", "tiny")
+
+
+class FakeWhisperModel:
+    def __init__(self):
+        self.kwargs = None
+
+    def transcribe(self, audio, **kwargs):
+        self.kwargs = kwargs
+        return {"text": " hi there ", "segments": [
+            {"start": 0, "end": 1, "text": " hi there", "avg_logprob": -0.2, "no_speech_prob": 0.1, "tokens": [1, 2],
+             "words": [{"word": " hi", "start": 0, "end": 0.4}, {"word": " there", "start": 0.5, "end": 1}]}]}
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    model = FakeWhisperModel()
+    monkeypatch.setitem(sys.modules, "whisper", SimpleNamespace(load_model=lambda name: model))
+    return model
+
+
+def test_faster_whisper_falls_back_to_whisper(monkeypatch, fake_whisper, capsys):
+    monkeypatch.setattr(asr_backends, "_FW_OK", False)
+    with pytest.raises(ImportError):
+        make_backend("faster_whisper", "tiny", fallback=False)
+    b = make_backend("faster_whisper", "tiny")
+    assert isinstance(b, WhisperBackend) and repr(b) == "whisper:tiny"
+    assert "[WARN] faster-whisper not installed" in capsys.readouterr().out
+
+
+def test_whisper_result_shape(fake_whisper):
+    out = WhisperBackend("tiny").transcribe(np.zeros(16000, np.float32), timestamps=True)
+    assert out["text"] == "hi there"
+    seg = out["segments"][0]
+    assert seg["text"] == "hi there" and seg["tokens"] == [1, 2] and seg["words"][1]["word"] == " there"
+    assert fake_whisper.kwargs["without_timestamps"] is False and fake_whisper.kwargs["fp16"] is False
+
+
+def test_faster_whisper_result_shape(monkeypatch):
+    calls = {}
+
+    class FakeCT2Model:
+        def __init__(self, name, **kwargs):
+            calls["init"] = kwargs
+
+        def transcribe(self, audio, **kwargs):
+            calls["audio"], calls["kwargs"] = audio, kwargs
+            word = SimpleNamespace(word=" hi", start=0.0, end=0.4)
+            seg = SimpleNamespace(start=0.0, end=0.4, text=" hi", avg_logprob=-0.3, no_speech_prob=0.05,
+                                  tokens=[7], words=[word])
+            return iter([seg, seg]), None
+
+    monkeypatch.setattr(asr_backends, "faster_whisper", SimpleNamespace(WhisperModel=FakeCT2Model), raising=False)
+    monkeypatch.setattr(asr_backends, "_FW_OK", True)
+    b = make_backend("faster-whisper", "tiny", compute_type="int8", cpu_threads=2, vad_filter=False)
+    assert isinstance(b, FasterWhisperBackend) and repr(b) == "faster-whisper:tiny:int8"
+    assert calls["init"]["compute_type"] == "int8" and calls["init"]["cpu_threads"] == 2
+
+    out = b.transcribe(np.zeros(100, np.float64), word_timestamps=True)
+    assert out["text"] == "hi hi" and len(out["segments"]) == 2
+    assert out["segments"][0] == {"start": 0.0, "end": 0.4, "text": "hi", "avg_logprob": -0.3, "no_speech_prob": 0.05,
+                                  "tokens": [7], "words": [{"word": " hi", "start": 0.0, "end": 0.4}]}
+    assert calls["audio"].dtype == np.float32
+    assert calls["kwargs"]["beam_size"] == 1 and calls["kwargs"]["vad_filter"] is False
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import asr
+
+
+class FakeBackend:
+    """Returns a scripted whisper-style result and records the audio it was given."""
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.seen = []
+
+    def transcribe(self, audio, language=None, timestamps=False):
+        self.seen.append(audio)
+        segs = [{"tokens": [0] * 5, "start": 0.0, "end": 1.0, "no_speech_prob": 0.01, **s} for s in self.segments]
+        return {"text": " ".join(s["text"] for s in segs).strip(), "segments": segs}
+
+
+@pytest.fixture
+def models(monkeypatch):
+    fast = FakeBackend([{"text": "knowledge is power", "avg_logprob": -0.2}])
+    full = FakeBackend([{"text": "FULL", "avg_logprob": -0.1}])
+    monkeypatch.setattr(asr, "_fast_model", fast)
+    monkeypatch.setattr(asr, "_full_model", full)
+    monkeypatch.setattr(asr, "cascade_stats", {k: 0 for k in asr.cascade_stats})
+    return fast, full
+
+
+@pytest.mark.parametrize("info, ok", [
+    ({"text": "hello there", "avg_logprob": -0.3, "no_speech_prob": 0.1}, True),
+    ({"text": "hello there", "avg_logprob": -1.2, "no_speech_prob": 0.1}, False),
+    ({"text": "hello there", "avg_logprob": -0.3, "no_speech_prob": 0.8}, False),
+    ({"text": "", "avg_logprob": 0.0, "no_speech_prob": 0.9}, True),        # confident silence
+    ({"text": "", "avg_logprob": 0.0, "no_speech_prob": 0.2}, False),
+])
+def test_is_confident(info, ok):
+    assert asr.is_confident(info, min_logprob=-0.6, max_no_speech=0.5) is ok
+
+
+def test_confident_tiny_skips_the_full_model(models):
+    fast, full = models
+    res = asr.transcribe_cascade(np.zeros(16000, np.float32), min_logprob=-0.6, max_no_speech=0.5, segments=False)
+    assert res["tier"] == "fast" and res["text"] == "knowledge is power"
+    assert not full.seen and asr.cascade_metrics()["escalation_rate"] == 0.0
+
+
+def test_unsure_tiny_escalates(models):
+    fast, full = models
+    fast.segments = [{"text": "nollege is pour", "avg_logprob": -1.0}]
+    res = asr.transcribe_cascade(np.zeros(16000, np.float32), min_logprob=-0.6, max_no_speech=0.5, segments=False)
+    assert res["tier"] == "full" and res["text"] == "FULL" and len(full.seen) == 1
+    assert asr.cascade_metrics()["escalation_rate"] == 1.0
+
+
+def test_only_weak_segments_are_redecoded(models):
+    fast, full = models
+    fast.segments = [{"text": "two things", "avg_logprob": -0.1, "start": 0.0, "end": 1.0},
+                     {"text": "are in finite", "avg_logprob": -2.0, "start": 1.0, "end": 2.0},
+                     {"text": "the universe", "avg_logprob": -0.1, "start": 2.0, "end": 3.0}]
+    audio = np.zeros(3 * 16000, np.float32)
+    res = asr.transcribe_cascade(audio, min_logprob=-0.6, max_no_speech=0.5, segments=True)
+    assert res["tier"] == "full-segments" and res["text"] == "two things FULL the universe"
+    assert len(full.seen) == 1 and len(full.seen[0]) == int(1.4 * 16000)      # segment + 0.2 s each side
+    m = asr.cascade_metrics()
+    assert m["segments_redone"] == 1 and m["segment_escalation_rate"] == pytest.approx(1 / 3)
+
+
+def test_token_weighted_confidence(models):
+    fast, _ = models
+    fast.segments = [{"text": "a", "avg_logprob": -2.0, "tokens": [0]},
+                     {"text": "b c d", "avg_logprob": 0.0, "tokens": [0, 0, 0]}]
+    info = asr.transcribe_fast_info(np.zeros(16000, np.float32))
+    assert info["avg_logprob"] == pytest.approx(-0.5)
@@ -0,0 +1,95 @@
+import time
+
+import numpy as np
+
+from asr_stream import StreamingTranscriber
+
+SR = 16000
+
+
+class TimedModel:
+    """Hears word w{i} at [0.5 i, 0.5 i + 0.4] s of the utterance; reads the buffer offset from the transcriber."""
+
+    def __init__(self) -> None:
+        self.st = None
+        self.calls = []
+
+    def transcribe(self, audio, language=None, word_timestamps=True, initial_prompt=None):
+        off = self.st._offset
+        end = off + len(audio) / SR
+        self.calls.append((off, end, initial_prompt))
+        words = [{"word": f" w{i}", "start": 0.5 * i - off, "end": 0.5 * i + 0.4 - off}
+                 for i in range(int(2 * end) + 1) if 0.5 * i >= off - 1e-9 and 0.5 * i + 0.4 <= end]
+        return {"segments": [{"words": words}]}
+
+
+def _transcriber(**kwargs) -> StreamingTranscriber:
+    model = TimedModel()
+    st = StreamingTranscriber(model_getter=lambda: model, sample_rate=SR, **kwargs)
+    model.st = st
+    return st
+
+
+def _words(a: int, b: int) -> str:
+    return " ".join(f"w{i}" for i in range(a, b))
+
+
+def _w(*texts):
+    return [(float(i), float(i) + 0.4, t) for i, t in enumerate(texts)]
+
+
+def test_agree_commits_the_shared_prefix():
+    st = _transcriber()
+    st._pending = _w("The", "only", "thing")
+    st._agree(_w("the", "only,", "think", "we"))
+    assert st.committed_text() == "the only,"
+    assert st.partial_text() == "the only, think we"
+
+
+def test_redecoded_committed_tail_is_not_repeated():
+    st = _transcriber()
+    st._committed = [(0.0, 0.4, "w0"), (0.5, 0.9, "w1")]
+    st._pending = []
+    st._agree(st._decode(np.zeros(SR * 2, np.float32), 0.0, ""))
+    st._agree(st._decode(np.zeros(SR * 2, np.float32), 0.0, ""))
+    assert st.committed_text() == _words(0, 4)
+
+
+def test_finish_without_streaming_decodes_once():
+    st = _transcriber()
+    for _ in range(30):
+        st.feed(np.zeros(SR // 10, np.int16))
+    assert st.finish() == _words(0, 6)
+    assert st.stats["decodes"] == 1 and not st.stats["final_reused"]
+
+
+def _wait(cond, timeout=5.0):
+    t_end = time.time() + timeout
+    while not cond() and time.time() < t_end:
+        time.sleep(0.002)
+    assert cond()
+
+
+def test_streaming_commits_cuts_and_reuses_the_last_hypothesis():
+    st = _transcriber(step_ms=1000, window_s=3).start()
+    partials = []
+    st.on_partial = partials.append
+    for s in range(1, 11):
+        st.feed(np.zeros(SR, np.int16))
+        _wait(lambda: st.stats["decodes"] == s and len(partials) == s)
+    assert st.committed_text().startswith(_words(0, 10))
+    assert st.stats["cuts"] > 0 and st._n <= 4 * SR           # buffer stays near the window
+    assert st.finish() == _words(0, 20)
+    assert st.stats["final_reused"] and st.stats["decodes"] == 10
+
+
+def test_finish_decodes_only_the_uncommitted_tail():
+    st = _transcriber(step_ms=1000, window_s=30).start()
+    for s in range(1, 5):
+        st.feed(np.zeros(SR, np.int16))
+        _wait(lambda: st.stats["decodes"] == s and st._hyp_end is not None and st._hyp_end >= s - 1e-9)
+    st.feed(np.zeros(SR // 2, np.int16))                        # below one step: no streaming decode
+    assert st.finish() == _words(0, 9)
+    off, end, prompt = st._get_model().calls[-1]
+    assert off > 0 and end == 4.5 and prompt.endswith("w5")
+    assert not st.stats["final_reused"]
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from async_retriever import AsyncRetriever
+from conftest import FakeGraphDriver, fake_ft
+from retrieval_cache import RetrievalCache
+from retriever import Retriever, _variants
+
+
+def _retriever(slow=(), cache=None, deadline_s=1.0) -> AsyncRetriever:
+    """AsyncRetriever whose variant queries are answered by fake_ft; `slow` variants never return."""
+    ret = AsyncRetriever(deadline_s=deadline_s, cache=cache)
+
+    async def _run_many(q, limit):
+        if q in slow:
+            await asyncio.sleep(60)
+        await asyncio.sleep(0)
+        return fake_ft(q, limit)
+
+    ret._run_many = _run_many
+    return ret
+
+
+def _run(ret, *args, **kwargs):
+    async def go():
+        try:
+            return await ret.search_topk(*args, **kwargs)
+        finally:
+            await ret.close()
+    return asyncio.run(go())
+
+
+@pytest.mark.parametrize("fragment", ["two things are infinite", "fear itself", "count your chickens"])
+def test_matches_sync_retriever(fragment):
+    want = Retriever(batched=False, driver=FakeGraphDriver()).search_topk(fragment, k=5, min_score=1.0)
+    got = _run(_retriever(), fragment, k=5, min_score=1.0)
+    assert [(r["id"], r["score"], r["_rerank"]) for r in got] == [(r["id"], r["score"], r["_rerank"]) for r in want]
+
+
+def test_deadline_returns_partial_and_skips_cache():
+    fragment = "two things are infinite"
+    slow = _variants(fragment)[1:]
+    cache = RetrievalCache(max_items=8, ttl_s=0, disk_path=None)
+    ret = _retriever(slow=slow, cache=cache, deadline_s=0.2)
+    top = _run(ret, fragment, k=5, min_score=1.0)
+    assert [r["id"] for r in top] == ["q1"]
+    assert ret.deadline_hits == 1 and ret.cancelled == len(slow)
+    assert cache.stats()["size"] == 0
+
+
+def test_early_stop_cancels_outstanding_variants():
+    # the wildcard variant alone matches five quotes, enough for k=1 (3 * k)
+    fragment = "universe knowledge"
+    slow = _variants(fragment)[:-1]
+    ret = _retriever(slow=slow, deadline_s=5.0)
+    top = _run(ret, fragment, k=1, min_score=1.0)
+    assert len(top) == 1
+    assert ret.deadline_hits == 0 and ret.cancelled == len(slow)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from asr import WHISPER_SR, as_whisper_input
+
+
+def test_paths_pass_through():
+    assert as_whisper_input("clip.wav") == "clip.wav"
+
+
+def test_mono_16k_float32_is_not_copied():
+    a = np.random.default_rng(0).standard_normal(WHISPER_SR).astype(np.float32)
+    assert as_whisper_input(a) is a
+
+
+def test_stereo_is_downmixed():
+    a = np.stack([np.ones(100, np.float32), -np.ones(100, np.float32) * 0.5], axis=1)
+    out = as_whisper_input(a)
+    assert out.shape == (100,) and out.dtype == np.float32
+    np.testing.assert_allclose(out, 0.25)
+
+
+@pytest.mark.parametrize("sr", [8000, 44100, 48000])
+def test_resampled_to_16k(sr):
+    t = np.arange(sr) / sr
+    a = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+    out = as_whisper_input(a, sr=sr)
+    assert len(out) == WHISPER_SR and out.dtype == np.float32
+    # still a 440 Hz tone
+    peak = np.argmax(np.abs(np.fft.rfft(out)))
+    assert abs(peak - 440) <= 1
+
+
+def test_speaker_id_uses_the_buffer_in_place(tmp_path, monkeypatch):
+    speaker_id = pytest.importorskip("speaker_id")
+    monkeypatch.setattr(speaker_id, "_SB_OK", False)
+    sid = speaker_id.SpeakerID(str(tmp_path / "speakers.json"))
+    seen = []
+
+    def embed(wav, sr):
+        seen.append(wav)
+        return np.array([1.0, 0.0], np.float32)
+
+    monkeypatch.setattr(sid, "_embed", embed)
+    buf = np.zeros(WHISPER_SR, np.float32)
+    sid.enroll("ana", buf, WHISPER_SR)
+    assert sid.identify(buf, WHISPER_SR) == "ana"
+    assert seen[0] is buf and seen[1] is buf
+    assert sid.identify(buf[:WHISPER_SR // 2], WHISPER_SR) is None       # too short to identify
@@ -0,0 +1,67 @@
+import json
+
+import numpy as np
+import pytest
+
+import batch_transcribe as bt
+
+
+def test_list_inputs(tmp_path):
+    (tmp_path / "a").mkdir()
+    for name in ["a/2.wav", "a/1.FLAC", "b.ogg", "notes.txt"]:
+        (tmp_path / name).write_bytes(b"")
+    manifest = tmp_path / "m.jsonl"
+    manifest.write_text(json.dumps({"audio": "x.wav"}) + "\n\ny.wav\n" + json.dumps({"audio": "x.wav"}) + "\n")
+    got = bt.list_inputs(str(tmp_path), str(manifest))
+    assert got == ["x.wav", "y.wav"] + [str(tmp_path / n) for n in ["a/1.FLAC", "a/2.wav", "b.ogg"]]
+
+
+def test_done_paths_skips_errors_and_torn_lines(tmp_path):
+    out = tmp_path / "t.jsonl"
+    out.write_text(json.dumps({"audio": "a.wav", "text": "hi"}) + "\n" +
+                   json.dumps({"audio": "b.wav", "error": "boom"}) + "\n" + '{"audio": "c.wa')
+    assert bt.done_paths(str(out)) == {"a.wav"}
+    assert bt.done_paths(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_torn_last_line_is_terminated_before_appending(tmp_path):
+    out = tmp_path / "t.jsonl"
+    out.write_text(json.dumps({"audio": "a.wav", "text": "hi"}) + "\n" + '{"audio": "c.wa')
+    s = bt.run([], str(out), "whisper", "tiny", "int8", workers=1, threads=1)
+    assert s["files"] == 0 and out.read_text().endswith("\n")
+
+
+def test_model_ram(monkeypatch):
+    assert bt.model_ram_mb("small.en", "whisper", "int8") == 1100 + bt.AUDIO_RAM_MB
+    assert bt.model_ram_mb("small", "faster_whisper", "int8") == pytest.approx(1100 * bt.INT8_FACTOR + bt.AUDIO_RAM_MB)
+    assert bt.model_ram_mb("large-v3", "faster-whisper", "float32") == 5600 + bt.AUDIO_RAM_MB
+
+
+def test_auto_workers_is_bounded_by_ram_cpus_and_files(monkeypatch):
+    monkeypatch.setattr(bt.os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(bt, "_mem_available_mb", lambda: 1024 + 4 * bt.model_ram_mb("small", "whisper", "int8"))
+    assert bt.auto_workers("small", "whisper", "int8", n_files=100, threads=2) == 4
+    assert bt.auto_workers("small", "whisper", "int8", n_files=100, threads=8) == 2
+    assert bt.auto_workers("small", "whisper", "int8", n_files=3, threads=2) == 3
+    monkeypatch.setattr(bt, "_mem_available_mb", lambda: 100.0)
+    assert bt.auto_workers("large", "whisper", "int8", n_files=100) == 1
+
+
+def test_transcribe_one(tmp_path, monkeypatch):
+    sf = pytest.importorskip("soundfile")
+
+    class Backend:
+        def transcribe(self, audio, language=None, timestamps=False):
+            assert audio.dtype == np.float32 and audio.ndim == 1
+            return {"text": "hello", "segments": [{"start": 0.0, "end": 1.0, "text": "hello", "avg_logprob": -0.1,
+                                                   "no_speech_prob": 0.0, "tokens": [1], "words": []}]}
+
+    monkeypatch.setattr(bt, "_BACKEND", Backend())
+    wav = tmp_path / "clip.wav"
+    sf.write(str(wav), np.zeros((8000 * 2, 2), np.float32), 8000)         # 2 s stereo at 8 kHz
+    row = bt._transcribe_one(str(wav), None, segments=True)
+    assert row["text"] == "hello" and row["duration_s"] == 2.0
+    assert set(row["segments"][0]) == {"start", "end", "text", "avg_logprob", "no_speech_prob"}
+
+    bad = bt._transcribe_one(str(tmp_path / "missing.wav"), None, segments=False)
+    assert bad["audio"].endswith("missing.wav") and "error" in bad
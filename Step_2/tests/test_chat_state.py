@@ -0,0 +1,59 @@
+import llm
+from llm import ChatState, count_tokens
+
+
+def _turns(state: ChatState, n: int, words: int = 20) -> None:
+    for i in range(n):
+        state.add("user", f"Question {i} here. " + "word " * words)
+        state.add("assistant", f"Answer {i} here. " + "word " * words)
+
+
+def test_under_budget_keeps_everything():
+    s = ChatState(budget_tokens=10000, mode="evict")
+    _turns(s, 3)
+    assert len(s.history) == 6 and s.stats["compactions"] == 0
+
+
+def test_evict_drops_oldest_pairs_and_keeps_the_latest_exchange():
+    s = ChatState(budget_tokens=120, mode="evict")
+    _turns(s, 6)
+    assert s.total_tokens <= 120
+    assert s.history[-2]["content"].startswith("Question 5") and s.history[-1]["content"].startswith("Answer 5")
+    assert s.history[0]["role"] == "user"           # pairs are dropped together
+    assert s.summary == "" and s.stats["evicted_msgs"] == 12 - len(s.history)
+
+
+def test_summarize_folds_dropped_turns():
+    s = ChatState(budget_tokens=200, mode="summarize")
+    _turns(s, 6)
+    assert s.total_tokens <= 200
+    assert "user: Question" in s.summary and "word word" not in s.summary    # first sentence only
+    msgs = s.messages("SYSTEM", "next question")
+    assert msgs[0] == {"role": "system", "content": "SYSTEM"}
+    assert msgs[1]["content"].startswith("(Summary of our earlier conversation)") and msgs[2]["role"] == "assistant"
+    assert msgs[-1] == {"role": "user", "content": "next question"}
+
+
+def test_oversized_latest_message_is_truncated():
+    s = ChatState(budget_tokens=60, mode="evict")
+    s.add("user", "short question")
+    s.add("assistant", "long " * 400)
+    assert s.total_tokens <= 60
+    assert s.history[-1]["content"].startswith("long") and s.stats["truncated_msgs"] >= 1
+
+
+def test_prompt_fits_the_context_window(monkeypatch):
+    monkeypatch.setattr(llm, "LLM_CTX", 512)
+    s = ChatState(budget_tokens=10000, mode="evict")
+    _turns(s, 10, words=40)
+    msgs = s.messages("SYSTEM", "huge " * 5000, reserve=128)
+    total = sum(count_tokens(m["content"]) + llm._MSG_OVERHEAD for m in msgs)
+    assert total <= 512 - 128
+    assert s.stats["calls"] == 1 and s.stats["max_replayed"] <= 512 - 128
+
+
+def test_clear():
+    s = ChatState(budget_tokens=60, mode="summarize")
+    _turns(s, 4)
+    s.clear()
+    assert s.history == [] and s.tokens == [] and s.summary == "" and s.total_tokens == 0
@@ -0,0 +1,81 @@
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import dense_index
+from conftest import FakeGraphDriver
+from dense_index import DenseIndex, add_to_dense_index, build_dense_index, load_dense_index
+from local_index import QuoteIndex
+from retriever import Retriever
+
+# tiny "semantic" space: synonyms share a dimension
+_DIMS = [("universe", "cosmos"), ("infinite", "endless"), ("stupidity", "foolishness"),
+         ("knowledge", "learning"), ("power", "strength"), ("fear",), ("chickens", "hens"), ("dogs",)]
+
+
+class BagEncoder:
+    """Deterministic stand-in for the sentence-transformers encoder."""
+
+    def __init__(self, name: str = "bag") -> None:
+        self.name = name
+
+    def encode(self, texts, batch_size: int = 64) -> np.ndarray:
+        out = np.zeros((len(texts), len(_DIMS) + 1), dtype=np.float32)
+        for i, t in enumerate(texts):
+            words = set(re.findall(r"[a-z]+", t.lower()))
+            for j, syns in enumerate(_DIMS):
+                out[i, j] = float(bool(words & set(syns)))
+            out[i, -1] = 0.1
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def dense_dir(index_dir):
+    build_dense_index(index_dir, nlist=2, encoder=BagEncoder())
+    return index_dir
+
+
+def test_paraphrase_search(dense_dir):
+    di = DenseIndex(dense_dir, nprobe=2, encoder=BagEncoder())
+    top = di.search("the cosmos is endless and so is foolishness", limit=2)
+    assert top[0]["id"] == "q1"
+    assert -1.0 <= top[0]["dense"] <= 1.0
+    sims = di.similarity(di.embed("learning is strength"), ["q3", "missing"])
+    assert sims[0] == pytest.approx(1.0, abs=1e-2) and sims[1] is None
+
+
+def test_stale_or_mismatched_index_falls_back(dense_dir, monkeypatch, capsys):
+    monkeypatch.setattr(dense_index, "Encoder", lambda name: BagEncoder("other"))
+    assert load_dense_index(dense_dir) is None
+    assert "[WARN] dense index disabled" in capsys.readouterr().out
+
+    meta_path = Path(dense_dir) / "dn_meta.json"
+    meta = json.loads(meta_path.read_text())
+    meta_path.write_text(json.dumps({**meta, "model": "hash-ngram-256"}))
+    assert load_dense_index(dense_dir) is None
+    assert "rebuild it" in capsys.readouterr().out
+
+
+def test_missing_index_is_none(index_dir):
+    assert load_dense_index(index_dir) is None
+
+
+def test_add_keeps_lexical_tiers_in_sync(dense_dir):
+    new = [{"id": "q8", "quote": "Let sleeping dogs lie.", "people": []},
+           {"id": "q3", "quote": "Knowledge is power.", "people": []}]      # already indexed
+    assert add_to_dense_index(dense_dir, new, encoder=BagEncoder()) == 1
+    di = DenseIndex(dense_dir, nprobe=2, encoder=BagEncoder())
+    assert di.search("dogs", limit=1)[0]["id"] == "q8"
+    assert [r["id"] for r in QuoteIndex(dense_dir).search("sleeping", limit=5)] == ["q8"]
+
+
+def test_hybrid_adds_dense_only_hits(dense_dir):
+    ret = Retriever(driver=FakeGraphDriver())
+    assert ret.effective_mode == "ft"
+    ret.dense = DenseIndex(dense_dir, nprobe=2, encoder=BagEncoder())
+    ret.mode = "hybrid"
+    top = ret.search_topk("cosmos endless foolishness", k=3, min_score=1.0)
+    assert top[0]["id"] == "q1" and top[0]["variant"] == "dense" and top[0]["score"] == 0.0
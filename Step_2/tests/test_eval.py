@@ -0,0 +1,41 @@
+import pytest
+
+from conftest import FakeGraphDriver
+from eval import _pct, evaluate, rank_of
+from retriever import Retriever
+
+SAMPLES = [
+    ("two things are infinite", "q1"),
+    ("fear itself", "q4"),
+    ("count your chickens", "q5"),
+    ("knowledge is power", "q3"),
+    ("nothing like it", "q6"),
+]
+
+
+def test_pct_nearest_rank():
+    vals = [float(v) for v in range(1, 11)]
+    assert _pct(vals, 50) == 5.0
+    assert _pct(vals, 90) == 9.0
+    assert _pct(vals, 99) == 10.0
+    assert _pct(vals, 0) == 1.0
+    assert _pct([], 90) == 0.0
+
+
+def test_rank_of():
+    results = [{"id": "a"}, {"id": " b "}, {}]
+    assert rank_of("b", results) == 2
+    assert rank_of("c", results) is None
+
+
+@pytest.mark.parametrize("runner, concurrency", [("threads", 1), ("threads", 4), ("asyncio", 4)])
+def test_evaluate_quality_is_independent_of_concurrency(runner, concurrency):
+    ret = Retriever(driver=FakeGraphDriver())
+    m = evaluate(ret, SAMPLES, concurrency=concurrency, runner=runner, repeat=2)
+    assert m["n"] == 2 * len(SAMPLES)
+    # the last fragment misses
+    assert m["top1"] == m["top5"] == m["mrr5"] == pytest.approx(4 / 5)
+    assert m["variant_hits"]["miss"]["count"] == 2
+    assert [r["fragment"] for r in m["rows"][:len(SAMPLES)]] == [f for f, _ in SAMPLES]
+    assert m["p50"] <= m["p90"] <= m["p99"] <= m["max"]
+    assert m["qps"] > 0
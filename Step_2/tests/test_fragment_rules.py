@@ -0,0 +1,51 @@
+import pytest
+
+from config import FRAGMENT_RULES_MIN_CONF
+from fragment_rules import extract_fragment_rules
+
+# rules answer on their own
+CONFIDENT = [
+    ("Find the quote: Albert Einstein was almost considered as a superhuman.",
+     "Albert Einstein was almost considered as a superhuman"),
+    ("finish the quote two things are infinite", "two things are infinite"),
+    ("can you please finish the quote that goes I have a dream", "I have a dream"),
+    ("find another quote the only thing we have to fear is fear itself", "the only thing we have to fear is fear itself"),
+    ("search for the quote imagination is more important than knowledge", "imagination is more important than knowledge"),
+    ('Can you look up "to be or not to be" for me', "to be or not to be"),
+    # leading hedges are stripped
+    ("can you find the one that says don't count your chickens", "don't count your chickens"),
+    ("find the quote, I think it was something like knowledge is power", "knowledge is power"),
+    ("find the quote um uh imagination is more important", "imagination is more important"),
+    # no fragment at all
+    ("what is the source of that quote", ""),
+    ("is it disputed?", ""),
+    ("who said this", ""),
+    ("", ""),
+]
+
+# rules defer to the model
+UNSURE = [
+    "find the quote knowledge is power or something",       # hedge left in the fragment
+    "find the quote maybe the universe is infinite",
+    "find the quote to be or not to be by Shakespeare",     # author tail
+    "tell me something about this one",
+    "two things are infinite the universe and human stupidity",     # bare fragment
+    "hmm not sure",
+]
+
+
+@pytest.mark.parametrize("question, fragment", CONFIDENT)
+def test_confident(question, fragment):
+    frag, conf = extract_fragment_rules(question)
+    assert frag == fragment
+    assert conf >= FRAGMENT_RULES_MIN_CONF
+
+
+@pytest.mark.parametrize("question", UNSURE)
+def test_defers_to_model(question):
+    _, conf = extract_fragment_rules(question)
+    assert conf < FRAGMENT_RULES_MIN_CONF
+
+
+def test_short_fragments_are_dropped():
+    assert extract_fragment_rules("find the quote hello there")[0] == ""
@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import FakeGraphDriver
+from fuzzy_index import FuzzyIndex, build_fuzzy_index, load_fuzzy_index, phonetic_key
+from reranker import Reranker
+from retriever import Retriever, _rerank_pool
+
+
+@pytest.fixture
+def fuzzy(index_dir):
+    assert load_fuzzy_index(index_dir) is None      # not built yet
+    build_fuzzy_index(index_dir)
+    return load_fuzzy_index(index_dir)
+
+
+def test_phonetic_key_collisions():
+    assert phonetic_key("jira") == phonetic_key("zira")
+    assert phonetic_key("knight") == phonetic_key("night")
+    assert phonetic_key("phone") == phonetic_key("fone")
+    assert phonetic_key("universe") != phonetic_key("stupidity")
+
+
+@pytest.mark.parametrize("fragment, qid", [
+    ("too things are in finite", "q1"),      # split word
+    ("imajination", "q2"),                   # misspelling
+    ("fear it self", "q4"),
+    ("count your chikens", "q5"),
+])
+def test_finds_misheard_fragments(fuzzy, fragment, qid):
+    top = fuzzy.search(fragment, limit=3)
+    assert top[0]["id"] == qid
+    assert 0.0 < top[0]["fuzzy"] <= 1.0
+    assert "score" not in top[0]
+
+
+def test_no_match_below_min_sim(fuzzy):
+    assert fuzzy.search("xylophone quartz", limit=3) == []
+    assert fuzzy.search("", limit=3) == []
+
+
+def test_fuzzy_fills_gaps_only(fuzzy):
+    ret = Retriever(driver=FakeGraphDriver())
+    ret.fuzzy = fuzzy
+    top = ret.search_topk("power imajination", k=5, min_score=1.0)
+    assert [(r["id"], r["variant"]) for r in top] == [("q3", "power* imajination*"), ("q2", "fuzzy")]
+    assert top[1]["score"] == 0.0
+
+
+def test_fuzzy_never_outranks_ft():
+    pool = {
+        "ft": {"id": "ft", "quote": "Something else entirely.", "score": 0.5, "variant": "knowledge*"},
+        "fz": {"id": "fz", "quote": "Knowledge is power.", "score": 0.0, "fuzzy": 1.0, "variant": "fuzzy"},
+    }
+    top = _rerank_pool(Reranker(), "knowledge power", pool, k=2)
+    assert top[1]["_rerank"] > top[0]["_rerank"]        # fuzzy row scores higher on its own
+    assert [r["id"] for r in top] == ["ft", "fz"]
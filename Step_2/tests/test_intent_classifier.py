@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import intent_classifier as ic
+
+
+@pytest.fixture(scope="module")
+def model():
+    pytest.importorskip("sklearn")
+    return ic.train()
+
+
+def test_normalize_keeps_decimals():
+    assert ic.normalize("  Set my Volume to 0.4, PLEASE! ") == "set my volume to 0.4 please"
+    assert ic.normalize("I’m   done.") == "i'm done"
+
+
+def test_char_ngrams_match_sklearn_char_wb():
+    text_mod = pytest.importorskip("sklearn.feature_extraction.text")
+    analyzer = text_mod.TfidfVectorizer(analyzer="char_wb", ngram_range=ic.NGRAMS, lowercase=False).build_analyzer()
+    for t in ["set my voice to zira", "a bit faster", "i", "hi yo"]:
+        assert ic.char_ngrams(t) == analyzer(t)
+
+
+def test_compiled_model_matches_sklearn(model):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    data = ic.generate()
+    vec = TfidfVectorizer(analyzer="char_wb", ngram_range=ic.NGRAMS, sublinear_tf=True, lowercase=False)
+    X = vec.fit_transform([ic.normalize(t) for t, _ in data])
+    clf = LogisticRegression(C=20.0, max_iter=3000).fit(X, [y for _, y in data])
+    for t, _ in ic.HELD_OUT[:8]:
+        want = clf.predict_proba(vec.transform([ic.normalize(t)]))[0]
+        np.testing.assert_allclose(model.proba(t), want, atol=1e-4)
+
+
+def test_held_out_accuracy(model):
+    acc = sum(model.predict(t)[0] == y for t, y in ic.HELD_OUT) / len(ic.HELD_OUT)
+    assert acc >= 0.9
+
+
+def test_save_load_round_trip(model, tmp_path, monkeypatch):
+    path = str(tmp_path / "clf.pkl")
+    ic.save(model, path)
+    monkeypatch.setattr(ic, "_MODEL", None)
+    monkeypatch.setattr(ic, "_LOAD_FAILED", False)
+    loaded = ic.load(path)
+    assert loaded.version == ic.data_version()
+    assert loaded.predict("louder please") == pytest.approx(model.predict("louder please"))
+
+
+def test_missing_model_disables_the_classifier(tmp_path, monkeypatch):
+    monkeypatch.setattr(ic, "_MODEL", None)
+    monkeypatch.setattr(ic, "_LOAD_FAILED", False)
+    assert ic.load(str(tmp_path / "none.pkl")) is None
+    assert ic.classify_intent("hello") is None
+
+
+@pytest.mark.parametrize("intent, text, slots", [
+    ("provide_name", "hello my name is jane doe please", {"name": "Jane Doe"}),
+    ("set_voice", "use the jira voice", {"voice": "Zira"}),
+    ("set_rate", "set my speed to 160", {"rate": 160}),
+    ("set_rate", "make my pace very slow", {"rate": "very slow"}),
+    ("bump_rate", "you're talking too fast", {"direction": "slower"}),
+    ("set_volume", "put my volume at 0.4", {"volume": 0.4}),
+    ("bump_volume", "a bit softer", {"direction": "softer"}),
+    ("bump_volume", "turn it down", {"direction": "quieter"}),
+])
+def test_extract_slots(intent, text, slots):
+    assert ic.extract_slots(intent, text) == slots
+
+
+def test_templates_agree_with_main_regexes():
+    assert ic.check_main_regexes() == []
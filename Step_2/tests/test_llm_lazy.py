@@ -0,0 +1,37 @@
+import pytest
+
+import llm
+from llm import LLM, LLMUnavailable
+
+
+def test_missing_model_surfaces_as_llm_unavailable():
+    bot = LLM()                     # returns at once; the load runs in the background
+    with pytest.raises(LLMUnavailable, match="LLM_GGUF"):
+        llm._model()
+    t = llm.startup_timings()
+    assert t["llm_ready"] is False and "LLM_GGUF" in t["llm_error"]
+    assert not llm.llm_ready()
+    assert bot.chat_states == {}
+
+
+@pytest.mark.parametrize("text, fragment, action", [
+    ("find the quote knowledge is power or something", "knowledge is power or something", "search_db"),
+    ("two things are infinite the universe", "two things are infinite the universe", "search_db"),
+    ("who said this?", "", "clarify"),
+])
+def test_route_falls_back_to_the_rules(text, fragment, action):
+    bot = LLM()
+    assert bot.route(text) == {"fragment": fragment, "fields": [], "action": action}
+    assert bot.route_stats["unavailable"] == 1 and bot.route_stats["calls"] == 0
+
+
+def test_extract_fragment_without_a_model():
+    bot = LLM()
+    assert bot.extract_fragment("finish the quote two things are infinite") == "two things are infinite"
+    assert bot.extract_fragment("to be or not to be by Shakespeare") == "to be or not to be by Shakespeare"
+    assert bot.fragment_stats["rules"] == 1 and bot.fragment_stats["llm"] == 1
+
+
+def test_count_tokens_estimate_before_load():
+    assert llm.count_tokens("") == 0
+    assert llm.count_tokens("x" * 40) == 11
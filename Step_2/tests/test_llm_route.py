@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import llm
+from llm import LLM
+
+
+@pytest.fixture
+def router(monkeypatch):
+    """LLM whose route() completion returns `router.reply`; calls are recorded in `router.calls`."""
+    bot = LLM()
+    bot.reply = ""
+    bot.calls = []
+
+    def _complete(kind, messages, deadline_s=None, slot=None, **kwargs):
+        bot.calls.append((kind, messages, kwargs))
+        return bot.reply
+
+    monkeypatch.setattr(llm, "_complete", _complete)
+    return bot
+
+
+def test_one_constrained_call_serves_all_three_routers(router):
+    router.reply = json.dumps({"action": "search_db", "fields": ["said_by"], "fragment": "knowledge is power"})
+    q = "who said knowledge is power or something"
+    assert router.decide_action(q, False) == {"action": "search_db", "query": "knowledge is power"}
+    assert router.extract_requested_fields(q, False) == ["said_by"]
+    assert router.extract_fragment(q, False) == "knowledge is power"
+    assert len(router.calls) == 1 and router.route_stats["memo_hits"] == 2
+    kind, messages, kwargs = router.calls[0]
+    assert kind == "route" and kwargs["temperature"] == 0.0
+    assert kwargs["response_format"]["schema"] == llm.ROUTE_SCHEMA
+    assert messages[1]["content"] == f"has_context=false user: {q}"
+
+
+def test_output_is_cleaned_and_clamped(router):
+    router.reply = json.dumps({"action": "dance", "fields": ["said_by", "shoe_size", " source "],
+                               "fragment": " search: two things are infinite. "})
+    r = router.route("anything")
+    assert r == {"fragment": "two things are infinite", "fields": ["said_by", "source"], "action": "clarify"}
+
+
+def test_short_fragment_is_dropped(router):
+    router.reply = json.dumps({"action": "search_db", "fields": [], "fragment": "be good"})
+    assert router.route("be good")["fragment"] == ""
+
+
+def test_truncated_json_is_salvaged(router):
+    router.reply = '{"action": "reset", "fields": [], "fragment": ""} {"action": '
+    assert router.route("start over")["action"] == "reset"
+    assert router.route_stats["parse_failures"] == 1
+
+
+def test_memo_is_per_turn(router):
+    router.reply = json.dumps({"action": "clarify", "fields": [], "fragment": ""})
+    router.route("who said this?", False)
+    router.route("who said this?", True)
+    router.route("who said this?", True)
+    assert len(router.calls) == 2
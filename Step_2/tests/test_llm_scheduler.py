@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from llm_scheduler import DeadlineExceeded, LLMScheduler
+
+
+def _blocked(sched: LLMScheduler):
+    """Occupy the worker until the returned event is set."""
+    gate, started = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        gate.wait(5)
+
+    threading.Thread(target=sched.call, args=("hold", hold, 0), daemon=True).start()
+    started.wait(5)
+    return gate
+
+
+def _submit(sched, results, kind, priority, fn, deadline_s=None):
+    def run():
+        try:
+            results[kind] = sched.call(kind, fn, priority, deadline_s)
+        except Exception as e:
+            results[kind] = e
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    return t
+
+
+def _wait_depth(sched, n):
+    t_end = time.time() + 5
+    while sched.depth() < n and time.time() < t_end:
+        time.sleep(0.005)
+
+
+def test_lower_priority_value_runs_first():
+    sched = LLMScheduler()
+    gate = _blocked(sched)
+    order, results = [], {}
+    threads = []
+    for i, (kind, prio) in enumerate([("answer", 2), ("chat", 2), ("route", 0), ("facts", 1)]):
+        threads.append(_submit(sched, results, kind, prio, lambda k=kind: order.append(k)))
+        _wait_depth(sched, i + 1)
+    gate.set()
+    for t in threads:
+        t.join(5)
+    assert order == ["route", "facts", "answer", "chat"]     # FIFO within a priority
+
+
+def test_stale_requests_are_dropped_unserved():
+    sched = LLMScheduler()
+    gate = _blocked(sched)
+    ran, results = [], {}
+    t = _submit(sched, results, "route", 0, lambda: ran.append(1), deadline_s=0.05)
+    _wait_depth(sched, 1)
+    time.sleep(0.1)
+    gate.set()
+    t.join(5)
+    assert isinstance(results["route"], DeadlineExceeded) and not ran
+    assert sched.stats()["kinds"]["route"]["dropped"] == 1
+
+
+def test_failures_reach_the_caller():
+    sched = LLMScheduler()
+    with pytest.raises(ZeroDivisionError):
+        sched.call("facts", lambda: 1 / 0)
+    assert sched.call("facts", lambda: 42) == 42
+    assert sched.stats()["kinds"]["facts"]["failed"] == 1
+
+
+def test_stream_runs_on_one_thread_and_stops_when_closed():
+    sched = LLMScheduler(name="llm-test")
+    produced, closed = [], threading.Event()
+
+    def gen():
+        try:
+            for i in range(1000):
+                produced.append(threading.current_thread().name)
+                yield i
+                time.sleep(0.001)
+        finally:
+            closed.set()
+
+    it = sched.stream("answer", gen)
+    assert [next(it) for _ in range(3)] == [0, 1, 2]
+    it.close()
+    assert closed.wait(5)
+    assert len(produced) < 1000 and set(produced) == {"llm-test"}
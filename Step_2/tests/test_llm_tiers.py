@@ -0,0 +1,41 @@
+import pytest
+
+import llm
+
+
+@pytest.fixture
+def restore_router(monkeypatch):
+    monkeypatch.setattr(llm, "_ROUTER", llm._ROUTER)
+    monkeypatch.setattr(llm, "_MEMO", None)
+
+
+def test_single_model_serves_every_kind():
+    for kind in ("route", "intent", "facts", "answer", "chat"):
+        assert llm._slot_for(kind) is llm._MAIN
+
+
+def test_router_kinds_go_to_the_small_model(tmp_path, restore_router):
+    llm.set_router_model(str(tmp_path / "router.gguf"))
+    router = llm._slot_for("route")
+    assert router is not llm._MAIN and router.name == "router"
+    assert llm._slot_for("intent") is router
+    assert llm._slot_for("answer") is llm._slot_for("facts") is llm._MAIN
+    assert router.warm == [llm.SYSTEM_ROUTE]
+    assert router.llama_kwargs["chat_template"] is None      # the router GGUF's own template
+
+    with pytest.raises(llm.LLMUnavailable, match="LLM_GGUF_ROUTER"):
+        router.get()
+    assert "router_error" in llm.startup_timings()
+    assert llm.LLM().route("who said this?")["action"] == "clarify"
+
+
+def test_unset_or_same_path_keeps_one_model(restore_router):
+    llm.set_router_model(None)
+    assert llm._slot_for("route") is llm._MAIN
+    llm.set_router_model(llm._MAIN.path)
+    assert llm._slot_for("route") is llm._MAIN
+
+
+def test_priorities():
+    p = llm.PRIORITY
+    assert p["route"] == p["intent"] < p["facts"] < p["answer"] == p["chat"] < p["warmup"]
@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pytest
+
+from conftest import QUOTES
+from local_index import BM25_B, BM25_K1, LocalRetriever, QuoteIndex
+from retriever import _clean_tokens
+
+
+def _bm25(term: str) -> dict:
+    """Textbook BM25 for a single term over QUOTES, keyed by quote id."""
+    toks = {d["id"]: _clean_tokens(d["quote"]) for d in QUOTES}
+    avgdl = sum(map(len, toks.values())) / len(toks)
+    df = sum(term in t for t in toks.values())
+    idf = math.log(1 + (len(toks) - df + 0.5) / (df + 0.5))
+    out = {}
+    for qid, t in toks.items():
+        tf = t.count(term)
+        if tf:
+            out[qid] = idf * tf / (tf + BM25_K1 * (1 - BM25_B + BM25_B * len(t) / avgdl))
+    return out
+
+
+@pytest.fixture
+def qindex(index_dir):
+    return QuoteIndex(index_dir)
+
+
+def test_single_term_is_bm25(qindex):
+    got = {r["id"]: r["score"] for r in qindex.search("knowledge", limit=10)}
+    want = _bm25("knowledge")
+    assert got.keys() == want.keys() == {"q2", "q3", "q7"}
+    for qid in want:
+        assert got[qid] == pytest.approx(want[qid], rel=1e-5)
+    # shortest doc ranks first
+    assert qindex.search("knowledge", limit=1)[0]["id"] == "q3"
+
+
+def test_and_requires_every_term(qindex):
+    assert [r["id"] for r in qindex.search("universe AND stupidity", limit=10)] == ["q1"]
+    assert {r["id"] for r in qindex.search("universe stupidity", limit=10)} == {"q1", "q6"}
+
+
+def test_phrase_and_slop(qindex):
+    assert [r["id"] for r in qindex.search('"things infinite"', limit=10)] == ["q1"]
+    assert qindex.search('"infinite things"', limit=10) == []
+    # "universe human stupidity" in the doc, "universe stupidity" needs one slop
+    assert qindex.search('"universe stupidity"', limit=10) == []
+    assert [r["id"] for r in qindex.search('"universe stupidity"~1', limit=10)] == ["q1"]
+
+
+def test_wildcard_is_constant_score(qindex):
+    scores = qindex.score("know*")
+    hit = np.flatnonzero(scores > 0)
+    assert {qindex.docs[i]["id"] for i in hit} == {"q2", "q3", "q7"}
+    assert np.all(scores[hit] == 1.0)
+
+
+def test_limit_keeps_the_best(qindex):
+    full = qindex.search("universe", limit=10)
+    assert qindex.search("universe", limit=1) == full[:1]
+
+
+def test_local_retriever_search_topk(index_dir):
+    ret = LocalRetriever(index_dir)
+    top = ret.search_topk("two things are infinite the universe", k=3, min_score=0.1)
+    assert top[0]["id"] == "q1"
+    assert top[0]["people"][0]["name"] == "Albert Einstein"
+    assert ret.health()["ok"] and ret.health()["docs"] == len(QUOTES)
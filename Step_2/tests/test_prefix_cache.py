@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+
+import llm
+from prefix_cache import PrefixCache, TTFTStats
+
+
+class FakeLlama:
+    """Context is the list of messages evaluated so far; states are copies of it."""
+
+    def __init__(self) -> None:
+        self.ctx = []
+        self.loads = 0
+
+    def create_chat_completion(self, messages, stream=False, **kwargs):
+        self.ctx = [m["content"] for m in messages]
+        if not stream:
+            return {"choices": [{"message": {"content": "x"}}]}
+        self.ctx.append("answer")
+        return iter([{"choices": [{"delta": {"content": "ans"}}]}, {"choices": [{"delta": {"content": "wer"}}]}])
+
+    def save_state(self):
+        return list(self.ctx)
+
+    def load_state(self, state) -> None:
+        self.ctx = list(state)
+        self.loads += 1
+
+
+@pytest.fixture
+def slot():
+    fake = FakeLlama()
+    return SimpleNamespace(name="t", llama=fake, get=lambda: fake, prefix=PrefixCache(fake, "model.gguf"))
+
+
+def _ask(slot, system: str, user: str = "hi") -> str:
+    msgs = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+    return "".join(llm._generate(slot, "answer", msgs, 0.0, {}))
+
+
+def test_state_is_captured_after_the_system_prefill(slot):
+    assert _ask(slot, "SYS-A") == "answer"
+    key = slot.prefix._key("SYS-A")
+    # system prompt + empty user turn, not the whole first exchange
+    assert slot.prefix._states[key] == ["SYS-A", ""]
+
+
+def test_resident_restore_and_miss_are_counted_apart(slot):
+    _ask(slot, "SYS-A")             # miss, prime
+    _ask(slot, "SYS-A")             # still in the context
+    _ask(slot, "SYS-B")             # miss, prime
+    _ask(slot, "SYS-A")             # load_state
+    st = slot.prefix.stats()
+    assert (st["misses"], st["primes"], st["resident"], st["restores"]) == (2, 2, 1, 1)
+    assert slot.llama.loads == 1
+    assert st["hit_rate"] == pytest.approx(2 / 4) and st["restore_rate"] == pytest.approx(1 / 4)
+
+
+def test_lru_bound():
+    pc = PrefixCache(FakeLlama(), "model.gguf", max_items=2)
+    for s in ("a", "b", "c"):
+        pc.prime(s, lambda: None)
+    assert not pc.has("a") and pc.has("b") and pc.has("c")
+
+
+def test_states_survive_restart(tmp_path):
+    model = tmp_path / "m.gguf"
+    model.write_bytes(b"gguf")
+    first = FakeLlama()
+    pc = PrefixCache(first, str(model), disk_dir=str(tmp_path / "states"))
+    pc.prime("SYS", lambda: llm._prefill(first, "SYS"))
+
+    second = FakeLlama()
+    pc2 = PrefixCache(second, str(model), disk_dir=str(tmp_path / "states"))
+    assert pc2.has("SYS") and pc2.restore("SYS")
+    assert second.ctx == ["SYS", ""] and pc2.stats()["disk_loads"] == 1
+
+
+def test_ttft_summary():
+    t = TTFTStats()
+    for v in (0.1, 0.2, 0.3):
+        t.add("route", v, 2 * v)
+    s = t.summary()["route"]
+    assert s["n"] == 3 and s["ttft_p50_ms"] == pytest.approx(200) and s["total_p50_ms"] == pytest.approx(400)
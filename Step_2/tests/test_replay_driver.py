@@ -0,0 +1,57 @@
+import gzip
+
+import pytest
+
+from conftest import FakeGraphDriver
+from replay_driver import RecordingDriver, ReplayDriver, ReplayMiss, exchange_key, load_tape, open_driver
+from retriever import _CYPHER, Retriever
+
+FRAGMENTS = ["two things are infinite", "fear itself", "count your chickens", "nothing matches"]
+
+
+def _results(driver, batched: bool):
+    ret = Retriever(batched=batched, driver=driver)
+    return [[(r["id"], r["score"], r["_rerank"]) for r in ret.search_topk(f, k=5, min_score=1.0)] for f in FRAGMENTS]
+
+
+def test_exchange_key_normalizes():
+    assert exchange_key("RETURN  1\n", {"a": 1, "b": 2}) == exchange_key("RETURN 1", {"b": 2, "a": 1})
+    assert exchange_key("RETURN 1", {"a": 1}) != exchange_key("RETURN 1", {"a": 2})
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_record_then_replay_round_trip(tmp_path, batched):
+    tape = str(tmp_path / "tape.jsonl.gz")
+    live = _results(RecordingDriver(FakeGraphDriver(), tape), batched)
+
+    replay = ReplayDriver(tape, strict=True)
+    assert _results(replay, batched) == live
+    assert replay.misses == 0 and replay.hits > 0
+
+
+def test_recording_skips_known_exchanges(tmp_path):
+    tape = str(tmp_path / "tape.jsonl.gz")
+    _results(RecordingDriver(FakeGraphDriver(), tape), True)
+    n = len(load_tape(tape))
+    again = RecordingDriver(FakeGraphDriver(), tape)
+    _results(again, True)
+    assert again.recorded == 0
+    with gzip.open(tape, "rt", encoding="utf-8") as f:
+        assert sum(1 for _ in f) == n
+
+
+def test_replay_miss(tmp_path):
+    tape = str(tmp_path / "empty.jsonl.gz")
+    lenient = ReplayDriver(tape)
+    with lenient.session() as sess:
+        assert sess.run(_CYPHER, {"index": "x", "q": "y", "limit": 1}).data() == []
+    assert lenient.misses == 1
+
+    with pytest.raises(ReplayMiss):
+        with ReplayDriver(tape, strict=True).session() as sess:
+            sess.run(_CYPHER, {"index": "x", "q": "y", "limit": 1})
+
+
+def test_open_driver_replay_needs_no_server(tmp_path):
+    drv = open_driver("neo4j://nowhere:1", ("u", "p"), replay_path=str(tmp_path / "t.jsonl.gz"))
+    assert isinstance(drv, ReplayDriver)
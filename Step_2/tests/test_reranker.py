@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+import pytest
+
+from conftest import QUOTES
+from reranker import Reranker
+from retriever import Retriever
+
+FRAGMENTS = ["two things are infinite the universe", "knowledge is power", "fear itself", "zebra"]
+
+
+def _pool(seed: int = 0):
+    rng = random.Random(seed)
+    pool = [{"id": d["id"], "quote": d["quote"], "score": rng.uniform(0, 15)} for d in QUOTES]
+    pool.append({"id": None, "quote": "The universe is big.", "score": 4.0})     # no id, not cached
+    pool.append({"id": "bad", "quote": "Knowledge is power.", "score": "n/a"})   # unparsable score
+    return pool
+
+
+@pytest.mark.parametrize("fragment", FRAGMENTS)
+def test_matches_per_pair_scorer(fragment):
+    pool = _pool()
+    want = [Retriever._score_candidate(None, fragment, c) for c in pool]
+    rr = Reranker(dense_weight=0.0)
+    np.testing.assert_allclose(rr.score(fragment, pool), want)
+    # warm token cache gives the same answer
+    np.testing.assert_allclose(rr.score(fragment, pool), want)
+
+
+def test_empty_pool():
+    assert Reranker().score("anything", []).shape == (0,)
+
+
+def test_quote_cache_is_bounded():
+    rr = Reranker(max_cached=3)
+    rr.score("knowledge", _pool())
+    assert len(rr._quotes) == 3
+    rr.clear()
+    assert not rr._quotes and not rr._vocab
+
+
+def test_dense_is_blended_into_score_term():
+    cand = {"id": "q3", "quote": "Knowledge is power.", "score": 10.0, "dense": 0.0}
+    rr = Reranker(dense_weight=0.5)
+    ft_only = Reranker(dense_weight=0.0).score("knowledge power", [cand])[0]
+    assert rr.score("knowledge power", [cand])[0] == pytest.approx(ft_only - 0.35 * 0.5)
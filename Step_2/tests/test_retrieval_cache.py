@@ -0,0 +1,78 @@
+import retrieval_cache
+from conftest import FakeGraphDriver
+from retrieval_cache import RetrievalCache
+from retriever import Retriever
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction():
+    c = RetrievalCache(max_items=2, ttl_s=0, disk_path=None)
+    c.put("a", [{"id": "a"}])
+    c.put("b", [{"id": "b"}])
+    assert c.get("a") == [{"id": "a"}]      # a is now most recent
+    c.put("c", [{"id": "c"}])
+    assert c.get("b") is None
+    assert c.get("a") is not None and c.get("c") is not None
+    assert c.stats()["evictions"] == 1 and c.stats()["size"] == 2
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(retrieval_cache.time, "time", clock)
+    c = RetrievalCache(max_items=8, ttl_s=10, disk_path=None)
+    c.put("a", [{"id": "a"}])
+    clock.now += 9
+    assert c.get("a") is not None
+    clock.now += 2
+    assert c.get("a") is None
+    assert c.stats()["expirations"] == 1 and c.stats()["size"] == 0
+
+
+def test_values_are_copies():
+    c = RetrievalCache(max_items=4, ttl_s=0, disk_path=None)
+    val = [{"id": "a", "score": 1.0}]
+    c.put("a", val)
+    val[0]["score"] = 99.0
+    got = c.get("a")
+    got[0]["score"] = -1.0
+    assert c.get("a") == [{"id": "a", "score": 1.0}]
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    c = RetrievalCache(max_items=4, ttl_s=0, disk_path=path)
+    c.put("a", [{"id": "a"}])
+    c.close()
+    c = RetrievalCache(max_items=4, ttl_s=0, disk_path=path)
+    assert c.get("a") == [{"id": "a"}]
+    assert c.stats()["disk_hits"] == 1
+    c.invalidate()
+    assert c.get("a") is None
+    c.close()
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    c = RetrievalCache(max_items=1, ttl_s=0, disk_path=str(tmp_path / "cache.sqlite"), max_disk_items=2)
+    for k in "abc":
+        c.put(k, [{"id": k}])
+    assert c._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 2
+    c.close()
+
+
+def test_search_topk_served_from_cache():
+    cache = RetrievalCache(max_items=8, ttl_s=0, disk_path=None)
+    ret = Retriever(batched=True, cache=cache, driver=FakeGraphDriver())
+    first = ret.search_topk("Two things are INFINITE!", k=3, min_score=1.0)
+    # same normalized tokens -> no second round trip
+    again = ret.search_topk("two things are infinite", k=3, min_score=1.0)
+    assert again == first and ret.driver.runs == 1
+    ret.invalidate_cache()
+    ret.search_topk("two things are infinite", k=3, min_score=1.0)
+    assert ret.driver.runs == 2
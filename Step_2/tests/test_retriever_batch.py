@@ -0,0 +1,44 @@
+import pytest
+
+from conftest import FakeGraphDriver
+from retriever import Retriever, _variants
+
+FRAGMENTS = [
+    "two things are infinite",
+    "the universe",
+    "knowledge",
+    "fear itself",
+    "count your chickens",
+    "nothing matches this",
+]
+
+
+def _search(batched: bool, fragment: str, k: int):
+    ret = Retriever(batched=batched, driver=FakeGraphDriver())
+    return ret.search_topk(fragment, k=k, min_score=1.0), ret.driver.runs
+
+
+@pytest.mark.parametrize("k", [1, 5])
+@pytest.mark.parametrize("fragment", FRAGMENTS)
+def test_batched_matches_sequential(fragment, k):
+    seq, _ = _search(False, fragment, k)
+    bat, _ = _search(True, fragment, k)
+    assert [(r["id"], r["score"], r["variant"], r["_rerank"]) for r in bat] == \
+           [(r["id"], r["score"], r["variant"], r["_rerank"]) for r in seq]
+    assert all("i" not in r for r in bat)
+
+
+def test_batched_is_one_round_trip():
+    fragment = "two things are infinite"
+    _, seq_runs = _search(False, fragment, k=5)
+    _, bat_runs = _search(True, fragment, k=5)
+    assert bat_runs == 1
+    assert seq_runs == len(_variants(fragment))
+
+
+def test_variants_order():
+    assert _variants("the universe and human stupidity") == [
+        '"universe human stupidity"', '"universe human stupidity"~3',
+        "universe AND human AND stupidity", "universe* human* stupidity*",
+    ]
+    assert _variants("the") == []
@@ -0,0 +1,41 @@
+import pytest
+
+from conftest import FakeGraphDriver
+from retriever import Retriever, make_retriever
+
+
+def test_warm_up_opens_connections_and_queries_index():
+    ret = Retriever(driver=FakeGraphDriver())
+    out = ret.warm_up(n_conns=3)
+    assert set(out) == {"connect_ms", "index_ms"}
+    # 3 pings + 1 FT query, each in its own session
+    assert ret.driver.runs == 4
+    stats = ret.pool_stats()
+    assert stats["sessions"] == 4 and stats["in_use"] == 0
+    assert 1 <= stats["peak_in_use"] <= 3
+
+
+def test_health_online():
+    h = Retriever(driver=FakeGraphDriver()).health()
+    assert h["ok"] and h["index_state"] == "ONLINE" and "error" not in h
+    assert h["backend"] == "neo4j" and h["latency_ms"] >= 0
+
+
+@pytest.mark.parametrize("state, msg", [("POPULATING", "is POPULATING"), (None, "is missing")])
+def test_health_index_not_ready(state, msg):
+    h = Retriever(driver=FakeGraphDriver(index_state=state)).health()
+    assert not h["ok"] and msg in h["error"]
+
+
+def test_health_connection_error():
+    class Down(FakeGraphDriver):
+        def verify_connectivity(self):
+            raise ConnectionError("refused")
+
+    h = Retriever(driver=Down()).health()
+    assert not h["ok"] and h["error"] == "ConnectionError: refused"
+
+
+def test_make_retriever_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        make_retriever("elastic")
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+import llm
+from router_memo import RouterMemo, model_fingerprint, normalize_input
+
+VAL = {"fragment": "knowledge is power", "fields": ["said_by"], "action": "search_db"}
+
+
+def test_normalized_inputs_share_a_key(tmp_path):
+    m = RouterMemo(str(tmp_path / "memo.sqlite"), "m", "p")
+    assert normalize_input("  Who said  “Knowledge is power”?! ") == 'who said "knowledge is power"'
+    assert m.key("Knowledge is power.", False) == m.key("knowledge is power", False)
+    assert m.key("knowledge is power", False) != m.key("knowledge is power", True)
+
+
+def test_persists_and_invalidates_on_model_or_prompt_change(tmp_path):
+    path = str(tmp_path / "memo.sqlite")
+    m = RouterMemo(path, "m1", "p1")
+    m.put(m.key("x", False), VAL)
+    m.close()
+
+    m = RouterMemo(path, "m1", "p1")
+    assert m.get(m.key("x", False)) == VAL and m.stats()["disk_hits"] == 1
+    m.close()
+
+    m = RouterMemo(path, "m2", "p1")
+    assert m.invalidated == 1 and m.get(m.key("x", False)) is None
+    m.close()
+
+
+def test_disk_lru_bound(tmp_path):
+    m = RouterMemo(str(tmp_path / "memo.sqlite"), "m", "p", max_items=2)
+    for t in "abc":
+        m.put(m.key(t), VAL)
+    assert m.stats()["size"] == 2 and m.stats()["evictions"] == 1
+
+
+def test_model_fingerprint(tmp_path):
+    f = tmp_path / "m.gguf"
+    f.write_bytes(b"a" * 10)
+    fp = model_fingerprint(str(f))
+    f.write_bytes(b"b" * 11)
+    assert model_fingerprint(str(f)) != fp
+    assert model_fingerprint(str(tmp_path / "nope")) == "missing"
+
+
+@pytest.fixture
+def memo_router(tmp_path, monkeypatch):
+    """route() with a memo under tmp_path and a scripted completion."""
+    memo = RouterMemo(str(tmp_path / "memo.sqlite"), "m", "p")
+    monkeypatch.setattr(llm, "_router_memo", lambda: memo)
+    replies = []
+    monkeypatch.setattr(llm, "_complete", lambda *a, **k: replies.pop(0))
+    return replies
+
+
+def test_route_is_served_from_the_memo_across_instances(memo_router):
+    memo_router.append(json.dumps(VAL))
+    assert llm.LLM().route("Who said knowledge is power?") == VAL
+    again = llm.LLM()
+    assert again.route("who said knowledge is power") == VAL
+    assert again.route_stats["disk_memo_hits"] == 1 and again.route_stats["calls"] == 0
+
+
+def test_truncated_answers_are_not_memoized(memo_router):
+    memo_router += ['{"action": "clarify", "fields": [], "fragment": ""} {"act', json.dumps(VAL)]
+    assert llm.LLM().route("hmm")["action"] == "clarify"
+    assert llm.LLM().route("hmm") == VAL
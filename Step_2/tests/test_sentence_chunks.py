@@ -0,0 +1,46 @@
+import pytest
+
+from llm import LLM, sentence_chunks
+
+
+def _chunks(text: str, step: int = 3, min_chars: int = 10):
+    deltas = [text[i:i + step] for i in range(0, len(text), step)]
+    return list(sentence_chunks(deltas, min_chars=min_chars))
+
+
+@pytest.mark.parametrize("step", [1, 3, 50])
+def test_cuts_at_sentence_ends_regardless_of_delta_size(step):
+    text = "The quote is by Francis Bacon. It appears in Meditationes Sacrae! Want another one? Sure"
+    assert _chunks(text, step) == ["The quote is by Francis Bacon.", "It appears in Meditationes Sacrae!",
+                                   "Want another one?", "Sure"]
+
+
+def test_short_sentences_are_merged():
+    assert _chunks("Yes. It is by Aesop, in the fables.") == ["Yes. It is by Aesop, in the fables."]
+
+
+@pytest.mark.parametrize("text, first", [
+    ("It was said by Dr. Martin Luther King in a speech. Then more.", "It was said by Dr. Martin Luther King in a speech."),
+    ("Written by J.R.R. Tolkien for his son. Then more.", "Written by J.R.R. Tolkien for his son."),
+    ("Quotes by e.g. Einstein are often misattributed. Then more.", "Quotes by e.g. Einstein are often misattributed."),
+])
+def test_abbreviations_do_not_end_a_sentence(text, first):
+    assert _chunks(text)[0] == first
+
+
+@pytest.mark.parametrize("text", [
+    "Then they went with plan B. And it worked out.",
+    "He asked and she said no. That was the end of it.",
+])
+def test_words_that_look_like_abbreviations_still_end_a_sentence(text):
+    assert len(_chunks(text)) == 2
+
+
+def test_closing_quotes_and_newlines():
+    assert _chunks('He said "knowledge is power." Then left.\nNext line here') == \
+        ['He said "knowledge is power."', "Then left.", "Next line here"]
+
+
+def test_clean_stream_strips_preamble_from_first_delta_only():
+    out = list(LLM()._clean_stream(["Sure, here it is:\nKnowledge is power.", " Sure thing."]))
+    assert out == ["Knowledge is power.", " Sure thing."]
@@ -1,7 +1,7 @@
-import threading, gc, re
+import threading, gc, re, queue, time
 import pyttsx3
 from difflib import get_close_matches
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Iterable, Callable, Dict, Any
 from user_prefs import get_prefs
 from config import TTS_RATE, TTS_VOLUME, TTS_VOICE
 
@@ -71,11 +71,7 @@ def resolve_voice_id_and_name(wanted: str) -> Tuple[Optional[str], Optional[str]
         try: engine.stop()
         except Exception: pass
 
-def speak(text: str, user_id: Optional[str] = None) -> None:
-    """Speak text synchronously. If user_id is None, use global defaults."""
-    if not text:
-        return
-
+def _voice_settings(user_id: Optional[str]) -> Tuple[str, int, float]:
     if user_id:
         prefs = get_prefs(user_id)
         voice = prefs.get("voice") or TTS_VOICE
@@ -83,29 +79,97 @@ def speak(text: str, user_id: Optional[str] = None) -> None:
         volume = float(prefs.get("volume") or TTS_VOLUME)
     else:
         voice, rate, volume = TTS_VOICE, TTS_RATE, TTS_VOLUME
+    return voice, rate, volume
+
+def _configured_engine(user_id: Optional[str]) -> pyttsx3.Engine:
+    voice, rate, volume = _voice_settings(user_id)
+    engine = pyttsx3.init(driverName="sapi5")
+    engine.setProperty("rate", rate)
+    engine.setProperty("volume", volume)
+    vid = _find_voice_id(engine, voice) if voice else None
+    if vid:
+        engine.setProperty("voice", vid)
+        # to know which voice is actually used
+        for v in engine.getProperty("voices"):
+            if v.id == vid:
+                print(f"[TTS] Using voice: {v.name}  (id={vid})  rate={rate}  vol={volume}")
+                break
+    else:
+        print(f"[TTS] No matching voice for {voice!r}; using system default.")
+    return engine
+
+def _release(engine) -> None:
+    try: engine.stop()
+    except Exception: pass
+    del engine
+    gc.collect()
+
+def speak(text: str, user_id: Optional[str] = None) -> None:
+    """Speak text synchronously. If user_id is None, use global defaults."""
+    if not text:
+        return
 
     with _lock:
-        engine = pyttsx3.init(driverName="sapi5")
+        engine = _configured_engine(user_id)
         try:
-            engine.setProperty("rate", rate)
-            engine.setProperty("volume", volume)
-            vid = _find_voice_id(engine, voice) if voice else None
-            if vid:
-                engine.setProperty("voice", vid)
-                # to know which voice is actually used
-                for v in engine.getProperty("voices"):
-                    if v.id == vid:
-                        print(f"[TTS] Using voice: {v.name}  (id={vid})  rate={rate}  vol={volume}")
-                        break
-            else:
-                print(f"[TTS] No matching voice for {voice!r}; using system default.")
             engine.say(str(text))
             engine.runAndWait()
         finally:
-            try: engine.stop()
-            except Exception: pass
-            del engine
-            gc.collect()
+            _release(engine)
+
+def speak_stream(chunks: Iterable[str], user_id: Optional[str] = None, t0: Optional[float] = None,
+                 on_chunk: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Speak chunks as they arrive (e.g. LLM sentences) while the producer keeps generating.
+    Returns the joined text and timings relative to t0 (default: now); first_audio_s is time-to-first-audio."""
+    t0 = time.perf_counter() if t0 is None else t0
+    q: "queue.Queue[Optional[str]]" = queue.Queue()
+    stats: Dict[str, Any] = {"chunks": 0, "first_chunk_s": None, "first_audio_s": None, "gen_s": None, "total_s": None}
+
+    def _consumer():
+        try:
+            import comtypes           # SAPI5 needs COM initialised on this thread
+            comtypes.CoInitialize()
+        except Exception:
+            pass
+        with _lock:
+            engine = None
+            try:
+                while True:
+                    chunk = q.get()
+                    if chunk is None:
+                        break
+                    if engine is None:
+                        engine = _configured_engine(user_id)
+                    if stats["first_audio_s"] is None:
+                        stats["first_audio_s"] = time.perf_counter() - t0
+                    engine.say(chunk)
+                    engine.runAndWait()
+            finally:
+                if engine is not None:
+                    _release(engine)
+
+    th = threading.Thread(target=_consumer, name="tts-stream", daemon=True)
+    th.start()
+    parts = []
+    try:
+        for chunk in chunks:
+            chunk = (chunk or "").strip()
+            if not chunk:
+                continue
+            if stats["first_chunk_s"] is None:
+                stats["first_chunk_s"] = time.perf_counter() - t0
+            parts.append(chunk)
+            stats["chunks"] += 1
+            if on_chunk:
+                on_chunk(chunk)
+            q.put(chunk)
+    finally:
+        stats["gen_s"] = time.perf_counter() - t0
+        q.put(None)
+        th.join()
+    stats["total_s"] = time.perf_counter() - t0
+    stats["text"] = " ".join(parts)
+    return stats
 
 def list_voices() -> list[tuple[str, str]]:
     engine = pyttsx3.init(driverName="sapi5")